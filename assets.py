@@ -0,0 +1,101 @@
+import hashlib
+import os
+import re
+import shutil
+
+from whitenoise.compress import Compressor
+
+# الملفات التي تحتوي بصمة المحتوى في اسمها لا تتغير أبداً ويمكن تخزينها مؤقتاً لمدة سنة
+CONTENT_HASH = re.compile(r'(?:^|[._/])[0-9a-f]{12,}(?:[._])')
+ONE_YEAR = 365 * 24 * 60 * 60
+
+
+def is_immutable(url):
+    return bool(CONTENT_HASH.search(url.rsplit('/', 1)[-1]))
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _copy_atomic(source, target):
+    tmp_path = f'{target}.{os.getpid()}.tmp'
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def _precompress(path, compressor):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if compressor.use_brotli and not os.path.exists(path + '.br'):
+        compressed = compressor.compress_brotli(data)
+        if compressor.is_compressed_effectively('Brotli', path, len(data), compressed):
+            _write_atomic(path + '.br', compressed)
+    if compressor.use_gzip and not os.path.exists(path + '.gz'):
+        compressed = compressor.compress_gzip(data)
+        if compressor.is_compressed_effectively('Gzip', path, len(data), compressed):
+            _write_atomic(path + '.gz', compressed)
+
+
+def build_manifest(static_folder, build_folder, skip=('uploads',)):
+    """نسخ ملفات static إلى build_folder بأسماء تحتوي بصمة المحتوى وضغطها مسبقاً بـ gzip و brotli
+
+    يعيد قاموساً يربط الاسم الأصلي بالاسم الجديد، مثل
+    css/style.css -> css/style.0123456789ab.css
+    ويحذف من build_folder النسخ التي لم تعد في الإصدار الحالي
+    """
+    manifest = {}
+    if not os.path.isdir(static_folder):
+        return manifest
+    os.makedirs(build_folder, exist_ok=True)
+    compressor = Compressor(quiet=True)
+    built = set()
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        dirs[:] = [d for d in dirs if os.path.normpath(os.path.join(rel_root, d)) not in skip]
+        target_root = os.path.normpath(os.path.join(build_folder, rel_root))
+        for name in files:
+            if name.startswith('.') or name.endswith(('.gz', '.br', '.tmp')):
+                continue
+            path = os.path.join(root, name)
+            stem, ext = os.path.splitext(name)
+            hashed_name = f'{stem}.{file_digest(path)}{ext}'
+            hashed_path = os.path.join(target_root, hashed_name)
+            if not os.path.exists(hashed_path):
+                os.makedirs(target_root, exist_ok=True)
+                _copy_atomic(path, hashed_path)
+            if compressor.should_compress(hashed_name):
+                _precompress(hashed_path, compressor)
+            built.update((hashed_path, hashed_path + '.gz', hashed_path + '.br'))
+            rel = os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, '/')
+            manifest[rel] = rel.rsplit('/', 1)[0] + '/' + hashed_name if '/' in rel else hashed_name
+    _prune(build_folder, built)
+    return manifest
+
+
+def _prune(build_folder, keep):
+    # ملفات .tmp قد تكون نسخة يكتبها عامل آخر الآن، فلا نحذفها
+    for root, dirs, files in os.walk(build_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in keep and not name.endswith('.tmp'):
+                os.remove(path)
+
+
+if __name__ == '__main__':
+    # يمكن تشغيله أثناء النشر حتى لا تقوم العمال بالبناء عند بدء التشغيل
+    from config import Config
+
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    print(f'{len(build_manifest(folder, Config.STATIC_BUILD_FOLDER))} static files fingerprinted')
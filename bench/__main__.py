@@ -0,0 +1,142 @@
+# python -m bench --products 5000 --orders 20000 --target both
+# python -m bench --save-baseline      حفظ النتائج الحالية كخط أساس
+# python -m bench                      يفشل (exit 1) إذا تراجع الأداء عن خط الأساس
+#                                      و (exit 2) إذا لم يوجد خط أساس للهدف، فلا ينجح القياس دون مقارنة
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'bench', 'baseline.json')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Load test the shop with scripted journeys.')
+    parser.add_argument('--target', choices=['client', 'gunicorn', 'both'], default='client')
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file in a temp dir)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=4, help='virtual users running in parallel')
+    parser.add_argument('--iterations', type=int, default=10, help='journeys per virtual user')
+    parser.add_argument('--journeys', help='comma separated subset of journeys to run')
+    parser.add_argument('--workers', type=int, help='gunicorn workers (default: gunicorn_config.py)')
+    parser.add_argument('--gunicorn-arg', action='append', default=[], help='extra argument passed to gunicorn')
+    parser.add_argument('--micro', action='store_true', help='also run component micro benchmarks')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    return parser.parse_args(argv)
+
+
+def run_journeys(make_user, data, args):
+    from bench.clients import Recorder
+    from bench.journeys import JOURNEYS, pick
+
+    names = args.journeys.split(',') if args.journeys else None
+    recorder = Recorder()
+    failures = []
+
+    def virtual_user(index):
+        rng = random.Random(args.seed * 1000 + index)
+        user = make_user(recorder, rng, f'user{index % max(args.users, 1)}')
+        try:
+            for _ in range(args.iterations):
+                JOURNEYS[pick(rng, names)][0](user, data)
+        except Exception as e:
+            failures.append(e)
+
+    threads = [threading.Thread(target=virtual_user, args=(i,)) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if failures:
+        raise failures[0]
+    return recorder.samples, elapsed
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    database = args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    env = {
+        'DATABASE_URL': database,
+        'QUERY_COUNT_HEADER': '1',
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'INSTANCE_FOLDER': os.path.join(workdir, 'instance'),
+        # كل المستخدمين الافتراضيين من نفس العنوان، فحدود IP كانت سترفض معظم تسجيلات الدخول
+        'RATE_LIMITS_ENABLED': '0',
+    }
+    # يجب ضبط المتغيرات قبل استيراد app لأنه يقرأها عند الاستيراد
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+
+    from bench import data as bench_data, micro, report
+    from bench.clients import HttpUser, TestClientUser, gunicorn_server
+    from bench.journeys import Dataset
+
+    print(f'Seeding {database} ...')
+    seeded = bench_data.seed(args.products, args.users, args.orders, args.messages, args.seed, args.wipe)
+    dataset = Dataset(seeded['product_ids'], seeded['order_ids'])
+
+    results = {}
+    targets = ['client', 'gunicorn'] if args.target == 'both' else [args.target]
+    for target in targets:
+        if target == 'client':
+            from app import app
+            samples, elapsed = run_journeys(
+                lambda recorder, rng, username: TestClientUser(app, recorder, rng, username), dataset, args)
+        else:
+            with gunicorn_server(env, args.workers, args.gunicorn_arg) as address:
+                samples, elapsed = run_journeys(
+                    lambda recorder, rng, username: HttpUser(address, recorder, rng, username), dataset, args)
+        results[target] = report.summarize(samples, elapsed)
+
+    if args.micro:
+        from bench.clients import Recorder
+        recorder = Recorder()
+        start = time.perf_counter()
+        micro.run(recorder, random.Random(args.seed))
+        results['micro'] = report.summarize(recorder.samples, time.perf_counter() - start)
+
+    for name, summary in results.items():
+        print(report.format_table(name, summary))
+        print()
+
+    baseline = report.load_baseline(args.baseline)
+    if args.save_baseline:
+        baseline.update(results)
+        report.save_baseline(args.baseline, baseline)
+        print(f'Baseline saved to {args.baseline}')
+        return 0
+
+    regressions = []
+    for name, summary in results.items():
+        if name in baseline:
+            regressions += [f'[{name}] {message}'
+                            for message in report.compare(summary, baseline[name], args.tolerance)]
+    if regressions:
+        print('Regressions against baseline:')
+        for message in regressions:
+            print(f'  {message}')
+        return 1
+    missing = [name for name in results if name not in baseline]
+    if missing:
+        print(f'No baseline for {", ".join(missing)} in {args.baseline}, '
+              'run on the reference machine with --save-baseline and commit the file')
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# python -m bench.cart_burst --shoppers 8 --seconds 10 --mutations 12
+# موجة تسوق: كل متسوق يعدل سلته عدة مرات ثم يتم الطلب
+# db: كل تعديل معاملة كتابة مستقلة كما كانت المسارات تعمل سابقاً
+# session: التعديلات في سلة الجلسة ثم كتابة واحدة عند إتمام الطلب
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _mutate(rng, product_ids, cart):
+    product_id = rng.choice(product_ids)
+    roll = rng.random()
+    if roll < 0.6 or product_id not in cart:
+        return 'add', product_id, rng.randint(1, 3)
+    if roll < 0.85:
+        return 'set', product_id, rng.randint(1, 5)
+    return 'remove', product_id, 0
+
+
+def _worker(mode, seconds, mutations, seed, shard, shards, product_ids, results):
+    sys.path.insert(0, ROOT)
+    from sqlalchemy.exc import OperationalError
+    from factory import create_cli_app
+    from models import db, CartItem, User
+    from queries import add_cart_items
+    from flask.sessions import SecureCookieSession
+    from carts import SessionCart
+
+    rng = random.Random(seed)
+    samples = []
+    app = create_cli_app()
+    with app.app_context():
+        # كل عملية لها مستخدمون مختلفون حتى لا تتداخل السلال
+        user_ids = db.session.scalars(db.select(User.id).where(User.is_admin.is_(False))).all()[shard::shards]
+        serializer = app.session_interface.get_signing_serializer(app)
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            user_id = rng.choice(user_ids)
+            session = SecureCookieSession()
+            cart = SessionCart(session)
+            for _ in range(mutations):
+                action, product_id, quantity = _mutate(rng, product_ids, cart.items())
+                start = perf_counter()
+                status = 200
+                try:
+                    if action == 'add':
+                        cart.add({product_id: quantity})
+                    else:
+                        cart.set(product_id, quantity)
+                    if mode == 'session':
+                        # تكلفة توقيع الكوكي التي تُرسل مع كل استجابة
+                        serializer.dumps(dict(session))
+                    elif action == 'add':
+                        add_cart_items(user_id, {product_id: quantity})
+                    else:
+                        add_cart_items(user_id, cart.items(), replace=True)
+                except OperationalError:
+                    # غالباً "database is locked" عند انتهاء busy_timeout
+                    db.session.rollback()
+                    status = 503
+                samples.append((f'{mode}:mutation', status, perf_counter() - start, None))
+            start = perf_counter()
+            status = 200
+            try:
+                if mode == 'session':
+                    add_cart_items(user_id, cart.items(), replace=True)
+                # إفراغ السلة كما يحدث عند إتمام الطلب
+                db.session.execute(db.delete(CartItem).where(CartItem.user_id == user_id))
+                db.session.commit()
+            except OperationalError:
+                db.session.rollback()
+                status = 503
+            samples.append((f'{mode}:checkout', status, perf_counter() - start, None))
+            db.session.remove()
+    results.put(samples)
+
+
+def run(mode, seeded, args):
+    from bench import report
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(mode, args.seconds, args.mutations, args.seed + i,
+                                                       i, args.shoppers, seeded['product_ids'], results))
+                 for i in range(args.shoppers)]
+    for process in processes:
+        process.start()
+    samples = []
+    for _ in processes:
+        samples.extend(results.get())
+    for process in processes:
+        process.join()
+    return report.summarize(samples, args.seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.cart_burst')
+    parser.add_argument('--modes', nargs='+', default=['db', 'session'])
+    parser.add_argument('--shoppers', type=int, default=8, help='concurrent processes')
+    parser.add_argument('--mutations', type=int, default=12, help='cart changes before each checkout')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-cart-')
+    os.environ['DATABASE_URL'] = args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+    sys.path.insert(0, ROOT)
+
+    from bench import data as bench_data, report
+    seeded = bench_data.seed(args.products, args.shoppers * 4, 0, 0, args.seed, args.wipe)
+
+    for mode in args.modes:
+        summary = run(mode, seeded, args)
+        mutations = summary['routes'].get(f'{mode}:mutation', {}).get('count', 0)
+        print(report.format_table(f'{mode} ({mutations / args.seconds:.0f} cart changes/s)', summary))
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
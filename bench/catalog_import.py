@@ -0,0 +1,118 @@
+# python -m bench.catalog_import --rows 100000 --formats csv jsonl xlsx --batch-size 500 1000 5000
+# سرعة الاستيراد الجماعي للمنتجات بالصف في الثانية: إضافة منتجات جديدة ثم تحديثها بنفس الملف
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rows(count, rng):
+    from bench.data import WORDS
+
+    for i in range(count):
+        yield {
+            'sku': f'SKU-{i:07d}',
+            'name': ' '.join(rng.choice(WORDS) for _ in range(3)),
+            'description': ' '.join(rng.choice(WORDS) for _ in range(20)),
+            'price': round(rng.uniform(0.25, 50), 3),
+        }
+
+
+def write_file(path, fmt, count, seed):
+    rng = random.Random(seed)
+    fields = ['sku', 'name', 'description', 'price']
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(_rows(count, rng))
+    elif fmt == 'jsonl':
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in _rows(count, rng):
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(fields)
+        for row in _rows(count, rng):
+            sheet.append([row[field] for field in fields])
+        workbook.save(path)
+
+
+def _timed_import(path, fmt, batch_size):
+    import catalog
+    from models import db, Product
+    from queries import upsert_insert
+
+    upsert = upsert_insert(db.session)
+    start = perf_counter()
+    report = catalog.import_products(db.session, Product, catalog.read_rows(path, fmt),
+                                     upsert=upsert, batch_size=batch_size)
+    return report['imported'] / (perf_counter() - start)
+
+
+def _timed_prices(batch_size):
+    import catalog
+    from models import db, Product
+
+    skus = db.session.scalars(db.select(Product.sku)).all()
+    start = perf_counter()
+    for i in range(0, len(skus), batch_size):
+        by_sku = [{'b_sku': sku, 'b_price': 1.0} for sku in skus[i:i + batch_size]]
+        catalog.update_prices(db.session, Product, [], by_sku)
+        db.session.commit()
+    return len(skus) / (perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.catalog_import')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--formats', nargs='+', default=['csv', 'jsonl', 'xlsx'])
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[1000])
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-catalog-')
+    os.environ['DATABASE_URL'] = args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+    sys.path.insert(0, ROOT)
+
+    import catalog
+    from bench.data import reset_database
+    from factory import create_cli_app
+    from models import db, Product
+
+    reset_database(args.wipe)
+    app = create_cli_app()
+    print(f'{args.rows} rows per import')
+    print(f'{"format":<8}{"batch":>7}{"insert rows/s":>15}{"update rows/s":>15}{"price rows/s":>15}')
+    for fmt in args.formats:
+        if fmt not in catalog.input_formats():
+            print(f'Skipping {fmt}: not supported in this environment')
+            continue
+        path = os.path.join(workdir, f'products.{fmt}')
+        write_file(path, fmt, args.rows, args.seed)
+        for batch_size in args.batch_size:
+            with app.app_context():
+                db.session.execute(db.delete(Product))
+                db.session.commit()
+                inserted = _timed_import(path, fmt, batch_size)
+                # نفس الملف مرة ثانية: كل الصفوف موجودة فيصبح الاستيراد تحديثاً
+                updated = _timed_import(path, fmt, batch_size)
+                prices = _timed_prices(batch_size)
+            print(f'{fmt:<8}{batch_size:>7}{inserted:>15.0f}{updated:>15.0f}{prices:>15.0f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# python -m bench.checkout_size --lines 10 100 500 1000 --repeat 20
+# زمن إتمام الطلب وعدد جمل SQL حسب عدد أسطر السلة (طلبات الجملة حتى 1000 سطر)
+# loop: حلقة ORM لكل سطر كما كان process_checkout سابقاً
+# set: checkout_cart بعدد ثابت من الجمل مهما كان حجم السلة
+import argparse
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loop_checkout(user_id):
+    from sqlalchemy.orm import joinedload
+    from models import db, CartItem, Order, OrderItem
+
+    cart_items = CartItem.query.options(joinedload(CartItem.product)).filter_by(user_id=user_id).all()
+    order = Order(user_id=user_id, full_name='Bench Customer', address='Kuwait', phone='+965 55555555',
+                  total=sum(item.product.price * item.quantity for item in cart_items), status='pending')
+    db.session.add(order)
+    for cart_item in cart_items:
+        db.session.add(OrderItem(order=order, product=cart_item.product, quantity=cart_item.quantity,
+                                 price=cart_item.product.price))
+        db.session.delete(cart_item)
+    db.session.commit()
+
+
+def set_checkout(user_id):
+    from queries import checkout_cart
+
+    checkout_cart(user_id, full_name='Bench Customer', address='Kuwait', phone='+965 55555555')
+
+
+MODES = {'loop': loop_checkout, 'set': set_checkout}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.checkout_size')
+    parser.add_argument('--lines', type=int, nargs='+', default=[10, 100, 500, 1000])
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['loop', 'set'])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-checkout-')
+    os.environ['DATABASE_URL'] = args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+    sys.path.insert(0, ROOT)
+
+    from sqlalchemy import event
+    from bench import data as bench_data
+    from factory import create_cli_app
+    from metrics import Histogram
+    from models import db
+    from queries import add_cart_items
+
+    seeded = bench_data.seed(args.products, 1, 0, 0, args.seed, args.wipe)
+    product_ids = seeded['product_ids']
+    rng = random.Random(args.seed)
+    # العد أثناء إتمام الطلب فقط وليس أثناء تعبئة السلة
+    statements = []
+    counting = [False]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if counting[0]:
+            statements[-1] += 1
+
+    print(f'{"mode":<6}{"lines":>7}{"p50 ms":>10}{"p95 ms":>10}{"statements":>12}')
+    with create_cli_app().app_context():
+        user_id = db.session.scalar(db.text("SELECT id FROM user WHERE username = 'user0'"))
+        event.listen(db.engine, 'before_cursor_execute', count)
+        for lines in args.lines:
+            for mode in args.modes:
+                histogram = Histogram()
+                for _ in range(args.repeat):
+                    picked = rng.sample(product_ids, min(lines, len(product_ids)))
+                    add_cart_items(user_id, {product_id: rng.randint(1, 10) for product_id in picked})
+                    db.session.remove()
+                    statements.append(0)
+                    counting[0] = True
+                    start = perf_counter()
+                    MODES[mode](user_id)
+                    histogram.record((perf_counter() - start) * 1e6)
+                    counting[0] = False
+                    db.session.remove()
+                per_checkout = sum(statements[-args.repeat:]) / args.repeat
+                print(f'{mode:<6}{lines:>7}{histogram.quantile(0.5) / 1000:>10.2f}'
+                      f'{histogram.quantile(0.95) / 1000:>10.2f}{per_checkout:>12.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.cookies import SimpleCookie
+from time import perf_counter
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def add(self, label, status, seconds, queries):
+        with self._lock:
+            self.samples.append((label, status, seconds, int(queries) if queries is not None else None))
+
+
+class VirtualUser:
+    def __init__(self, recorder, rng, username):
+        self.recorder = recorder
+        self.rng = rng
+        self.username = username
+
+    def get(self, label, path):
+        return self.request('GET', label, path)
+
+    def post(self, label, path, data=None, json=None):
+        return self.request('POST', label, path, data=data, json=json)
+
+
+class TestClientUser(VirtualUser):
+    """طلبات عبر Flask test client داخل نفس العملية، بدون تكلفة الشبكة"""
+
+    def __init__(self, app, recorder, rng, username):
+        super().__init__(recorder, rng, username)
+        self.client = app.test_client()
+
+    def request(self, method, label, path, data=None, json=None):
+        start = perf_counter()
+        response = self.client.open(path, method=method, data=data, json=json)
+        response.get_data()
+        elapsed = perf_counter() - start
+        self.recorder.add(label, response.status_code, elapsed, response.headers.get('X-Query-Count'))
+        response.close()
+        return response.status_code
+
+
+class HttpUser(VirtualUser):
+    """طلبات HTTP حقيقية إلى gunicorn مع حفظ الكوكيز، وبدون تتبع التحويلات"""
+
+    def __init__(self, address, recorder, rng, username, timeout=30):
+        super().__init__(recorder, rng, username)
+        self.host, self.port = address
+        self.timeout = timeout
+        self.cookies = SimpleCookie()
+        self.connection = None
+
+    def _send(self, method, path, body, headers):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+            self.connection = None
+        return response
+
+    def request(self, method, label, path, data=None, json=None):
+        headers = {}
+        body = None
+        if json is not None:
+            body = _json_dumps(json)
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={morsel.value}' for key, morsel in self.cookies.items())
+        start = perf_counter()
+        try:
+            response = self._send(method, path, body, headers)
+        except (http.client.HTTPException, OSError):
+            # الاتصال المحفوظ أُغلق من جهة الخادم، نعيد المحاولة باتصال جديد مرة واحدة
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            response = self._send(method, path, body, headers)
+        elapsed = perf_counter() - start
+        for header in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(header)
+        self.recorder.add(label, response.status, elapsed, response.getheader('X-Query-Count'))
+        return response.status
+
+
+def _json_dumps(value):
+    return json.dumps(value).encode('utf-8')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def gunicorn_server(env, workers=None, args=(), startup_timeout=30):
+    """تشغيل gunicorn محلياً بإعدادات gunicorn_config.py على منفذ عشوائي"""
+    port = _free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py',
+               '-b', f'127.0.0.1:{port}', *args, 'factory:create_app()']
+    if workers:
+        command[-1:-1] = ['-w', str(workers)]
+    # القياس للويب وحده، بدون عامل المهام الذي يشغله gunicorn_config.py داخل نفس الـ dyno
+    process = subprocess.Popen(command, cwd=ROOT, env=dict(os.environ, WEB_RUNS_WORKER='0', **env))
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with code {process.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError('gunicorn did not start in time')
+                time.sleep(0.2)
+        yield ('127.0.0.1', port)
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
@@ -0,0 +1,118 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+BENCH_PASSWORD = 'bench-password'
+BATCH_SIZE = 1000
+WORDS = ['أكواب', 'صحون', 'ملاعق', 'شوك', 'أكياس', 'علب', 'مناديل', 'ورق', 'حافظات', 'أغطية',
+         'بلاستيك', 'كرتون', 'قصدير', 'شفاف', 'كبير', 'صغير', 'cups', 'plates', 'bags', 'boxes']
+STATUSES = ['pending', 'completed', 'cancelled']
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert_returning_ids(db, table, rows):
+    ids = []
+    for batch in _batches(rows):
+        stmt = insert(table).returning(table.id, sort_by_parameter_order=True)
+        ids.extend(db.session.scalars(stmt, batch))
+    return ids
+
+
+def _insert(db, table, rows):
+    for batch in _batches(rows):
+        db.session.execute(insert(table), batch)
+
+
+def _phrase(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def reset_database(wipe=False):
+    """init_db.py يحذف كل الجداول: نرفض قاعدة بيانات فيها جداول (مثل --database لقاعدة حقيقية) إلا مع wipe"""
+    from sqlalchemy import inspect
+    from factory import create_cli_app
+    from init_db import init_database
+    from models import db
+
+    with create_cli_app().app_context():
+        tables = inspect(db.engine).get_table_names()
+        url = db.engine.url.render_as_string(hide_password=True)
+    if tables and not wipe:
+        raise RuntimeError(f'{url} already has {len(tables)} tables; pass --wipe to drop them and seed bench data')
+    init_database()
+
+
+def seed(products=1000, users=50, orders=2000, messages=500, seed=1, wipe=False):
+    """نفس بداية init_db.py ثم بيانات عشوائية بالحجم المطلوب، ونفس البذرة تعطي نفس البيانات"""
+    from extensions import password_hasher, product_search
+    from factory import create_cli_app
+    from models import db, User, Product, Order, OrderItem, ContactMessage, catalog_stamp
+
+    reset_database(wipe)
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with create_cli_app().app_context():
+        # كلمة مرور واحدة لكل المستخدمين حتى لا تستغرق التجزئة وقتاً طويلاً
+        password = password_hasher.hash(BENCH_PASSWORD)
+        user_ids = _insert_returning_ids(db, User, (
+            {'username': f'user{i}', 'password': password, 'is_admin': False} for i in range(users)))
+        product_rows = [{
+            'name': _phrase(rng, 3)[:100],
+            'description': _phrase(rng, 20),
+            'price': round(rng.uniform(0.25, 50), 3),
+            'image_url': None,
+        } for _ in range(products)]
+        product_ids = _insert_returning_ids(db, Product, product_rows)
+        prices = dict(zip(product_ids, (row['price'] for row in product_rows)))
+
+        order_items = []
+        order_rows = []
+        for _ in range(orders):
+            picked = rng.sample(product_ids, min(rng.randint(1, 5), len(product_ids)))
+            items = [(product_id, rng.randint(1, 10)) for product_id in picked]
+            order_items.append(items)
+            order_rows.append({
+                'user_id': rng.choice(user_ids) if user_ids else None,
+                'full_name': _phrase(rng, 2),
+                'address': _phrase(rng, 6),
+                'phone': f'+965 {rng.randint(50000000, 99999999)}',
+                'total': sum(prices[product_id] * quantity for product_id, quantity in items),
+                'status': rng.choice(STATUSES),
+                'date_created': now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+            })
+        order_ids = _insert_returning_ids(db, Order, order_rows)
+        _insert(db, OrderItem, (
+            {'order_id': order_id, 'product_id': product_id, 'quantity': quantity, 'price': prices[product_id]}
+            for order_id, items in zip(order_ids, order_items)
+            for product_id, quantity in items))
+
+        _insert(db, ContactMessage, ({
+            'name': _phrase(rng, 2),
+            'email': f'customer{i}@example.com',
+            'phone': f'+965 {rng.randint(50000000, 99999999)}',
+            'message': _phrase(rng, 30),
+            'date_sent': now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+            'status': rng.choice(['unread', 'read']),
+        } for i in range(messages)))
+        db.session.commit()
+
+        # الإدخال المباشر لا يمر بأحداث الجلسة، لذلك نحدّث الفهرس والنسخة يدوياً
+        product_search.reset()
+        catalog_stamp.bump()
+        return {
+            'users': users,
+            'product_ids': product_ids,
+            'order_ids': order_ids,
+            'messages': messages,
+        }
@@ -0,0 +1,118 @@
+# python -m bench.db_concurrency --writers 2 --readers 4 --seconds 10 --journal-mode DELETE WAL
+# قراءة وكتابة متزامنة من عدة عمليات على نفس قاعدة البيانات، كما يحدث مع عمال gunicorn
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _worker(role, seconds, seed, product_ids, results):
+    sys.path.insert(0, ROOT)
+    from sqlalchemy.exc import OperationalError
+    from factory import create_cli_app
+    from models import db, ContactMessage, Order, Product, User
+    from queries import add_cart_items
+
+    rng = random.Random(seed)
+    samples = []
+    with create_cli_app().app_context():
+        user_ids = db.session.scalars(db.select(User.id).where(User.is_admin.is_(False))).all()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if role == 'writer':
+                if rng.random() < 0.5:
+                    label = 'write:contact'
+                    def op():
+                        db.session.add(ContactMessage(name='bench', email='bench@example.com',
+                                                      message='x' * rng.randint(50, 500)))
+                        db.session.commit()
+                else:
+                    label = 'write:cart'
+                    def op():
+                        add_cart_items(rng.choice(user_ids), {rng.choice(product_ids): 1})
+            else:
+                if rng.random() < 0.7:
+                    label = 'read:products'
+                    def op():
+                        price = rng.uniform(0, 50)
+                        (Product.query.filter(Product.price >= price)
+                         .order_by(Product.price, Product.id).limit(24).all())
+                else:
+                    label = 'read:orders'
+                    def op():
+                        (Order.query.filter_by(status='pending')
+                         .order_by(Order.date_created.desc(), Order.id.desc()).limit(50).all())
+            start = perf_counter()
+            status = 200
+            try:
+                op()
+            except OperationalError:
+                # غالباً "database is locked" عند انتهاء busy_timeout
+                db.session.rollback()
+                status = 503
+            samples.append((label, status, perf_counter() - start, None))
+            db.session.remove()
+    results.put(samples)
+
+
+def run(journal_mode, args):
+    from bench import data as bench_data, report
+
+    workdir = tempfile.mkdtemp(prefix='bench-db-')
+    os.environ['DATABASE_URL'] = args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['SQLITE_JOURNAL_MODE'] = journal_mode
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+
+    # البيانات تُنشأ في عملية منفصلة حتى يقرأ app متغيرات البيئة الجديدة عند استيراده
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        seeded = pool.apply(bench_data.seed, (args.products, args.users, args.orders, 0, args.seed, args.wipe))
+
+    results = context.Queue()
+    roles = ['writer'] * args.writers + ['reader'] * args.readers
+    processes = [context.Process(target=_worker, args=(role, args.seconds, args.seed + i,
+                                                       seeded['product_ids'], results))
+                 for i, role in enumerate(roles)]
+    for process in processes:
+        process.start()
+    samples = []
+    for _ in processes:
+        samples.extend(results.get())
+    for process in processes:
+        process.join()
+    # كل عملية تعمل للمدة المحددة بعد بدء تشغيلها، فوقت الاستيراد لا يدخل في الحساب
+    return report.summarize(samples, args.seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.db_concurrency')
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file per run)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--journal-mode', nargs='+', default=['DELETE', 'WAL'])
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    sys.path.insert(0, ROOT)
+
+    from bench import report
+    for journal_mode in args.journal_mode:
+        summary = run(journal_mode, args)
+        print(report.format_table(f'journal_mode={journal_mode}', summary))
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
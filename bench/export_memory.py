@@ -0,0 +1,134 @@
+# python -m bench.export_memory --orders 500000 --formats csv jsonl --max-rss-mb 100
+# تصدير الطلبات (حوالي مليون سطر) في عملية جديدة وقياس أعلى RSS لها (لينكس فقط)
+# الحد على RSS المجهول (RssAnon): صفحات ملف SQLite عبر mmap_size تُحسب في RSS وتكبر مع حجم
+# القاعدة، لكنها ذاكرة ملف مشتركة يستعيدها النظام. يفشل (exit 1) إذا تجاوز أي تصدير --max-rss-mb
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_kb():
+    values = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in ('RssAnon', 'RssFile'):
+                values[name] = int(rest.split()[0])
+    return values
+
+
+class PeakSampler(threading.Thread):
+    """أعلى RssAnon أثناء التصدير، بالقراءة كل interval ثانية"""
+
+    def __init__(self, interval=0.02):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = {'RssAnon': 0, 'RssFile': 0}
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.is_set():
+            for name, value in rss_kb().items():
+                self.peak[name] = max(self.peak[name], value)
+            self.stop.wait(self.interval)
+
+
+def _export(env, path, results):
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+    from factory import create_app
+    from models import db, User
+
+    app = create_app()
+    with app.app_context():
+        admin_id = db.session.scalar(db.select(User.id).where(User.is_admin.is_(True)))
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+    # قبل التصدير: المكتبات والتطبيق فقط
+    before = rss_kb()['RssAnon']
+    sampler = PeakSampler()
+    sampler.start()
+    start = perf_counter()
+    response = client.get(path, buffered=False)
+    lines = size = 0
+    for chunk in response.response:
+        lines += chunk.count(b'\n')
+        size += len(chunk)
+    response.close()
+    sampler.stop.set()
+    sampler.join()
+    results.put({
+        'status': response.status_code,
+        'lines': lines,
+        'mb': size / 1024 / 1024,
+        'seconds': perf_counter() - start,
+        'anon_before_mb': before / 1024,
+        'anon_peak_mb': sampler.peak['RssAnon'] / 1024,
+        'file_peak_mb': sampler.peak['RssFile'] / 1024,
+        'rss_peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.export_memory')
+    parser.add_argument('--orders', type=int, default=500000, help='orders to seed, 1-3 items each')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--formats', nargs='+', default=['csv', 'jsonl'])
+    parser.add_argument('--max-rss-mb', type=float, default=100,
+                        help='peak anonymous RSS limit for the export process (SQLite mmap pages excluded)')
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-export-')
+    env = {
+        'DATABASE_URL': args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db'),
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'INSTANCE_FOLDER': os.path.join(workdir, 'instance'),
+    }
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+
+    from bench.data import reset_database
+    from bench.order_stats import seed
+    from factory import create_cli_app
+
+    reset_database(args.wipe)
+    start = perf_counter()
+    with create_cli_app().app_context():
+        seed(args.orders, args.products, args.seed)
+    print(f'Seeded {args.orders} orders in {perf_counter() - start:.1f}s')
+
+    # عملية جديدة لكل تصدير حتى لا تدخل ذاكرة البيانات المولدة في القياس
+    context = multiprocessing.get_context('spawn')
+    failed = False
+    print(f'{"format":<8}{"lines":>10}{"MB":>8}{"seconds":>9}{"anon before":>13}{"anon peak":>11}'
+          f'{"file peak":>11}{"RSS peak":>10}')
+    for fmt in args.formats:
+        results = context.Queue()
+        process = context.Process(target=_export, args=(env, f'/admin/export/orders.{fmt}?from=2000-01-01', results))
+        process.start()
+        row = results.get()
+        process.join()
+        print(f'{fmt:<8}{row["lines"]:>10}{row["mb"]:>8.1f}{row["seconds"]:>9.1f}{row["anon_before_mb"]:>13.1f}'
+              f'{row["anon_peak_mb"]:>11.1f}{row["file_peak_mb"]:>11.1f}{row["rss_peak_mb"]:>10.1f}')
+        if row['status'] != 200 or row['anon_peak_mb'] > args.max_rss_mb:
+            failed = True
+    if failed:
+        print(f'FAIL: an export returned an error or went over {args.max_rss_mb:.0f}MB anonymous RSS')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
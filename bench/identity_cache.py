@@ -0,0 +1,104 @@
+# python -m bench.identity_cache --requests 2000 --users 50
+# زمن /cart للمستخدمين المسجلين مع تعطيل تخزين الهويات (IDENTITY_CACHE_TTL=0) ومع تفعيله
+# كل وضع في عملية منفصلة لأن الإعداد يُقرأ عند استيراد التطبيق
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# المستودع لا يحتوي القوالب، فنستخدم قالباً بديلاً يمر على أسطر السلة عندما لا يوجد القالب الحقيقي
+STAND_IN = ('{{ settings.header_text }}{% for line in cart_items %}'
+            '{{ line.product.name }} {{ line.quantity }} {{ line.product.price }}{% endfor %}{{ total }}')
+
+
+def _measure(env, args, results):
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+    from jinja2 import ChoiceLoader, DictLoader
+    from bench.clients import Recorder
+    from factory import create_app
+    from models import db, User
+
+    app = create_app()
+    app.jinja_loader = ChoiceLoader([app.jinja_loader, DictLoader({'cart.html': STAND_IN})])
+    with app.app_context():
+        user_ids = db.session.scalars(db.select(User.id).where(User.is_admin.is_(False))).all()[:args.users]
+    clients = []
+    for user_id in user_ids:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        clients.append(client)
+
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    for i in range(args.warmup + args.requests):
+        client = rng.choice(clients)
+        start = perf_counter()
+        response = client.get('/cart')
+        if i >= args.warmup:
+            recorder.add('cart', response.status_code, perf_counter() - start,
+                         int(response.headers.get('X-Query-Count', 0)))
+    results.put(recorder.samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.identity_cache')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--lines', type=int, default=5, help='cart lines per user')
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-identity-')
+    env = {
+        'DATABASE_URL': args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db'),
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'INSTANCE_FOLDER': os.path.join(workdir, 'instance'),
+        'QUERY_COUNT_HEADER': '1',
+    }
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+
+    from bench import data as bench_data, report
+    from factory import create_cli_app
+    from models import db, User
+    from queries import add_cart_items
+
+    seeded = bench_data.seed(args.products, args.users, 0, 0, args.seed, args.wipe)
+    rng = random.Random(args.seed)
+    with create_cli_app().app_context():
+        for user_id in db.session.scalars(db.select(User.id).where(User.is_admin.is_(False))):
+            add_cart_items(user_id, {product_id: rng.randint(1, 5)
+                                     for product_id in rng.sample(seeded['product_ids'], args.lines)})
+
+    context = multiprocessing.get_context('spawn')
+    summaries = {}
+    for name, ttl in (('without identity cache', '0'), ('with identity cache', '300')):
+        results = context.Queue()
+        process = context.Process(target=_measure, args=(dict(env, IDENTITY_CACHE_TTL=ttl), args, results))
+        process.start()
+        samples = results.get()
+        process.join()
+        summaries[name] = report.summarize(samples, sum(sample[2] for sample in samples))
+        print(report.format_table(f'/cart {name}', summaries[name]))
+        print()
+    # الجداول تقرّب الأزمنة إلى حدود Histogram، فنعرض المتوسط أيضاً
+    for name, summary in summaries.items():
+        print(f'{name:<24}{summary["seconds"] / summary["requests"] * 1000:>8.3f} ms mean'
+              f'{summary["routes"]["cart"]["queries"]:>6.1f} queries')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from bench.data import BENCH_PASSWORD, WORDS
+
+ADMIN_USERNAME = 'admin'
+ADMIN_PASSWORD = 'admin123'
+
+
+class Dataset:
+    def __init__(self, product_ids, order_ids):
+        self.product_ids = product_ids
+        self.order_ids = order_ids
+
+
+def browse(user, data):
+    rng = user.rng
+    user.get('home', '/')
+    user.get('products', '/products')
+    user.get('products_by_price', '/products?sort=price')
+    user.get('api_products', '/api/products?per_page=48')
+    for _ in range(3):
+        user.get('product_detail', f'/product/{rng.choice(data.product_ids)}')
+    word = quote(rng.choice(WORDS))
+    user.get('search', f'/search?q={word}')
+    user.get('api_search', f'/api/search?q={word}')
+    user.get('about', '/about')
+
+
+def shop(user, data):
+    rng = user.rng
+    # سلة الزائر تُدمج مع سلة المستخدم عند تسجيل الدخول
+    user.post('add_to_cart', f'/add_to_cart/{rng.choice(data.product_ids)}', data={'quantity': 1})
+    user.post('login', '/login', data={'username': user.username, 'password': BENCH_PASSWORD})
+    user.get('products', '/products')
+    for _ in range(2):
+        user.get('product_detail', f'/product/{rng.choice(data.product_ids)}')
+        user.post('add_to_cart', f'/add_to_cart/{rng.choice(data.product_ids)}',
+                  data={'quantity': rng.randint(1, 5)})
+    user.post('add_to_cart_batch', '/add_to_cart/batch', json={'items': [
+        {'product_id': product_id, 'quantity': rng.randint(1, 3)}
+        for product_id in rng.sample(data.product_ids, min(5, len(data.product_ids)))
+    ]})
+    user.get('cart', '/cart')
+    user.get('checkout', '/checkout')
+    user.post('process_checkout', '/process_checkout', data={
+        'full_name': 'Bench Customer',
+        'address': 'Kuwait',
+        'phone': '+965 55555555',
+    })
+    user.get('logout', '/logout')
+
+
+def contact(user, data):
+    user.get('contact', '/contact')
+    user.post('contact_submit', '/contact', data={
+        'name': 'Bench Visitor',
+        'email': 'visitor@example.com',
+        'phone': '+965 55555555',
+        'message': ' '.join(user.rng.choice(WORDS) for _ in range(30)),
+    })
+
+
+def admin(user, data):
+    rng = user.rng
+    month_ago = (date.today() - timedelta(days=30)).isoformat()
+    user.post('login', '/login', data={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+    user.get('admin', '/admin')
+    user.get('admin_orders', '/admin/orders')
+    user.get('admin_orders_filtered', f'/admin/orders?status=pending&from={month_ago}')
+    user.get('admin_order_stats', '/admin/orders/stats')
+    if data.order_ids:
+        user.get('print_order', f'/admin/orders/{rng.choice(data.order_ids)}/print')
+    user.get('admin_messages', '/admin/messages')
+    user.get('admin_products', '/admin/products')
+    user.get('admin_export_orders', f'/admin/export/orders.csv?from={month_ago}')
+    user.get('admin_jobs', '/admin/jobs')
+    user.get('logout', '/logout')
+
+
+# اسم الرحلة: (الدالة، الوزن النسبي لاختيارها)
+JOURNEYS = {
+    'browse': (browse, 6),
+    'shop': (shop, 3),
+    'contact': (contact, 1),
+    'admin': (admin, 1),
+}
+
+
+def pick(rng, names=None):
+    names = names or list(JOURNEYS)
+    return rng.choices(names, weights=[JOURNEYS[name][1] for name in names])[0]
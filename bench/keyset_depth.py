@@ -0,0 +1,108 @@
+# python -m bench.keyset_depth --scales 10000 100000 1000000 --repeat 20
+# زمن صفحة /api/products عند 10 آلاف و100 ألف ومليون منتج: الصفحة الأولى وصفحة عميقة (قرب نهاية
+# الكتالوج) لكل ترتيب، مع استعلام OFFSET لنفس العمق للمقارنة (الاستعلام فقط بدون HTTP)
+# زمن keyset يبقى ثابتاً بينما يزيد OFFSET مع العمق
+import argparse
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SORTS = ('id', 'price', 'name')
+
+
+def grow(start, stop, rng):
+    """إضافة المنتجات من start حتى stop بمعرفات صريحة، فكل حجم يبني على الحجم السابق"""
+    from sqlalchemy import insert
+    from bench.data import _batches, _phrase
+    from models import db, Product
+
+    rows = ({'id': product_id, 'name': _phrase(rng, 3)[:100], 'price': round(rng.uniform(0.25, 50), 3)}
+            for product_id in range(start + 1, stop + 1))
+    for batch in _batches(rows, 5000):
+        db.session.execute(insert(Product), batch)
+    db.session.commit()
+
+
+def median_ms(fn, repeat):
+    from metrics import Histogram
+
+    histogram = Histogram()
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        histogram.record((perf_counter() - start) * 1e6)
+    return histogram.quantile(0.5) / 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.keyset_depth')
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--depth', type=float, default=0.9, help='position of the deep page in the catalog (0-1)')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-keyset-')
+    os.environ['DATABASE_URL'] = args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+    sys.path.insert(0, ROOT)
+
+    import migrate
+    from bench.data import reset_database
+    from factory import create_app
+    from models import db, catalog_stamp
+    from pagination import encode_cursor
+    from queries import PRODUCT_SORTS
+
+    reset_database(args.wipe)
+    app = create_app()
+    client = app.test_client()
+    per_page = app.config['PRODUCTS_PER_PAGE']
+    rng = random.Random(args.seed)
+    seeded = 0
+
+    print(f'{"products":>10}{"sort":>7}{"first ms":>10}{"deep ms":>10}{"offset ms":>11}')
+    for scale in sorted(args.scales):
+        with app.app_context():
+            grow(seeded, scale, rng)
+            seeded = scale
+            migrate.analyze(db.engine)
+            # الإدخال المباشر لا يمر بأحداث الجلسة، فنحدث الإصدار حتى يُعاد بناء product_table
+            catalog_stamp.bump()
+            deep = int(scale * args.depth)
+            cursors = {}
+            for sort in SORTS:
+                columns = PRODUCT_SORTS[sort]
+                # قيم صف في العمق المطلوب، فقط لبناء المؤشر وخارج القياس
+                row = db.session.execute(db.select(*columns).order_by(*columns).offset(deep).limit(1)).one()
+                cursors[sort] = encode_cursor(sort, list(row))
+
+        for sort in SORTS:
+            def first_page():
+                assert client.get(f'/api/products?sort={sort}').status_code == 200
+
+            def deep_page():
+                assert client.get(f'/api/products?sort={sort}&cursor={cursors[sort]}').status_code == 200
+
+            def offset_page():
+                from models import Product
+
+                with app.app_context():
+                    columns = PRODUCT_SORTS[sort]
+                    Product.query.order_by(*columns).offset(deep).limit(per_page + 1).all()
+
+            # طلب أول يبني product_table وفهرس البحث بعد الإضافة
+            first_page()
+            print(f'{scale:>10}{sort:>7}{median_ms(first_page, args.repeat):>10.2f}'
+                  f'{median_ms(deep_page, args.repeat):>10.2f}{median_ms(offset_page, args.repeat):>11.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+from time import perf_counter
+
+from bench.data import BENCH_PASSWORD, WORDS
+
+
+def _timed(recorder, label, fn, repeat):
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        recorder.add(label, 200, perf_counter() - start, None)
+
+
+def run(recorder, rng, repeat=50):
+    """قياس المكونات منفردة: البحث، تجزئة كلمات المرور، صفحات keyset والتصدير الكامل"""
+    from app import app
+    from extensions import password_hasher, product_search
+    from models import db, User, Product
+    from queries import PRODUCT_SORTS
+    from bench.journeys import ADMIN_PASSWORD, ADMIN_USERNAME
+    from pagination import KeysetPage
+
+    with app.app_context():
+        _timed(recorder, 'micro:search', lambda: product_search.search(rng.choice(WORDS), limit=50), repeat)
+
+        stored = db.session.scalar(db.select(User.password).where(User.username == 'user0'))
+        if stored:
+            _timed(recorder, 'micro:password_verify',
+                   lambda: password_hasher.verify(stored, BENCH_PASSWORD), max(1, repeat // 10))
+
+        def walk_pages(pages=20):
+            cursor = None
+            for _ in range(pages):
+                page = KeysetPage(Product.query, PRODUCT_SORTS['price'], cursor=cursor, per_page=24, tag='price')
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+            db.session.remove()
+        _timed(recorder, 'micro:keyset_20_pages', walk_pages, max(1, repeat // 5))
+
+    client = app.test_client()
+    client.post('/login', data={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+
+    def full_export():
+        response = client.get('/admin/export/orders.csv')
+        for _ in response.response:
+            pass
+        response.close()
+    _timed(recorder, 'micro:export_orders_csv', full_export, max(1, repeat // 10))
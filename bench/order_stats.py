@@ -0,0 +1,130 @@
+# python -m bench.order_stats --orders 1000000 --max-ms 500
+# لوحة الطلبات مع مليون طلب: الإحصائيات الافتراضية (آخر ORDER_STATS_DAYS يوماً) مقارنة بكل السجل
+# وتصفح الطلبات بطريقة keyset. يفشل (exit 1) إذا تجاوز زمن الصفحة الافتراضية --max-ms
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _orders(count, product_count, rng, now):
+    from bench.data import STATUSES
+
+    # معرفات صريحة حتى لا نحتاج RETURNING لمليون صف، والقاعدة جديدة في كل تشغيل
+    for order_id in range(1, count + 1):
+        items = [(rng.randint(1, product_count), rng.randint(1, 10)) for _ in range(rng.randint(1, 3))]
+        yield {
+            'id': order_id,
+            'user_id': None,
+            'full_name': 'Bench Customer',
+            'address': 'Kuwait',
+            'phone': '+965 55555555',
+            'total': float(sum(quantity for _, quantity in items)),
+            'status': rng.choice(STATUSES),
+            'date_created': now - timedelta(seconds=rng.randint(0, 3 * 365 * 24 * 3600)),
+        }, items
+
+
+def seed(count, product_count, seed):
+    from sqlalchemy import insert
+    from bench.data import _batches
+    from models import db, Order, OrderItem, Product
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    db.session.execute(insert(Product), [{'id': i, 'name': f'product {i}', 'price': 1.0}
+                                         for i in range(1, product_count + 1)])
+    for batch in _batches(_orders(count, product_count, rng, now)):
+        db.session.execute(insert(Order), [order for order, _ in batch])
+        db.session.execute(insert(OrderItem), [
+            {'order_id': order['id'], 'product_id': product_id, 'quantity': quantity, 'price': 1.0}
+            for order, items in batch for product_id, quantity in items])
+    db.session.commit()
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        elapsed = (perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.order_stats')
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pages', type=int, default=20, help='keyset pages to walk')
+    parser.add_argument('--max-ms', type=float, default=500, help='limit for the default /admin/orders/stats')
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-orders-')
+    os.environ['DATABASE_URL'] = args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+    sys.path.insert(0, ROOT)
+
+    import migrate
+    from bench.data import reset_database
+    from factory import create_app
+    from models import db, Order, User
+    from pagination import KeysetPage
+    from queries import order_filters, order_stats, orders_with_items
+
+    reset_database(args.wipe)
+    app = create_app()
+    with app.app_context():
+        start = perf_counter()
+        seed(args.orders, args.products, args.seed)
+        migrate.analyze(db.engine)
+        print(f'Seeded {args.orders} orders in {perf_counter() - start:.1f}s')
+        admin_id = db.session.scalar(db.select(User.id).where(User.is_admin.is_(True)))
+
+        def walk_pages():
+            cursor = None
+            for _ in range(args.pages):
+                page = KeysetPage(orders_with_items().filter(*order_filters()), (Order.date_created, Order.id),
+                                  cursor=cursor, per_page=app.config['ORDERS_PER_PAGE'], descending=True,
+                                  tag='orders')
+                page.items
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+            db.session.remove()
+
+        full_history = timed(lambda: order_stats(), args.repeat)
+        pages = timed(walk_pages, args.repeat)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+
+    def default_page():
+        response = client.get('/admin/orders/stats')
+        assert response.status_code == 200, response.status_code
+    default_stats = timed(default_page, args.repeat)
+
+    print(f'{"measure":<36}{"best ms":>10}')
+    print(f'{"order_stats, full history":<36}{full_history:>10.1f}')
+    print(f'{"/admin/orders/stats, default window":<36}{default_stats:>10.1f}')
+    print(f'{f"keyset, {args.pages} pages":<36}{pages:>10.1f}')
+    if default_stats > args.max_ms:
+        print(f'FAIL: default stats took {default_stats:.1f}ms, limit {args.max_ms:.0f}ms')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# python -m bench.page_cache --products 5000 --seconds 10
+# عدد الطلبات في الثانية لنفس تصفح الزوار (الرئيسية، المنتجات، صفحة المنتج، من نحن)
+# مع تعطيل تخزين الصفحات (PAGE_CACHE_ENABLED) ومع تفعيله
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# المستودع لا يحتوي القوالب، فنستخدم قوالب بديلة تمر على نفس البيانات عندما لا توجد القوالب الحقيقية
+STAND_IN = (
+    '<html><head><title>{{ settings.header_text }}</title></head><body>'
+    '<header style="color: {{ settings.primary_color }}">{{ settings.header_description }}</header>'
+    '{% for product in products or [] %}<article><a href="{{ url_for(\'shop.product_detail\', product_id=product.id) }}">'
+    '{{ product.name }}</a> <span>{{ "%.3f"|format(product.price) }}</span> {{ product.image_url }}</article>{% endfor %}'
+    '{% if page and page.next_cursor %}<a href="?cursor={{ page.next_cursor }}">next</a>{% endif %}'
+    '{% if product %}<h1>{{ product.name }}</h1><p>{{ product.description }}</p>{% endif %}'
+    '<footer>{{ settings.phone1 }} {{ settings.email }} {{ settings.address }}</footer></body></html>'
+)
+TEMPLATES = ('index.html', 'products.html', 'product_detail.html', 'about.html')
+
+
+def workload(rng, product_ids, cursors):
+    roll = rng.random()
+    if roll < 0.3:
+        return 'home', '/'
+    if roll < 0.55:
+        return 'products', f'/products?cursor={rng.choice(cursors)}' if cursors and rng.random() < 0.5 else '/products'
+    if roll < 0.9:
+        return 'product_detail', f'/product/{rng.choice(product_ids)}'
+    return 'about', '/about'
+
+
+def run(app, enabled, product_ids, cursors, args):
+    from bench import report
+    from bench.clients import Recorder
+    from extensions import page_cache
+
+    app.config['PAGE_CACHE_ENABLED'] = enabled
+    page_cache.clear()
+    client = app.test_client()
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    start = time.monotonic()
+    while time.monotonic() - start < args.seconds:
+        label, path = workload(rng, product_ids, cursors)
+        began = perf_counter()
+        response = client.get(path)
+        recorder.add(label, response.status_code, perf_counter() - began, None)
+    return report.summarize(recorder.samples, time.monotonic() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.page_cache')
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--database', help='database URL (default: a fresh SQLite file)')
+    parser.add_argument('--wipe', action='store_true', help='drop the tables of an existing --database')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-page-cache-')
+    os.environ['DATABASE_URL'] = args.database or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+    sys.path.insert(0, ROOT)
+
+    from jinja2 import ChoiceLoader, DictLoader
+    from bench import data as bench_data, report
+    from factory import create_app
+
+    seeded = bench_data.seed(args.products, 1, 0, 0, args.seed, args.wipe)
+    app = create_app()
+    app.jinja_loader = ChoiceLoader([app.jinja_loader, DictLoader({name: STAND_IN for name in TEMPLATES})])
+    # مؤشرات أول عشر صفحات من /api/products بنفس ترتيب /products
+    cursors = []
+    client = app.test_client()
+    cursor = None
+    for _ in range(10):
+        cursor = client.get('/api/products' + (f'?cursor={cursor}' if cursor else '')).get_json()['next_cursor']
+        if cursor is None:
+            break
+        cursors.append(cursor)
+
+    results = {}
+    for name, enabled in (('cache off', False), ('cache on', True)):
+        results[name] = run(app, enabled, seeded['product_ids'], cursors, args)
+        print(report.format_table(name, results[name]))
+        print()
+    off, on = results['cache off']['throughput_rps'], results['cache on']['throughput_rps']
+    print(f'throughput: {off:.1f} req/s without the page cache, {on:.1f} req/s with it ({on / off:.1f}x)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# python -m bench.password_cost --methods scrypt:16384:8:1 scrypt:32768:8:1 pbkdf2:sha256:600000 --clients 8
+# عدد عمليات الدخول في الثانية لكل تكلفة تجزئة، عبر مسار /login كاملاً مع مجموعة خيوط التجزئة
+# كل طريقة في عملية منفصلة لأن PASSWORD_HASH_METHOD يُقرأ من البيئة عند استيراد config
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'bench-password'
+
+
+def _run(method, clients, seconds, results):
+    workdir = tempfile.mkdtemp(prefix='bench-passwords-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+    os.environ['PASSWORD_HASH_METHOD'] = method
+    # الحدود توقف معظم المحاولات من نفس العنوان قبل الوصول إلى التجزئة
+    os.environ['RATE_LIMITS_ENABLED'] = '0'
+    sys.path.insert(0, ROOT)
+    from extensions import password_hasher
+    from factory import create_app
+    from models import db, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(User(username=f'user{i}', password=password_hasher.hash(PASSWORD)) for i in range(clients))
+        db.session.commit()
+
+    samples = []
+    deadline = time.monotonic() + seconds
+
+    def client(index):
+        http = app.test_client()
+        # نصف المحاولات بكلمة مرور خاطئة أو اسم غير موجود، وكلها تدفع نفس تكلفة التجزئة
+        attempts = [(f'user{index}', PASSWORD, 'login:ok'), (f'user{index}', 'wrong', 'login:wrong_password'),
+                    (f'missing{index}', PASSWORD, 'login:unknown_user')]
+        turn = 0
+        while time.monotonic() < deadline:
+            username, password, label = attempts[turn % len(attempts)]
+            turn += 1
+            start = perf_counter()
+            response = http.post('/login', data={'username': username, 'password': password})
+            samples.append((label, response.status_code, perf_counter() - start, None))
+            if label == 'login:ok':
+                http.get('/logout')
+
+    start = perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((samples, perf_counter() - start))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.password_cost')
+    parser.add_argument('--methods', nargs='+', default=['scrypt:16384:8:1', 'scrypt:32768:8:1',
+                                                         'scrypt:65536:8:1', 'pbkdf2:sha256:600000'])
+    parser.add_argument('--clients', type=int, default=8, help='concurrent login attempts')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args(argv)
+    sys.path.insert(0, ROOT)
+
+    from bench import report
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for method in args.methods:
+        results = context.Queue()
+        process = context.Process(target=_run, args=(method, args.clients, args.seconds, results))
+        process.start()
+        samples, seconds = results.get()
+        process.join()
+        summary = report.summarize(samples, seconds)
+        print(report.format_table(method, summary))
+        print()
+        rows.append((method, summary))
+
+    print(f'{"method":<24}{"logins/s":>10}{"p50 ms":>10}{"p95 ms":>10}')
+    for method, summary in rows:
+        print(f'{method:<24}{summary["throughput_rps"]:>10.1f}{summary["p50_ms"]:>10.1f}{summary["p95_ms"]:>10.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
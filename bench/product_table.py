@@ -0,0 +1,131 @@
+# python -m bench.product_table --products 100000 --workers 4 --lines 20
+# مجموع السلة من product_table مقارنة بتحميل كائنات Product، والذاكرة لكل عامل
+# الذاكرة: PSS يقسم الصفحات المشتركة على العمليات التي تستخدمها، فيظهر توفير mmap بين العمال
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory_kb():
+    """RSS و PSS للعملية الحالية من /proc (لينكس فقط)"""
+    values = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                if name in ('Rss', 'Pss'):
+                    values[name.lower()] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def _worker(mode, barrier, results):
+    sys.path.insert(0, ROOT)
+    from extensions import RECORD_COLUMNS, product_table
+    from factory import create_cli_app
+    from models import db, Product
+
+    with create_cli_app().app_context():
+        ids = db.session.scalars(db.select(Product.id)).all()
+        if mode == 'table':
+            # لمس كل السجلات حتى تدخل كل صفحات الملف في ذاكرة العملية
+            kept = product_table.get_many(ids)
+            kept = len(kept)
+        elif mode == 'dict':
+            # البديل: نسخة كاملة من الكتالوج في ذاكرة كل عامل
+            kept = {row.id: tuple(row) for row in db.session.execute(db.select(*RECORD_COLUMNS))}
+        else:
+            kept = None
+        # كل العمال أحياء في نفس الوقت حتى يُحسب PSS على الصفحات المشتركة
+        barrier.wait()
+        results.put(memory_kb())
+        barrier.wait()
+    del kept
+
+
+def measure_memory(mode, workers):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(mode, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {key: sum(sample.get(key, 0) for sample in samples) / workers for key in ('rss', 'pss')}
+
+
+def measure_totals(recorder, rng, lines, repeat):
+    from carts import CartLine
+    from factory import create_cli_app
+    from models import db, Product
+    from queries import cart_total, product_records
+
+    with create_cli_app().app_context():
+        ids = db.session.scalars(db.select(Product.id)).all()
+        for _ in range(repeat):
+            cart = {product_id: rng.randint(1, 5) for product_id in rng.sample(ids, lines)}
+
+            start = perf_counter()
+            products = Product.query.filter(Product.id.in_(list(cart))).all()
+            cart_total([CartLine(product, cart[product.id]) for product in products])
+            recorder.add('cart_total:orm', 200, perf_counter() - start, None)
+            db.session.remove()
+
+            start = perf_counter()
+            records = product_records(list(cart))
+            cart_total([CartLine(record, cart[product_id]) for product_id, record in records.items()])
+            recorder.add('cart_total:table', 200, perf_counter() - start, None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.product_table')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--lines', type=int, default=20, help='products per cart')
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-table-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['METRICS_DIR'] = os.path.join(workdir, 'metrics')
+    os.environ['INSTANCE_FOLDER'] = os.path.join(workdir, 'instance')
+    sys.path.insert(0, ROOT)
+
+    from bench import data as bench_data, report
+    from bench.clients import Recorder
+    from extensions import product_table
+    from factory import create_cli_app
+    bench_data.seed(args.products, 1, 0, 0, args.seed)
+
+    with create_cli_app().app_context():
+        start = perf_counter()
+        stats = product_table.stats()
+        print(f'built product table: {stats["products"]} products, {stats["bytes"] / 1024 / 1024:.1f} MB '
+              f'in {perf_counter() - start:.2f}s')
+
+    recorder = Recorder()
+    start = perf_counter()
+    measure_totals(recorder, random.Random(args.seed), args.lines, args.repeat)
+    print(report.format_table(f'{args.lines}-line cart totals', report.summarize(recorder.samples,
+                                                                                 perf_counter() - start)))
+    print()
+    print(f'memory per worker ({args.workers} workers, KB)')
+    print(f'{"mode":<8}{"rss":>10}{"pss":>10}')
+    for mode in ('none', 'table', 'dict'):
+        memory = measure_memory(mode, args.workers)
+        print(f'{mode:<8}{memory["rss"]:>10.0f}{memory["pss"]:>10.0f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# python -m bench.rate_flood --flooders 16 --fast 4 --seconds 10
+# سرعة العملاء العاديين أثناء موجة POST على /contact و /login، مع الحدود وبدونها
+# كل الطلبات من 127.0.0.1، فالعملاء العاديون يطلبون صفحات GET التي لا تخضع للحدود
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def flooder(address, recorder, rng, stop):
+    from bench.clients import HttpUser
+    from bench.journeys import ADMIN_USERNAME
+
+    user = HttpUser(address, recorder, rng, None)
+    while not stop.is_set():
+        try:
+            if rng.random() < 0.5:
+                user.post('flood:contact', '/contact', data={
+                    'name': 'bot', 'email': 'bot@example.com', 'phone': '0', 'message': 'x' * 200})
+            else:
+                # كلمة مرور خاطئة لحساب موجود حتى يتم حساب التجزئة في كل طلب
+                user.post('flood:login', '/login', data={'username': ADMIN_USERNAME, 'password': 'wrong'})
+        except OSError:
+            # العامل أُعيد تشغيله (max_requests) أثناء الطلب
+            user.connection = None
+
+
+def fast_client(address, recorder, rng, product_ids, stop):
+    from bench.clients import HttpUser
+
+    user = HttpUser(address, recorder, rng, None)
+    while not stop.is_set():
+        user.get('api_products', '/api/products')
+        user.get('api_search', '/api/search?q=plastic')
+
+
+def run(env, flooders, product_ids, args):
+    from bench import report
+    from bench.clients import Recorder, gunicorn_server
+
+    with gunicorn_server(env, args.workers) as address:
+        stop = threading.Event()
+        recorder = Recorder()
+        threads = [threading.Thread(target=flooder, args=(address, recorder, random.Random(i), stop), daemon=True)
+                   for i in range(flooders)]
+        threads += [threading.Thread(target=fast_client,
+                                     args=(address, recorder, random.Random(args.seed + i), product_ids, stop))
+                    for i in range(args.fast)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return report.summarize(recorder.samples, args.seconds)
+
+
+def contact_messages():
+    from factory import create_cli_app
+    from models import db, ContactMessage
+
+    with create_cli_app().app_context():
+        return db.session.scalar(db.select(db.func.count()).select_from(ContactMessage))
+
+
+def measure_check(workdir, count):
+    """تكلفة فحص واحد في الجدول المشترك بالميكروثانية"""
+    from ratelimit import Limit, TokenBuckets
+
+    buckets = TokenBuckets(os.path.join(workdir, 'micro.table'))
+    limit = Limit(20, 60)
+    keys = [f'login:ip:10.0.{i // 256 % 256}.{i % 256}' for i in range(count)]
+    start = perf_counter()
+    for key in keys:
+        buckets.hit(key, limit)
+    return (perf_counter() - start) / count * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.rate_flood')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--flooders', type=int, default=16, help='concurrent clients posting forms')
+    parser.add_argument('--fast', type=int, default=4, help='concurrent normal clients being measured')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-flood-')
+    env = {
+        'DATABASE_URL': 'sqlite:///' + os.path.join(workdir, 'bench.db'),
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'INSTANCE_FOLDER': os.path.join(workdir, 'instance'),
+        'RATE_LIMIT_PATH': os.path.join(workdir, 'ratelimit.table'),
+    }
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+
+    from bench import data as bench_data, report
+    seeded = bench_data.seed(args.products, 1, 0, 0, args.seed)
+
+    print(f'rate limit check: {measure_check(workdir, 100000):.1f} us per request')
+    print()
+    runs = [('no flood', 0, '1'), ('flood, limits off', args.flooders, '0'), ('flood, limits on', args.flooders, '1')]
+    for title, flooders, enabled in runs:
+        before = contact_messages()
+        summary = run(dict(env, RATE_LIMITS_ENABLED=enabled), flooders, seeded['product_ids'], args)
+        stored = contact_messages() - before
+        print(report.format_table(f'{title} ({stored} contact messages stored)', summary))
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
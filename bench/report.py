@@ -0,0 +1,91 @@
+import json
+import os
+
+from metrics import Histogram
+
+# فروق أصغر من هذا الحد (بالمللي ثانية) تعتبر ضوضاء في القياس
+NOISE_FLOOR_MS = 1.0
+
+
+def summarize(samples, wall_seconds):
+    groups = {}
+    for label, status, seconds, queries in samples:
+        group = groups.setdefault(label, {'histogram': Histogram(), 'queries': [], 'errors': 0})
+        group['histogram'].record(seconds * 1e6)
+        if queries is not None:
+            group['queries'].append(queries)
+        if status >= 400:
+            group['errors'] += 1
+    summary = {}
+    everything = Histogram()
+    for label, group in sorted(groups.items()):
+        histogram = group['histogram']
+        everything.merge(histogram)
+        queries = group['queries']
+        summary[label] = {
+            'count': histogram.count,
+            'p50_ms': histogram.quantile(0.5) / 1000,
+            'p95_ms': histogram.quantile(0.95) / 1000,
+            'p99_ms': histogram.quantile(0.99) / 1000,
+            'queries': sum(queries) / len(queries) if queries else None,
+            'errors': group['errors'],
+        }
+    return {
+        'requests': everything.count,
+        'seconds': wall_seconds,
+        'throughput_rps': everything.count / wall_seconds if wall_seconds else 0,
+        'p50_ms': everything.quantile(0.5) / 1000,
+        'p95_ms': everything.quantile(0.95) / 1000,
+        'p99_ms': everything.quantile(0.99) / 1000,
+        'errors': sum(group['errors'] for group in groups.values()),
+        'routes': summary,
+    }
+
+
+def format_table(title, summary):
+    lines = [
+        f'== {title}: {summary["requests"]} requests in {summary["seconds"]:.2f}s '
+        f'({summary["throughput_rps"]:.1f} req/s), p50 {summary["p50_ms"]:.2f}ms '
+        f'p95 {summary["p95_ms"]:.2f}ms p99 {summary["p99_ms"]:.2f}ms, {summary["errors"]} errors',
+        f'{"route":<26}{"count":>7}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"queries":>9}{"errors":>8}',
+    ]
+    for label, row in summary['routes'].items():
+        queries = f'{row["queries"]:.1f}' if row['queries'] is not None else '-'
+        lines.append(f'{label:<26}{row["count"]:>7}{row["p50_ms"]:>10.2f}{row["p95_ms"]:>10.2f}'
+                     f'{row["p99_ms"]:>10.2f}{queries:>9}{row["errors"]:>8}')
+    return '\n'.join(lines)
+
+
+def compare(summary, baseline, tolerance):
+    """قائمة بالتراجعات مقارنة بخط الأساس: زمن أعلى، استعلامات أكثر، أو أخطاء جديدة"""
+    regressions = []
+    if summary['throughput_rps'] < baseline['throughput_rps'] * (1 - tolerance):
+        regressions.append(f'throughput {summary["throughput_rps"]:.1f} req/s '
+                           f'< baseline {baseline["throughput_rps"]:.1f} req/s')
+    for label, base in baseline['routes'].items():
+        row = summary['routes'].get(label)
+        if row is None:
+            continue
+        for key in ('p95_ms', 'p99_ms'):
+            limit = base[key] * (1 + tolerance)
+            if row[key] > limit and row[key] - base[key] > NOISE_FLOOR_MS:
+                regressions.append(f'{label}: {key} {row[key]:.2f} > {base[key]:.2f}')
+        # عدد الاستعلامات ثابت لنفس البيانات، فأي زيادة تعني تراجعاً
+        if row['queries'] is not None and base['queries'] is not None and row['queries'] > base['queries'] + 0.5:
+            regressions.append(f'{label}: queries {row["queries"]:.1f} > {base["queries"]:.1f}')
+        if row['errors'] > base['errors']:
+            regressions.append(f'{label}: errors {row["errors"]} > {base["errors"]}')
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, baseline):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
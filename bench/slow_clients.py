@@ -0,0 +1,107 @@
+# python -m bench.slow_clients --profiles sync gthread gevent --slow 32 --fast 4 --seconds 10
+# سرعة العملاء العاديين أثناء وجود عملاء بطيئين يرسلون الطلب ويقرؤون الرد ببطء
+import argparse
+import importlib.util
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def slow_client(address, path, delay, stop):
+    """يرسل الطلب بايتاً بعد بايت ثم يقرأ الرد على دفعات صغيرة"""
+    request = (f'GET {path} HTTP/1.1\r\nHost: {address[0]}\r\nUser-Agent: slow-client\r\n'
+               f'Accept: */*\r\nConnection: close\r\n\r\n').encode()
+    while not stop.is_set():
+        try:
+            with socket.create_connection(address, timeout=30) as sock:
+                for i in range(len(request)):
+                    if stop.is_set():
+                        return
+                    sock.sendall(request[i:i + 1])
+                    time.sleep(delay)
+                while not stop.is_set():
+                    if not sock.recv(256):
+                        break
+                    time.sleep(delay)
+        except OSError:
+            time.sleep(delay)
+
+
+def fast_client(address, recorder, rng, product_ids, stop):
+    from bench.clients import HttpUser
+
+    user = HttpUser(address, recorder, rng, None)
+    while not stop.is_set():
+        user.get('api_products', '/api/products')
+        user.get('product_detail', f'/product/{rng.choice(product_ids)}')
+
+
+def run(profile, address_env, product_ids, args):
+    from bench import report
+    from bench.clients import Recorder, gunicorn_server
+
+    env = dict(address_env, GUNICORN_PROFILE=profile)
+    with gunicorn_server(env, args.workers) as address:
+        stop = threading.Event()
+        recorder = Recorder()
+        threads = [threading.Thread(target=slow_client, args=(address, '/api/products', args.delay, stop), daemon=True)
+                   for _ in range(args.slow)]
+        for thread in threads:
+            thread.start()
+        # نترك العملاء البطيئين يحجزون الاتصالات قبل بدء القياس
+        time.sleep(1)
+        fast = [threading.Thread(target=fast_client,
+                                 args=(address, recorder, random.Random(args.seed + i), product_ids, stop))
+                for i in range(args.fast)]
+        for thread in fast:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in fast:
+            thread.join()
+    return report.summarize(recorder.samples, args.seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.slow_clients')
+    parser.add_argument('--profiles', nargs='+', default=['sync', 'gthread', 'gevent'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--slow', type=int, default=32, help='concurrent slow clients')
+    parser.add_argument('--delay', type=float, default=0.05, help='seconds between bytes sent/read by slow clients')
+    parser.add_argument('--fast', type=int, default=4, help='concurrent normal clients being measured')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-slow-')
+    env = {
+        'DATABASE_URL': 'sqlite:///' + os.path.join(workdir, 'bench.db'),
+        'QUERY_COUNT_HEADER': '1',
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'INSTANCE_FOLDER': os.path.join(workdir, 'instance'),
+    }
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+
+    from bench import data as bench_data, report
+    seeded = bench_data.seed(args.products, 1, 0, 0, args.seed)
+
+    for profile in args.profiles:
+        if profile == 'gevent' and importlib.util.find_spec('gevent') is None:
+            print('Skipping gevent profile: gevent is not installed')
+            continue
+        summary = run(profile, env, seeded['product_ids'], args)
+        print(report.format_table(f'{profile} ({args.slow} slow clients)', summary))
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
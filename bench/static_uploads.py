@@ -0,0 +1,97 @@
+# python -m bench.static_uploads --sizes 20 200 2000 --clients 8 --seconds 10
+# عدد الطلبات في الثانية للصور المرفوعة قبل WhiteNoise (يخدمها Flask) وبعده
+# الملفات تُكتب في static/uploads باسم bench- وتُحذف في النهاية
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = {'flask': '0', 'whitenoise': '1'}
+
+
+def client(address, recorder, rng, paths, stop):
+    from bench.clients import HttpUser
+
+    user = HttpUser(address, recorder, rng, None)
+    while not stop.is_set():
+        label, path = rng.choice(paths)
+        user.get(label, path)
+
+
+def run(mode, env, paths, args):
+    from bench import report
+    from bench.clients import Recorder, gunicorn_server
+
+    with gunicorn_server(dict(env, STATIC_WHITENOISE=MODES[mode]), args.workers) as address:
+        stop = threading.Event()
+        recorder = Recorder()
+        threads = [threading.Thread(target=client, args=(address, recorder, random.Random(args.seed + i), paths, stop))
+                   for i in range(args.clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return report.summarize(recorder.samples, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.static_uploads')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 2000], help='upload sizes in KB')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench-static-')
+    env = {
+        'DATABASE_URL': 'sqlite:///' + os.path.join(workdir, 'bench.db'),
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'INSTANCE_FOLDER': os.path.join(workdir, 'instance'),
+    }
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+
+    from bench import data as bench_data, report
+    from config import Config
+
+    bench_data.seed(1, 1, 0, 0, args.seed)
+    # الصور موجودة قبل بدء gunicorn حتى يجدها WhiteNoise عند التشغيل
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+    files = []
+    for size in args.sizes:
+        name = f'bench-{size}kb-{os.getpid()}.jpg'
+        with open(os.path.join(Config.UPLOAD_FOLDER, name), 'wb') as f:
+            f.write(random.Random(size).randbytes(size * 1024))
+        files.append(name)
+    paths = [(f'uploads_{size}kb', f'/static/uploads/{name}') for size, name in zip(args.sizes, files)]
+
+    try:
+        results = {}
+        for mode in args.modes:
+            results[mode] = run(mode, env, paths, args)
+            print(report.format_table(f'{mode} ({args.clients} clients, {args.workers} workers)', results[mode]))
+            print()
+    finally:
+        for name in files:
+            os.remove(os.path.join(Config.UPLOAD_FOLDER, name))
+
+    if len(results) == len(MODES):
+        print(f'{"route":<16}{"flask rps":>12}{"whitenoise rps":>16}')
+        for label, _ in paths:
+            before, after = (results[mode]['routes'].get(label, {}).get('count', 0) / results[mode]['seconds']
+                             for mode in ('flask', 'whitenoise'))
+            print(f'{label:<16}{before:>12.1f}{after:>16.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# كل وحدة هنا تعرّف blueprint باسم bp، و create_app في factory.py يستوردها عند التسجيل فقط
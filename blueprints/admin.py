@@ -0,0 +1,474 @@
+import hmac
+import json
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, abort, current_app, flash, make_response, redirect, render_template, request, session, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import func, select
+
+import catalog
+import inbox
+from exports import FORMATS as EXPORT_FORMATS, export_response
+from extensions import (job_queue, login_manager, page_cache, password_hasher, product_search, rate_limiter,
+                        request_metrics)
+from identity import credential_version
+from images import save_upload
+from models import (db, ArchivedMessage, CatalogUpload, ContactMessage, Job, MessageCounter, Order, OrderItem, Product, Settings,
+                    User, catalog_stamp)
+from pagination import KeysetPage
+from queries import date_range_filters, order_filters, order_stats, orders_with_items, product_page
+
+bp = Blueprint('admin', __name__)
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower()
+
+@bp.route('/admin')
+@login_required
+def admin():
+    if not current_user.is_admin:
+        flash('عذراً، ليس لديك صلاحية الوصول إلى لوحة التحكم')
+        return redirect(url_for('shop.home'))
+    return render_template('admin.html')
+
+@bp.route('/admin/products', methods=['GET', 'POST'])
+@login_required
+def admin_products():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+
+    if request.method == 'POST':
+        if 'image' not in request.files:
+            flash('لم يتم اختيار صورة')
+            return redirect(request.url)
+
+        file = request.files['image']
+        if file.filename == '':
+            flash('لم يتم اختيار صورة')
+            return redirect(request.url)
+            
+        if file and allowed_file(file.filename):
+            try:
+                # حفظ الصورة باسم فريد مشتق من محتواها
+                unique_filename = save_upload(file, current_app.config['UPLOAD_FOLDER'], file_extension(file.filename))
+                job_queue.enqueue('image_variants', {'filename': unique_filename},
+                                  key=f'image_variants:{unique_filename}', commit=False)
+                # إنشاء المنتج مع المسار الصحيح للصورة
+                new_product = Product(
+                    name=request.form.get('name'),
+                    description=request.form.get('description'),
+                    price=float(request.form.get('price')),
+                    image_url=f"/static/uploads/{unique_filename}"
+                )
+                db.session.add(new_product)
+                db.session.commit()
+                product_search.index_product(new_product)
+                flash('تم إضافة المنتج بنجاح')
+                return redirect(url_for('admin.admin_products'))
+            except Exception as e:
+                flash(f'حدث خطأ أثناء رفع الصورة: {str(e)}')
+                return redirect(request.url)
+
+    products = product_page()
+    return render_template('admin_products.html', products=products, page=products)
+
+@bp.route('/admin/products/import', methods=['POST'])
+@login_required
+def admin_import_products():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    file = request.files.get('file')
+    if file is None or '.' not in file.filename:
+        return {'success': False, 'error': 'no file'}, 400
+    fmt = file_extension(file.filename)
+    if fmt not in catalog.input_formats():
+        return {'success': False, 'error': f'unsupported format: {fmt}'}, 400
+    # الملف في قاعدة البيانات وليس على القرص، فالعامل قد يعمل على dyno آخر
+    upload = CatalogUpload(fmt=fmt, data=file.read())
+    db.session.add(upload)
+    db.session.flush()
+    job = job_queue.enqueue('catalog_import', {'upload_id': upload.id})
+    return {'success': True, 'job_id': job.id,
+            'status_url': url_for('admin.admin_import_status', job_id=job.id)}, 202
+
+@bp.route('/admin/products/import/<int:job_id>')
+@login_required
+def admin_import_status(job_id):
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    job = db.session.get(Job, job_id)
+    if job is None or job.name != 'catalog_import':
+        abort(404)
+    # أثناء التنفيذ يحتوي result على التقدم حتى آخر دفعة، وبعد الانتهاء على التقرير النهائي
+    return {'status': job.status, 'attempts': job.attempts, 'error': job.last_error,
+            'result': json.loads(job.result) if job.result else None}
+
+@bp.route('/admin/products/prices', methods=['POST'])
+@login_required
+def admin_update_prices():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    # {"items": [{"sku": "A-100", "price": 1.5}, {"id": 7, "price": 2}]}
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items or len(items) > current_app.config['MAX_PRICE_BATCH']:
+        return {'success': False}, 400
+    try:
+        by_id, by_sku = catalog.parse_prices(items)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    updated = catalog.update_prices(db.session, Product, by_id, by_sku)
+    db.session.commit()
+    # الأسعار ليست في فهرس البحث، فيكفي تحديث إصدار الكتالوج
+    catalog_stamp.bump()
+    return {'success': True, 'updated': updated}
+
+def is_valid_phone(phone):
+    # تبسيط التحقق ليقبل الأرقام بشكل أسهل
+    import re
+    # يقبل +965 متبوعاً بـ 8 أرقام، مع أو بدون مسافة
+    pattern = r'^\+965\s*\d{8}$'
+    return bool(re.match(pattern, phone))
+
+@bp.route('/admin/settings', methods=['GET', 'POST'])
+@login_required
+def admin_settings():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+
+    settings = Settings.query.first()
+    if not settings:
+        settings = Settings()
+        db.session.add(settings)
+        db.session.commit()
+
+    if request.method == 'POST':
+        try:
+            current_app.logger.debug('Settings form: %s', request.form.to_dict())
+
+            # تحديث الإعدادات الأساسية
+            for field in ['phone1', 'phone2', 'whatsapp', 'email', 'address', 
+                         'location_url', 'facebook_url', 'instagram_url', 
+                         'twitter_url', 'primary_color', 'secondary_color', 
+                         'accent_color', 'text_color', 'header_text', 
+                         'header_description', 'about_title', 'about_description', 
+                         'about_services']:
+                if field in request.form:
+                    setattr(settings, field, request.form[field])
+
+            # معالجة تحميل الصورة الخلفية
+            if 'background' in request.files:
+                file = request.files['background']
+                if file and file.filename and allowed_file(file.filename):
+                    unique_filename = save_upload(file, current_app.config['UPLOAD_FOLDER'],
+                                                  file_extension(file.filename), prefix='background_')
+                    job_queue.enqueue('image_variants', {'filename': unique_filename},
+                                      key=f'image_variants:{unique_filename}', commit=False)
+                    settings.background_image = f"/static/uploads/{unique_filename}"
+
+            db.session.commit()
+            flash('تم حفظ الإعدادات بنجاح', 'success')
+            return redirect(url_for('admin.admin_settings'))
+
+        except Exception:
+            current_app.logger.exception('Saving settings failed')
+            db.session.rollback()
+            flash('حدث خطأ أثناء حفظ الإعدادات', 'error')
+
+    return render_template('admin_settings.html', settings=settings)
+
+def date_arg(name):
+    # تاريخ غير صالح خطأ من المستخدم (400) بدلاً من تجاهله وعرض فترة أخرى
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        abort(400)
+
+def stats_period(date_from, date_to):
+    # بدون بداية تحسب GROUP BY على الطلبات كلها حتى النهاية، وهذا يستغرق ثوانٍ مع مئات الآلاف منها
+    # فالبداية الافتراضية آخر ORDER_STATS_DAYS يوماً حتى النهاية المحددة أو اليوم
+    if date_from is None:
+        date_from = (date_to or datetime.utcnow().date()) - timedelta(days=current_app.config['ORDER_STATS_DAYS'] - 1)
+    return date_from, date_to
+
+@bp.route('/admin/orders')
+@login_required
+def admin_orders():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    status = request.args.get('status') or None
+    date_from = date_arg('from')
+    date_to = date_arg('to')
+    try:
+        orders = KeysetPage(
+            orders_with_items().filter(*order_filters(status, date_from, date_to)),
+            (Order.date_created, Order.id),
+            cursor=request.args.get('cursor'),
+            per_page=current_app.config['ORDERS_PER_PAGE'],
+            descending=True,
+            tag='orders',
+        )
+    except ValueError:
+        abort(400)
+    stats = order_stats(*stats_period(date_from, date_to))
+    return render_template('admin_orders.html', orders=orders, page=orders, stats=stats,
+                           status=status, date_from=date_from, date_to=date_to)
+
+@bp.route('/admin/orders/stats')
+@login_required
+def admin_order_stats():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    return order_stats(*stats_period(date_arg('from'), date_arg('to')))
+
+@bp.route('/admin/cache')
+@login_required
+def admin_cache_stats():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    return page_cache.stats()
+
+@bp.route('/admin/rate-limits')
+@login_required
+def admin_rate_limit_stats():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    return rate_limiter.stats()
+
+@bp.route('/admin/jobs')
+@login_required
+def admin_job_stats():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    return job_queue.stats()
+
+@bp.route('/admin/metrics')
+def admin_metrics():
+    token = current_app.config['METRICS_TOKEN']
+    authorization = request.headers.get('Authorization', '')
+    if not (token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())):
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if not current_user.is_admin:
+            return redirect(url_for('shop.home'))
+    response = make_response(request_metrics.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@bp.route('/admin/users')
+@login_required
+def admin_users():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    users = User.query.all()
+    return render_template('admin_users.html', users=users)
+
+@bp.route('/admin/messages')
+@login_required
+def admin_messages():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    # ?status=unread|read|archived، وبدونه الصندوق العادي (غير المقروء والمقروء)
+    status = request.args.get('status') or None
+    if status is not None and status not in inbox.STATUSES:
+        abort(400)
+    statuses = (status,) if status else inbox.INBOX_STATUSES
+    try:
+        messages = KeysetPage(
+            ContactMessage.query.filter(ContactMessage.status.in_(statuses)),
+            (ContactMessage.date_sent, ContactMessage.id),
+            cursor=request.args.get('cursor'),
+            per_page=current_app.config['MESSAGES_PER_PAGE'],
+            descending=True,
+            tag='messages',
+        )
+    except ValueError:
+        abort(400)
+    unread = inbox.unread_count(db.session, ContactMessage, MessageCounter)
+    return render_template('admin_messages.html', messages=messages, page=messages, unread=unread, status=status)
+
+@bp.route('/admin/messages/status', methods=['POST'])
+@login_required
+def update_message_status():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    # {"ids": [1, 2, 3], "status": "read"} من الواجهة، أو نموذج بحقول ids متعددة
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {'ids': request.form.getlist('ids'), 'status': request.form.get('status')}
+    try:
+        ids = [int(message_id) for message_id in data.get('ids') or ()]
+    except (TypeError, ValueError):
+        return {'success': False, 'error': 'invalid ids'}, 400
+    status = data.get('status')
+    if not ids or len(ids) > current_app.config['MAX_MESSAGE_BATCH'] or status not in inbox.STATUSES:
+        return {'success': False}, 400
+    updated = inbox.set_status(db.session, ContactMessage, MessageCounter, ids, status)
+    if status == 'archived' and updated:
+        job_queue.enqueue('archive_messages', commit=False)
+    db.session.commit()
+    unread = inbox.unread_count(db.session, ContactMessage, MessageCounter)
+    if not request.is_json:
+        return redirect(request.referrer or url_for('admin.admin_messages'))
+    return {'success': True, 'updated': updated, 'unread': unread}
+
+@bp.route('/admin/messages/poll')
+@login_required
+def poll_messages():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    # ?since=<آخر معرف لدى الواجهة>، ومع If-None-Match لا يُقرأ شيء من جدول الرسائل
+    since = request.args.get('since', 0, type=int)
+    latest = db.session.scalar(select(func.max(ContactMessage.id)))
+    unread = inbox.unread_count(db.session, ContactMessage, MessageCounter)
+    etag = inbox.poll_etag(latest, unread)
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    limit = current_app.config['MESSAGES_PER_PAGE']
+    messages = (ContactMessage.query.filter(ContactMessage.id > since)
+                .order_by(ContactMessage.id).limit(limit + 1).all())
+    response = make_response({
+        'messages': [inbox.message_payload(message) for message in messages[:limit]],
+        'unread': unread,
+        'latest': messages[limit - 1].id if len(messages) > limit else max(latest or 0, since),
+        'has_more': len(messages) > limit,
+    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def stream_rows(stmt):
+    # مؤشر من جهة الخادم مع جلب الصفوف على دفعات حتى تبقى الذاكرة ثابتة
+    result = db.session.execute(stmt.execution_options(yield_per=current_app.config['EXPORT_BATCH_SIZE']))
+    for row in result:
+        yield tuple(row)
+
+@bp.route('/admin/export/<dataset>.<fmt>')
+@login_required
+def admin_export(dataset, fmt):
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    status = request.args.get('status') or None
+    date_from = date_arg('from')
+    date_to = date_arg('to')
+
+    if dataset == 'orders':
+        header = ['order_id', 'date_created', 'status', 'full_name', 'phone', 'address', 'order_total',
+                  'product_id', 'product_name', 'quantity', 'price']
+        stmt = (select(Order.id, Order.date_created, Order.status, Order.full_name, Order.phone,
+                       Order.address, Order.total, OrderItem.product_id, Product.name,
+                       OrderItem.quantity, OrderItem.price)
+                .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+                .outerjoin(Product, Product.id == OrderItem.product_id)
+                .where(*order_filters(status, date_from, date_to))
+                .order_by(Order.date_created, Order.id, OrderItem.id))
+    elif dataset in ('messages', 'archived_messages'):
+        # الرسائل المنقولة إلى الأرشيف البارد تُصدر من جدولها
+        model = ArchivedMessage if dataset == 'archived_messages' else ContactMessage
+        header = ['id', 'date_sent', 'status', 'name', 'email', 'phone', 'message']
+        filters = date_range_filters(model.date_sent, date_from, date_to)
+        if status:
+            filters.append(model.status == status)
+        stmt = (select(*(getattr(model, field) for field in header))
+                .where(*filters)
+                .order_by(model.date_sent, model.id))
+    elif dataset == 'products':
+        header = list(catalog.EXPORT_FIELDS)
+        stmt = select(*(getattr(Product, field) for field in header)).order_by(Product.id)
+    else:
+        abort(404)
+
+    return export_response(f'{dataset}-{date.today().isoformat()}', fmt, header, stream_rows(stmt),
+                           compress=request.args.get('gzip') == '1')
+
+@bp.route('/admin/update-password', methods=['POST'])
+@login_required
+def update_admin_password():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    
+    current_password = request.form.get('current_password')
+    new_password = request.form.get('new_password')
+    
+    user = db.session.get(User, current_user.id)
+    valid, _ = password_hasher.verify(user.password, current_password)
+    if valid and new_password:
+        user.password = password_hasher.hash(new_password)
+        db.session.commit()
+        session['_credential'] = credential_version(user.password)
+        flash('تم تحديث كلمة المرور بنجاح')
+    else:
+        flash('كلمة المرور الحالية غير صحيحة')
+    
+    return redirect(url_for('admin.admin_settings'))
+
+@bp.route('/admin/create-user', methods=['POST'])
+@login_required
+def create_new_user():
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    
+    username = request.form.get('username')
+    password = request.form.get('password')
+    is_admin = request.form.get('is_admin') == 'on'
+    
+    if not username or not password:
+        flash('اسم المستخدم وكلمة المرور مطلوبان')
+    elif User.query.filter_by(username=username).first():
+        flash('اسم المستخدم موجود بالفعل')
+    else:
+        new_user = User(
+            username=username,
+            password=password_hasher.hash(password),
+            is_admin=is_admin
+        )
+        db.session.add(new_user)
+        db.session.commit()
+        flash('تم إنشاء المستخدم بنجاح')
+    
+    return redirect(url_for('admin.admin_settings'))
+
+@bp.route('/admin/orders/<int:order_id>/status', methods=['POST'])
+@login_required
+def update_order_status(order_id):
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    
+    order = Order.query.get_or_404(order_id)
+    data = request.get_json()
+    order.status = data.get('status')
+    db.session.commit()
+    return {'success': True}
+
+@bp.route('/admin/orders/<int:order_id>/print')
+@login_required
+def print_order(order_id):
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    
+    order = orders_with_items().filter(Order.id == order_id).first_or_404()
+    return render_template('print_order.html', order=order)
+
+@bp.route('/admin/orders/<int:order_id>/delete', methods=['POST'])
+@login_required
+def delete_order(order_id):
+    if not current_user.is_admin:
+        return redirect(url_for('shop.home'))
+    
+    order = Order.query.get_or_404(order_id)
+    db.session.delete(order)
+    db.session.commit()
+    return {'success': True}
@@ -0,0 +1,36 @@
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from flask_login import login_required, login_user, logout_user
+
+from blueprints.cart import merge_session_cart, session_cart
+from extensions import password_hasher
+from identity import credential_version
+from models import db, User
+
+bp = Blueprint('auth', __name__)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        user = User.query.filter_by(username=request.form.get('username')).first()
+        password = request.form.get('password')
+        # اسم غير موجود يمر بنفس التجزئة، فزمن الاستجابة لا يكشف الأسماء الموجودة
+        valid, needs_rehash = password_hasher.verify(user.password if user else None, password)
+        if valid:
+            # ترقية كلمات المرور القديمة غير المشفرة عند أول تسجيل دخول
+            if needs_rehash:
+                user.password = password_hasher.hash(password)
+                db.session.commit()
+            login_user(user)
+            session['_credential'] = credential_version(user.password)
+            merge_session_cart(user.id, session_cart())
+            return redirect(url_for('shop.home'))
+        flash('خطأ في اسم المستخدم أو كلمة المرور')
+    return render_template('login.html')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    # سلة المستخدم محفوظة في CartItem، والجلسة لا تحمل إلا سلة الزائر
+    session_cart().clear()
+    logout_user()
+    return redirect(url_for('shop.home'))
@@ -0,0 +1,250 @@
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, session, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import delete, select, update
+
+from carts import CartFull, CartLine, SessionCart
+from models import db, CartItem
+from queries import add_cart_items, cart_total, checkout_cart, product_records
+
+bp = Blueprint('cart', __name__)
+
+# سلة الزائر في الجلسة دون كتابة في قاعدة البيانات، وسلة المستخدم المسجل في CartItem
+def session_cart():
+    return SessionCart(session, current_app.config['MAX_CART_LINES'], current_app.config['MAX_CART_QUANTITY'])
+
+class UserCart:
+    """سلة المستخدم المسجل في CartItem بنفس واجهة SessionCart، وكل تعديل يُحفظ مباشرة
+
+    لا تمر بكوكي الجلسة، فحدها MAX_USER_CART_LINES يسمح بسلال الجملة الكبيرة
+    """
+
+    def __init__(self, user_id, max_lines, max_quantity):
+        self.user_id = user_id
+        self.max_lines = max_lines
+        self.max_quantity = max_quantity
+
+    def __bool__(self):
+        return db.session.scalar(select(CartItem.id).where(CartItem.user_id == self.user_id).limit(1)) is not None
+
+    def items(self):
+        return dict(db.session.execute(select(CartItem.product_id, CartItem.quantity)
+                                       .where(CartItem.user_id == self.user_id)).all())
+
+    def line_items(self):
+        return db.session.execute(select(CartItem.id, CartItem.product_id, CartItem.quantity)
+                                  .where(CartItem.user_id == self.user_id)
+                                  .order_by(CartItem.id)).all()
+
+    def _check_lines(self, product_ids):
+        saved = set(db.session.scalars(select(CartItem.product_id).where(CartItem.user_id == self.user_id)))
+        if len(saved | set(product_ids)) > self.max_lines:
+            raise CartFull(f'a cart can hold at most {self.max_lines} products')
+
+    def add(self, quantities):
+        self._check_lines(quantities)
+        add_cart_items(self.user_id, quantities, commit=False)
+        db.session.execute(update(CartItem)
+                           .where(CartItem.user_id == self.user_id, CartItem.quantity > self.max_quantity)
+                           .values(quantity=self.max_quantity))
+        db.session.commit()
+
+    def set(self, product_id, quantity):
+        if quantity > 0:
+            self._check_lines([product_id])
+        db.session.execute(delete(CartItem).where(CartItem.user_id == self.user_id,
+                                                  CartItem.product_id == product_id))
+        if quantity > 0:
+            add_cart_items(self.user_id, {product_id: min(quantity, self.max_quantity)}, commit=False)
+        db.session.commit()
+
+    def remove(self, product_id):
+        self.set(product_id, 0)
+
+def user_cart(user_id):
+    return UserCart(user_id, current_app.config['MAX_USER_CART_LINES'], current_app.config['MAX_CART_QUANTITY'])
+
+def merge_session_cart(user_id, cart):
+    # كميات سلة الزائر تضاف إلى السلة المحفوظة مرة واحدة ثم تُفرغ الجلسة،
+    # فإعادة إرسال نموذج الدخول أو الدخول بحساب آخر لا يضيف شيئاً
+    if not cart:
+        return
+    try:
+        user_cart(user_id).add(cart.items())
+    except CartFull:
+        # السلة المحفوظة تبقى كما هي
+        flash('السلة ممتلئة')
+    cart.clear()
+
+def current_cart():
+    cart = session_cart()
+    if not current_user.is_authenticated:
+        return cart
+    # تسجيل دخول عبر remember me بدون المرور بصفحة الدخول يترك سلة الزائر في الجلسة
+    if cart:
+        merge_session_cart(current_user.id, cart)
+    return user_cart(current_user.id)
+
+def line_product_id(item_id):
+    # معرف السطر كما في CartLine.id: معرف CartItem للمستخدم المسجل، ومعرف المنتج في سلة الزائر
+    if not current_user.is_authenticated:
+        return item_id
+    return db.session.scalar(select(CartItem.product_id)
+                             .where(CartItem.id == item_id, CartItem.user_id == current_user.id))
+
+def existing_products(product_ids):
+    return set(product_records(list(product_ids)))
+
+def cart_lines(cart):
+    # الأسعار من product_table، والمنتجات المحذوفة لا تظهر
+    lines = cart.line_items()
+    if not lines:
+        return []
+    records = product_records(sorted(product_id for _, product_id, _ in lines))
+    return [CartLine(records[product_id], quantity, line_id)
+            for line_id, product_id, quantity in lines if product_id in records]
+
+def cart_payload(lines):
+    return {
+        'items': [{'product_id': line.product_id, 'name': line.product.name, 'price': line.product.price,
+                   'quantity': line.quantity, 'subtotal': line.subtotal} for line in lines],
+        'count': sum(line.quantity for line in lines),
+        'total': cart_total(lines),
+    }
+
+def parse_cart_items(data):
+    # {"items": [{"product_id": 1, "quantity": 2}, ...]} إلى {product_id: quantity} أو None
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items or len(items) > current_app.config['MAX_CART_BATCH']:
+        return None
+    quantities = {}
+    try:
+        for item in items:
+            product_id = int(item['product_id'])
+            quantity = int(item.get('quantity', 1))
+            if quantity < 1:
+                return None
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    return quantities
+
+@bp.route('/cart')
+def cart():
+    cart_items = cart_lines(current_cart())
+    total = cart_total(cart_items)
+    return render_template('cart.html', cart_items=cart_items, total=total)
+
+@bp.route('/add_to_cart/<int:product_id>', methods=['POST'])
+def add_to_cart(product_id):
+    quantity = request.form.get('quantity', 1, type=int)
+    if quantity < 1 or not product_records([product_id]):
+        return redirect(url_for('cart.cart'))
+    try:
+        current_cart().add({product_id: quantity})
+    except CartFull:
+        flash('السلة ممتلئة')
+        return redirect(url_for('cart.cart'))
+    flash('تمت إضافة المنتج إلى السلة')
+    return redirect(url_for('cart.cart'))
+
+@bp.route('/add_to_cart/batch', methods=['POST'])
+def add_to_cart_batch():
+    quantities = parse_cart_items(request.get_json(silent=True))
+    if quantities is None:
+        return {'success': False}, 400
+    found = existing_products(quantities)
+    try:
+        current_cart().add({product_id: quantity for product_id, quantity in quantities.items()
+                            if product_id in found})
+    except CartFull:
+        return {'success': False}, 400
+    return {'success': True}
+
+@bp.route('/update_cart/<int:item_id>', methods=['POST'])
+def update_cart(item_id):
+    cart = current_cart()
+    product_id = line_product_id(item_id)
+    if product_id is None:
+        return redirect(url_for('cart.cart'))
+    try:
+        cart.set(product_id, request.form.get('quantity', 1, type=int))
+    except CartFull:
+        flash('السلة ممتلئة')
+    return redirect(url_for('cart.cart'))
+
+@bp.route('/remove_from_cart/<int:item_id>')
+def remove_from_cart(item_id):
+    cart = current_cart()
+    product_id = line_product_id(item_id)
+    if product_id is not None:
+        cart.remove(product_id)
+        flash('تم حذف المنتج من السلة')
+    return redirect(url_for('cart.cart'))
+
+# واجهة JSON للسلة: كل عملية تعيد السلة كاملة مع المجموع
+@bp.route('/api/cart')
+def api_cart():
+    return cart_payload(cart_lines(current_cart()))
+
+@bp.route('/api/cart/items', methods=['POST'])
+def api_cart_add():
+    quantities = parse_cart_items(request.get_json(silent=True))
+    if quantities is None:
+        return {'error': 'invalid items'}, 400
+    found = existing_products(quantities)
+    cart = current_cart()
+    try:
+        cart.add({product_id: quantity for product_id, quantity in quantities.items() if product_id in found})
+    except CartFull as e:
+        return {'error': str(e)}, 400
+    return cart_payload(cart_lines(cart))
+
+@bp.route('/api/cart/items/<int:product_id>', methods=['PUT', 'DELETE'])
+def api_cart_item(product_id):
+    cart = current_cart()
+    if request.method == 'DELETE':
+        cart.remove(product_id)
+        return cart_payload(cart_lines(cart))
+    data = request.get_json(silent=True) or {}
+    try:
+        quantity = int(data.get('quantity'))
+    except (TypeError, ValueError):
+        return {'error': 'invalid quantity'}, 400
+    if quantity > 0 and product_id not in cart.items() and not product_records([product_id]):
+        abort(404)
+    try:
+        cart.set(product_id, quantity)
+    except CartFull as e:
+        return {'error': str(e)}, 400
+    return cart_payload(cart_lines(cart))
+
+@bp.route('/checkout', methods=['GET', 'POST'])
+@login_required
+def checkout():
+    cart_items = cart_lines(current_cart())
+    if not cart_items:
+        return redirect(url_for('cart.cart'))
+    total = cart_total(cart_items)
+    return render_template('checkout.html', cart_items=cart_items, total=total)
+
+@bp.route('/process_checkout', methods=['POST'])
+@login_required
+def process_checkout():
+    try:
+        # الطلب يُنشأ من CartItem مباشرة، وهي نفس السلة التي يراها المستخدم
+        current_cart()
+        order = checkout_cart(
+            current_user.id,
+            full_name=request.form.get('full_name'),
+            address=request.form.get('address'),
+            phone=request.form.get('phone')
+        )
+        if order is None:
+            return redirect(url_for('cart.cart'))
+        flash('تم تأكيد طلبك بنجاح!', 'success')
+    except Exception:
+        db.session.rollback()
+        flash('حدث خطأ أثناء تأكيد الطلب', 'error')
+        current_app.logger.exception('Checkout failed for user %s', current_user.id)
+        
+    return redirect(url_for('shop.home'))
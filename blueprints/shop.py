@@ -0,0 +1,117 @@
+from functools import wraps
+
+from flask import Blueprint, current_app, flash, jsonify, make_response, redirect, render_template, request, session, url_for
+from flask_login import current_user
+
+import inbox
+from carts import SessionCart
+from database import primary_reads
+from extensions import job_queue, page_cache, product_search
+from models import db, ContactMessage, MessageCounter, Product, catalog_stamp, settings_stamp
+from queries import product_page
+
+bp = Blueprint('shop', __name__)
+
+def page_cache_allowed():
+    # لا نخزن صفحات المستخدمين المسجلين أو الزوار الذين لديهم سلة أو رسائل flash
+    return (current_app.config['PAGE_CACHE_ENABLED']
+            and request.method == 'GET'
+            and not current_user.is_authenticated
+            and SessionCart.KEY not in session
+            and '_flashes' not in session)
+
+def cached_page(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not page_cache_allowed():
+            return view(*args, **kwargs)
+        query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        key = f'{request.host}{request.path}?{query}|{catalog_stamp.read()}|{settings_stamp.read()}'
+        body = page_cache.get(key)
+        if body is not None:
+            response = make_response(body)
+            response.headers['X-Cache'] = 'HIT'
+            return response
+        # الصفحة تُخزن باسم إصدار الكتالوج والإعدادات، فتُعرض من الأساسية وليس من نسخة متأخرة
+        with primary_reads(db.session):
+            response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not session.modified:
+            page_cache.set(key, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+@bp.route('/')
+@cached_page
+def home():
+    products = product_page(records=True)
+    return render_template('index.html', products=products, page=products)
+
+@bp.route('/product/<int:product_id>')
+@cached_page
+def product_detail(product_id):
+    product = Product.query.get_or_404(product_id)
+    return render_template('product_detail.html', product=product)
+
+@bp.route('/products')
+@cached_page
+def products():
+    products = product_page(records=True)
+    return render_template('products.html', products=products, page=products)
+
+@bp.route('/api/products')
+def api_products():
+    page = product_page()
+    return jsonify({
+        'items': [{
+            'id': product.id,
+            'name': product.name,
+            'description': product.description,
+            'price': product.price,
+            'image_url': product.image_url,
+        } for product in page],
+        'next_cursor': page.next_cursor,
+    })
+
+@bp.route('/search')
+def search():
+    query = request.args.get('q', '').strip()
+    results = product_search.search(query, limit=current_app.config['SEARCH_RESULTS_LIMIT']) if query else []
+    return render_template('products.html', products=results, query=query)
+
+@bp.route('/api/search')
+def api_search():
+    query = request.args.get('q', '').strip()
+    results = product_search.search(query, limit=current_app.config['SEARCH_RESULTS_LIMIT']) if query else []
+    return jsonify({
+        'query': query,
+        'items': [{
+            'id': product.id,
+            'name': product.name,
+            'price': product.price,
+            'image_url': product.image_url,
+        } for product in results],
+    })
+
+@bp.route('/contact', methods=['GET', 'POST'])
+def contact():
+    if request.method == 'POST':
+        new_message = ContactMessage(
+            name=request.form.get('name'),
+            email=request.form.get('email'),
+            phone=request.form.get('phone'),
+            message=request.form.get('message')
+        )
+        db.session.add(new_message)
+        db.session.flush()
+        inbox.message_received(db.session, MessageCounter)
+        job_queue.enqueue('contact_received', {'message_id': new_message.id}, commit=False)
+        db.session.commit()
+        flash('تم إرسال رسالتك بنجاح، سنتواصل معك قريباً')
+        return redirect(url_for('shop.contact'))
+    return render_template('contact.html')
+
+@bp.route('/about')
+@cached_page
+def about():
+    return render_template('about.html')
@@ -0,0 +1,282 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+from concurrency import thread_local
+
+
+class VersionStamp:
+    """ختم إصدار مشترك بين عمليات gunicorn يعتمد على وقت تعديل ملف صغير
+
+    الملف لا يراه إلا من يشارك نفس القرص، فمع shared (كائن له get و set) يُكتب الإصدار أيضاً
+    في مخزن مشترك مثل قاعدة البيانات، وتقرؤه كل عملية مرة كل poll_interval ثانية على الأكثر
+    """
+
+    def __init__(self, path, shared=None, poll_interval=1.0):
+        self.path = path
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self._shared_version = 0
+        self._next_poll = 0.0
+        # آخر تحديث قام به الخيط الحالي: (الإصدار السابق، الإصدار الجديد)
+        self._local = threading.local()
+
+    def _read_file(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def read(self):
+        version = self._read_file()
+        if self.shared is not None:
+            now = time.monotonic()
+            if now >= self._next_poll:
+                self._next_poll = now + self.poll_interval
+                shared = self.shared.get()
+                if shared is not None:
+                    self._shared_version = shared
+            version = max(version, self._shared_version)
+        return version
+
+    def bump(self):
+        # نضبط وقت التعديل يدوياً حتى لا يتكرر الإصدار عند تحديثين متتاليين
+        previous = self.read()
+        version = max(time.time_ns(), previous + 1)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(version))
+        os.utime(tmp_path, ns=(version, version))
+        os.replace(tmp_path, self.path)
+        if self.shared is not None:
+            self.shared.set(version)
+            self._shared_version = max(self._shared_version, version)
+        self._local.last_bump = (previous, version)
+        return version
+
+    def last_bump(self):
+        return getattr(self._local, 'last_bump', None)
+
+
+class Snapshot:
+    """نسخة ثابتة للقراءة فقط من بيانات صف مع رقم الإصدار"""
+
+    __slots__ = ('_values', 'version')
+
+    def __init__(self, values, version):
+        object.__setattr__(self, '_values', MappingProxyType(dict(values)))
+        object.__setattr__(self, 'version', version)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Snapshot is read-only')
+
+    def as_dict(self):
+        return dict(self._values)
+
+
+class SnapshotCache:
+    """تخزين مؤقت داخل العملية يتم تحديثه فقط عند تغير ختم الإصدار"""
+
+    def __init__(self, loader, stamp):
+        self._loader = loader
+        self._stamp = stamp
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = self._stamp.read()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = Snapshot(self._loader(), version)
+                    self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+        return self._stamp.bump()
+
+
+class LRUCache:
+    """تخزين LRU في الذاكرة محدود بالحجم الكلي بالبايت"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TTLCache:
+    """تخزين LRU محدود بعدد العناصر مع مدة صلاحية لكل عنصر"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteStore:
+    """مخزن مشترك بين عمال gunicorn في ملف SQLite محلي"""
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = thread_local()
+        self._writes = 0
+
+    @property
+    def connection(self):
+        # اتصال لكل خيط ولكل عملية حتى لا يُشارك الاتصال بعد fork، ومع gevent اتصال واحد لكل الطلبات في الخيط
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS entries '
+                         '(key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_entries_stored_at ON entries (stored_at)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        try:
+            row = self.connection.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def set(self, key, value):
+        try:
+            self.connection.execute('INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)',
+                                    (key, value, time.time()))
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self.connection.execute(
+                    'DELETE FROM entries WHERE key IN '
+                    '(SELECT key FROM entries ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,))
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        try:
+            self.connection.execute('DELETE FROM entries')
+        except sqlite3.Error:
+            pass
+
+
+class PageCache:
+    """تخزين الصفحات المعروضة: LRU محلي مع مخزن مشترك اختياري"""
+
+    def __init__(self, max_bytes, shared=None):
+        self.local = LRUCache(max_bytes)
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'entries': len(self.local),
+            'bytes': self.local.size,
+            'max_bytes': self.local.max_bytes,
+            'shared': self.shared is not None,
+        }
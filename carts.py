@@ -0,0 +1,82 @@
+class CartFull(ValueError):
+    """تجاوز عدد المنتجات المختلفة المسموح به في سلة الجلسة"""
+
+
+class SessionCart:
+    """سلة الزائر داخل الجلسة الموقعة بصيغة {"product_id": quantity}
+
+    التعديلات تتم في الذاكرة فقط دون كتابة في قاعدة البيانات، وتُدمج في CartItem عند
+    تسجيل الدخول ثم تُفرغ. سلة المستخدم المسجل محفوظة في CartItem وليس في الكوكي.
+    مفاتيح JSON في الجلسة نصوص، لذلك نحول المعرفات هنا.
+    """
+
+    KEY = 'cart'
+
+    def __init__(self, session, max_lines=100, max_quantity=999):
+        self.session = session
+        self.max_lines = max_lines
+        self.max_quantity = max_quantity
+
+    def __bool__(self):
+        return bool(self.session.get(self.KEY))
+
+    def items(self):
+        return {int(product_id): quantity for product_id, quantity in self.session.get(self.KEY, {}).items()}
+
+    def line_items(self):
+        """[(معرف السطر، معرف المنتج، الكمية)]، ومعرف السطر في سلة الجلسة هو معرف المنتج"""
+        return [(product_id, product_id, quantity) for product_id, quantity in self.items().items()]
+
+    def _save(self, items):
+        if items:
+            self.session[self.KEY] = {str(product_id): quantity for product_id, quantity in items.items()}
+            # السلة تبقى بعد إغلاق المتصفح
+            self.session.permanent = True
+        else:
+            self.session.pop(self.KEY, None)
+
+    def add(self, quantities):
+        items = self.items()
+        for product_id, quantity in quantities.items():
+            items[product_id] = min(items.get(product_id, 0) + quantity, self.max_quantity)
+        if len(items) > self.max_lines:
+            raise CartFull(f'a cart can hold at most {self.max_lines} products')
+        self._save(items)
+
+    def set(self, product_id, quantity):
+        items = self.items()
+        if quantity > 0:
+            items[product_id] = min(quantity, self.max_quantity)
+            if len(items) > self.max_lines:
+                raise CartFull(f'a cart can hold at most {self.max_lines} products')
+        else:
+            items.pop(product_id, None)
+        self._save(items)
+
+    def remove(self, product_id):
+        self.set(product_id, 0)
+
+    def clear(self):
+        self.session.pop(self.KEY, None)
+
+
+class CartLine:
+    """سطر في السلة بنفس خصائص CartItem التي تستخدمها القوالب (id و product و quantity)
+
+    id هو ما تمرره القوالب إلى update_cart و remove_from_cart
+    """
+
+    __slots__ = ('product', 'quantity', 'id')
+
+    def __init__(self, product, quantity, id=None):
+        self.product = product
+        self.quantity = quantity
+        self.id = product.id if id is None else id
+
+    @property
+    def product_id(self):
+        return self.product.id
+
+    @property
+    def subtotal(self):
+        return self.product.price * self.quantity
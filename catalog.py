@@ -0,0 +1,283 @@
+import csv
+import hashlib
+import json
+import math
+import urllib.request
+import uuid
+from itertools import chain, islice
+
+from sqlalchemy import bindparam, insert, select, update
+
+from images import save_stream
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # بدون openpyxl يبقى الاستيراد من CSV و JSONL فقط
+    load_workbook = None
+
+REQUIRED_FIELDS = ('sku', 'name', 'price')
+# ملف التصدير يمكن تعديله وإعادة استيراده كما هو
+EXPORT_FIELDS = ('id', 'sku', 'name', 'description', 'price', 'image_url')
+SKU_LENGTH = 64
+NAME_LENGTH = 100
+IMAGE_URL_LENGTH = 200
+# عدد الأخطاء المحفوظة في تقرير الاستيراد، والباقي يُحسب فقط
+MAX_REPORTED_ERRORS = 100
+IMAGE_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif'}
+
+
+def new_sku():
+    # رمز للمنتجات المضافة من لوحة التحكم حتى يمكن تعديلها بإعادة استيراد ملف التصدير
+    return f'P-{uuid.uuid4().hex[:12].upper()}'
+
+
+class ImportFileError(ValueError):
+    """ملف لا يمكن استيراده أصلاً، مثل أعمدة ناقصة أو صيغة غير مدعومة"""
+
+
+def input_formats():
+    formats = ['csv', 'jsonl']
+    if load_workbook is not None:
+        formats.append('xlsx')
+    return formats
+
+
+# قراءة الملفات صفاً بصف، وكل قارئ يعيد (رقم السطر، الصف)
+
+def read_csv(path):
+    # utf-8-sig يتجاهل BOM الذي يضيفه Excel وملفات التصدير
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8-sig') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+def read_xlsx(path):
+    if load_workbook is None:
+        raise ImportFileError('XLSX import requires openpyxl')
+    # read_only يقرأ الورقة بشكل متدفق بدلاً من تحميلها كاملة
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = ['' if value is None else str(value) for value in next(rows, ())]
+        for line_number, values in enumerate(rows, 2):
+            if any(value is not None for value in values):
+                yield line_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'xlsx': read_xlsx}
+
+
+def read_rows(path, fmt):
+    reader = READERS.get(fmt)
+    if reader is None:
+        raise ImportFileError(f'unsupported format: {fmt}')
+    return reader(path)
+
+
+# التحقق من الصفوف
+
+def _text(value):
+    if value is None:
+        return ''
+    # Excel يعيد الأرقام الصحيحة كـ float مثل 1001.0
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def clean_row(row):
+    """تحويل الصف إلى قيم جاهزة للحفظ، أو ValueError برسالة تصف المشكلة
+
+    الأعمدة الاختيارية غير الموجودة في الصف لا تُعدل في المنتجات الحالية
+    """
+    if not isinstance(row, dict):
+        raise ValueError('invalid row')
+    row = {_text(key).lower(): value for key, value in row.items() if key is not None}
+    sku = _text(row.get('sku'))
+    if not sku:
+        raise ValueError('sku is required')
+    if len(sku) > SKU_LENGTH:
+        raise ValueError(f'sku is longer than {SKU_LENGTH} characters')
+    name = _text(row.get('name'))
+    if not name:
+        raise ValueError('name is required')
+    if len(name) > NAME_LENGTH:
+        raise ValueError(f'name is longer than {NAME_LENGTH} characters')
+    try:
+        price = float(_text(row.get('price')))
+    except ValueError:
+        raise ValueError('price is not a number') from None
+    if not math.isfinite(price) or price < 0:
+        raise ValueError('price must be zero or more')
+
+    values = {'sku': sku, 'name': name, 'price': price}
+    if 'description' in row:
+        values['description'] = _text(row.get('description')) or None
+    if 'image_url' in row:
+        image_url = _text(row.get('image_url')) or None
+        if image_url is not None:
+            if len(image_url) > IMAGE_URL_LENGTH:
+                raise ValueError(f'image_url is longer than {IMAGE_URL_LENGTH} characters')
+            if not image_url.startswith(('http://', 'https://', '/static/')):
+                raise ValueError('image_url must be an http(s) URL or a /static/ path')
+        values['image_url'] = image_url
+    return values
+
+
+def is_remote(url):
+    return bool(url) and url.startswith(('http://', 'https://'))
+
+
+def _check_columns(first_row):
+    # في CSV و XLSX كل الصفوف لها أعمدة الصف الأول، فالعمود الناقص خطأ في الملف كله
+    if not isinstance(first_row, dict):
+        return
+    columns = {_text(key).lower() for key in first_row if key is not None}
+    missing = [field for field in REQUIRED_FIELDS if field not in columns]
+    if missing:
+        raise ImportFileError(f'missing columns: {", ".join(missing)}')
+
+
+# الحفظ على دفعات
+
+def upsert_batch(session, model, batch, columns, upsert=None):
+    """حفظ دفعة من الصفوف بجملة واحدة تُنفذ بـ executemany، والمفتاح هو sku"""
+    table = model.__table__
+    if upsert is not None:
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['sku'],
+            set_={column: stmt.excluded[column] for column in columns if column != 'sku'},
+        )
+        session.execute(stmt, batch)
+        return
+
+    # قواعد البيانات بدون ON CONFLICT: نفصل الموجود عن الجديد باستعلام واحد لكل دفعة
+    existing = set(session.scalars(select(table.c.sku).where(table.c.sku.in_([row['sku'] for row in batch]))))
+    inserts = [row for row in batch if row['sku'] not in existing]
+    updates = [{f'b_{key}': value for key, value in row.items()} for row in batch if row['sku'] in existing]
+    if inserts:
+        session.execute(insert(table), inserts)
+    if updates:
+        session.execute(
+            update(table).where(table.c.sku == bindparam('b_sku'))
+            .values({column: bindparam(f'b_{column}') for column in columns if column != 'sku'}),
+            updates)
+
+
+def import_products(session, model, rows, upsert=None, batch_size=1000, on_batch=None, on_image=None):
+    """استيراد متدفق: التحقق من كل صف ثم الحفظ والـ commit لكل دفعة
+
+    الصور البعيدة لا تُحفظ مباشرة، بل تُمرر إلى on_image(sku, url) لتحميلها في الخلفية
+    """
+    report = {'rows': 0, 'imported': 0, 'invalid': 0, 'errors': []}
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return report
+    _check_columns(first[1])
+    rows = chain([first], rows)
+
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        # نفس sku مكرر في الدفعة يجعل ON CONFLICT يفشل في PostgreSQL، فنبقي آخر قيمة
+        batch = {}
+        images = []
+        for line_number, row in chunk:
+            report['rows'] += 1
+            try:
+                values = clean_row(row)
+            except ValueError as e:
+                report['invalid'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line_number, 'error': str(e)})
+                continue
+            if is_remote(values.get('image_url')):
+                images.append((values['sku'], values.pop('image_url')))
+            batch[values['sku']] = values
+        # الصفوف ذات الصور البعيدة بدون image_url حتى لا تُمسح الصورة الحالية، فتُحفظ بجملة منفصلة
+        groups = {}
+        for values in batch.values():
+            groups.setdefault(frozenset(values), []).append(values)
+        for group_columns, group in groups.items():
+            upsert_batch(session, model, group, group_columns, upsert)
+        report['imported'] += len(batch)
+        if on_image is not None:
+            for sku, url in images:
+                on_image(sku, url)
+        session.commit()
+        if on_batch is not None:
+            on_batch(report)
+    return report
+
+
+# تحديث الأسعار دفعة واحدة
+
+def parse_prices(items):
+    """[{"sku" أو "id": ..., "price": ...}] إلى قائمتين حسب المفتاح"""
+    by_id, by_sku = [], []
+    for number, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            raise ValueError(f'item {number}: invalid item')
+        try:
+            price = float(item.get('price'))
+        except (TypeError, ValueError):
+            raise ValueError(f'item {number}: price is not a number') from None
+        if not math.isfinite(price) or price < 0:
+            raise ValueError(f'item {number}: price must be zero or more')
+        if item.get('id') is not None:
+            try:
+                by_id.append({'b_id': int(item['id']), 'b_price': price})
+            except (TypeError, ValueError):
+                raise ValueError(f'item {number}: invalid id') from None
+        elif _text(item.get('sku')):
+            by_sku.append({'b_sku': _text(item['sku']), 'b_price': price})
+        else:
+            raise ValueError(f'item {number}: id or sku is required')
+    return by_id, by_sku
+
+
+def update_prices(session, model, by_id, by_sku):
+    """جملة UPDATE واحدة لكل نوع مفتاح، تُنفذ بـ executemany، وتعيد عدد الصفوف المعدلة"""
+    table = model.__table__
+    updated = 0
+    for key, params in (('id', by_id), ('sku', by_sku)):
+        if params:
+            result = session.execute(
+                update(table).where(table.c[key] == bindparam(f'b_{key}')).values(price=bindparam('b_price')),
+                params)
+            updated += max(result.rowcount, 0)
+    return updated
+
+
+# تحميل صور المنتجات من روابط خارجية
+
+def fetch_image(url, folder, timeout=10, max_bytes=None):
+    """تحميل الصورة وحفظها باسم مشتق من محتواها، ويعيد اسم الملف"""
+    request = urllib.request.Request(url, headers={'User-Agent': 'catalog-import'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        content_type = response.headers.get_content_type()
+        extension = IMAGE_TYPES.get(content_type)
+        if extension is None:
+            raise ValueError(f'unsupported image type: {content_type}')
+        return save_stream(response, folder, extension, max_bytes=max_bytes)
+
+
+def image_job_key(sku, url):
+    return f'product_image:{sku}:{hashlib.sha1(url.encode()).hexdigest()[:16]}'
@@ -5,6 +5,10 @@ def clean_database():
     if os.path.exists(db_path):
         try:
             os.remove(db_path)
+            # ملفات WAL بجانبها، وإلا تُطبق على قاعدة البيانات التالية بنفس الاسم
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
             print("✅ تم حذف قاعدة البيانات بنجاح")
         except Exception as e:
             print(f"❌ حدث خطأ أثناء حذف قاعدة البيانات: {str(e)}")
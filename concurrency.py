@@ -0,0 +1,24 @@
+import threading
+
+try:
+    from gevent import get_hub
+    from gevent.monkey import get_original, is_module_patched
+except ImportError:  # بدون gevent تعمل الخيوط العادية كما هي
+    get_hub = None
+
+
+def is_cooperative():
+    """صحيح عند التشغيل بعمال gevent بعد monkey.patch_all"""
+    return get_hub is not None and is_module_patched('threading')
+
+
+def thread_local():
+    # بعد monkey patching يصبح threading.local خاصاً بكل greenlet، أي بكل طلب
+    if is_cooperative():
+        return get_original('threading', 'local')()
+    return threading.local()
+
+
+def run_in_real_thread(fn, *args):
+    """تشغيل عمل يستهلك المعالج في خيط حقيقي حتى لا يوقف باقي الطلبات في وضع gevent"""
+    return get_hub().threadpool.spawn(fn, *args).get()
@@ -1,12 +1,131 @@
 import os
 
+from database import engine_options, normalize_url
+
+
+# ملفات مشتركة بين العمليات: أختام الإصدار وجدول المنتجات وحدود الطلبات
+# أداة القياس والاختبارات تستخدم مجلداً مؤقتاً حتى لا تشارك الأختام والجداول مع تطبيق حقيقي
+INSTANCE_FOLDER = os.environ.get('INSTANCE_FOLDER') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+
+
+# الأختام تُكتب أيضاً في جدول data_version، وكل عملية تقرؤه مرة كل هذه المدة (بالثواني)
+# حتى يرى عمال الـ dynos الأخرى تغييرات الكتالوج والإعدادات والمستخدمين
+VERSION_POLL_INTERVAL = float(os.environ.get('VERSION_POLL_INTERVAL', 1))
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key')
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///plastic_world.db')
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max-limit
+    # نسخ ملفات static التي تحتوي بصمة المحتوى خارج مجلد المصدر، ويخدمها WhiteNoise
+    # STATIC_WHITENOISE=0 يترك الخدمة لـ Flask أو لخادم أمام التطبيق
+    STATIC_BUILD_FOLDER = os.path.join(INSTANCE_FOLDER, 'static-build')
+    STATIC_WHITENOISE = os.environ.get('STATIC_WHITENOISE', '1') == '1'
     DEBUG = False
     PREFERRED_URL_SCHEME = 'https'
+    # عند وجود nginx أمام التطبيق يمكنه إرسال الملفات مباشرة
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE') == '1'
+
+    # قاعدة البيانات: حجم مجموعة الاتصالات لكل عامل يجب أن يساوي عدد الخيوط فيه تقريباً
+    SQLALCHEMY_DATABASE_URI = normalize_url(os.environ.get('DATABASE_URL', 'sqlite:///plastic_world.db'))
+    DATABASE_POOL_SIZE = _env_int('DATABASE_POOL_SIZE', 5)
+    DATABASE_MAX_OVERFLOW = _env_int('DATABASE_MAX_OVERFLOW', 5)
+    DATABASE_POOL_TIMEOUT = _env_int('DATABASE_POOL_TIMEOUT', 10)
+    # إعادة فتح الاتصالات القديمة قبل أن يغلقها الخادم أو الـ load balancer
+    DATABASE_POOL_RECYCLE = _env_int('DATABASE_POOL_RECYCLE', 1800)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW,
+        DATABASE_POOL_TIMEOUT, DATABASE_POOL_RECYCLE)
+    # WAL يسمح للقراءة بالاستمرار أثناء الكتابة بدلاً من قفل الملف بالكامل
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': 'NORMAL',
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT', 5000),
+        'mmap_size': 256 * 1024 * 1024,
+    }
+    # نسخة للقراءة فقط (اختيارية) تخدم طلبات GET العامة
+    DATABASE_REPLICA_URL = normalize_url(os.environ.get('DATABASE_REPLICA_URL'))
+    SQLALCHEMY_BINDS = {
+        'replica': dict(engine_options(DATABASE_REPLICA_URL, DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW,
+                                       DATABASE_POOL_TIMEOUT, DATABASE_POOL_RECYCLE),
+                        url=DATABASE_REPLICA_URL),
+    } if DATABASE_REPLICA_URL else {}
+    # أسماء المسارات تبدأ باسم الـ blueprint
+    READ_REPLICA_ENDPOINTS = {
+        'shop.home', 'shop.products', 'shop.product_detail', 'shop.api_products', 'shop.search',
+        'shop.api_search', 'shop.about',
+    }
+
+    PRODUCTS_PER_PAGE = 24
+    MAX_PER_PAGE = 100
+    ORDERS_PER_PAGE = 50
+    # إحصائيات لوحة الطلبات بدون فترة محددة تغطي آخر أيام فقط، وليس كل السجل
+    ORDER_STATS_DAYS = _env_int('ORDER_STATS_DAYS', 30)
+    EXPORT_BATCH_SIZE = 1000
+    # صندوق رسائل التواصل: حجم الصفحة، وأقصى عدد رسائل في تحديث الحالة الجماعي، ودفعات النقل للأرشيف
+    MESSAGES_PER_PAGE = 50
+    MAX_MESSAGE_BATCH = 500
+    MESSAGE_ARCHIVE_BATCH_SIZE = 1000
+    SEARCH_RESULTS_LIMIT = 50
+    MAX_CART_BATCH = 500
+    # سلة الزائر محفوظة في كوكي الجلسة الموقعة وحجمها محدود بحوالي 4KB
+    MAX_CART_LINES = 100
+    # سلة المستخدم المسجل في CartItem، وتتسع لطلبات الجملة الكبيرة
+    MAX_USER_CART_LINES = 1000
+    MAX_CART_QUANTITY = 999
+    # الاستيراد الجماعي للمنتجات يعمل في عامل المهام على دفعات، والملف المرفوع يُحفظ في catalog_upload
+    # ويكتبه العامل في هذا المجلد المحلي أثناء الاستيراد فقط
+    CATALOG_IMPORT_FOLDER = os.path.join(INSTANCE_FOLDER, 'imports')
+    CATALOG_IMPORT_BATCH_SIZE = 1000
+    MAX_PRICE_BATCH = 5000
+    IMAGE_FETCH_TIMEOUT = 10
+    # مدة صلاحية هويات المستخدمين المخزنة في كل عامل بالثواني، و 0 يعطل التخزين
+    IDENTITY_CACHE_TTL = _env_int('IDENTITY_CACHE_TTL', 300)
+    # تخزين الصفحات العامة للزوار، والمخزن المشترك بين العمال اختياري
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+    PAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    PAGE_CACHE_SHARED_PATH = os.environ.get('PAGE_CACHE_SHARED_PATH')
+    # حدود الطلبات التي تكتب (POST وما شابه) لكل مسار: {النطاق: (عدد الطلبات، خلال ثوانٍ)}
+    # ip عنوان العميل، user المستخدم المسجل، username_ip الاسم المُدخل في نموذج الدخول مع عنوان العميل
+    # (حد على الاسم وحده يسمح لأي شخص بإغلاق دخول المسؤول بخمسة طلبات في الدقيقة)
+    RATE_LIMITS_ENABLED = os.environ.get('RATE_LIMITS_ENABLED', '1') == '1'
+    RATE_LIMITS = {
+        'auth.login': {'ip': (20, 60), 'username_ip': (5, 60)},
+        'shop.contact': {'ip': (5, 600)},
+        'cart.process_checkout': {'ip': (20, 60), 'user': (5, 60)},
+        'cart.api_cart_add': {'ip': (120, 60)},
+    }
+    # عدد الوكلاء أمام التطبيق الذين نثق بترويسة X-Forwarded-For منهم (موجه Heroku واحد)
+    # وبدونه يظهر كل العملاء بعنوان الوكيل نفسه. 0 عند التشغيل بدون وكيل حتى لا يُزوّر العنوان
+    PROXY_FIX_X_FOR = _env_int('PROXY_FIX_X_FOR', 1)
+    # جدول الدلاء المشترك بين العمال، وكل مجموعة 8 خانات بحجم 192 بايت
+    RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH') or os.path.join(INSTANCE_FOLDER, 'ratelimit.table')
+    RATE_LIMIT_GROUPS = 4096
+    # تكلفة تجزئة كلمات المرور وعدد العمليات المتزامنة المسموح بها
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_THREADS = 2
+    PASSWORD_HASH_MAX_PENDING = 8
+    # الحد الأقصى لعدد استعلامات SQL في كل مسار
+    QUERY_BUDGETS = {
+        'shop.home': 3,
+        'shop.products': 3,
+        'shop.product_detail': 3,
+        'shop.about': 2,
+        'cart.cart': 3,
+        'cart.checkout': 3,
+        'cart.process_checkout': 8,
+        'admin.admin_orders': 8,
+        'admin.print_order': 5,
+    }
+    # ترويسة X-Query-Count تستخدمها أداة قياس الأداء في bench
+    QUERY_COUNT_HEADER = os.environ.get('QUERY_COUNT_HEADER') == '1'
+    # المقاييس المشتركة بين العمال، ورمز اختياري يسمح لـ Prometheus بقراءتها بدون تسجيل دخول
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    SLOW_REQUEST_MS = float(os.environ['SLOW_REQUEST_MS']) if os.environ.get('SLOW_REQUEST_MS') else None
 
     # إعدادات افتراضية للموقع
     DEFAULT_SETTINGS = {
@@ -1,4 +1,8 @@
-from app import app, db, User
+from config import Config
+from factory import create_cli_app
+from migrate import upgrade
+from models import db, User
+from passwords import PasswordHasher
 
 def create_admin():
     # التحقق من وجود المستخدم
@@ -6,7 +10,7 @@ def create_admin():
     if not admin:
         admin = User(
             username='admin',
-            password='admin123',
+            password=PasswordHasher.from_config(Config).hash('admin123'),
             is_admin=True
         )
         db.session.add(admin)
@@ -16,6 +20,6 @@ def create_admin():
         print('حساب المسؤول موجود بالفعل')
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
+    with create_cli_app().app_context():
+        upgrade(db.engine)
         create_admin()
@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql import Select
+
+REPLICA = 'replica'
+# مفتاح في session.info يجبر القراءة من قاعدة البيانات الأساسية، انظر primary_reads
+PRIMARY = 'primary'
+
+
+def normalize_url(url):
+    # Heroku وبعض المزودين ما زالوا يعطون postgres:// الذي لم يعد SQLAlchemy يقبله
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, pool_size=5, max_overflow=5, pool_timeout=10, pool_recycle=1800):
+    if not url or make_url(url).get_backend_name() != 'postgresql':
+        return {}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        # التأكد من أن الاتصال ما زال صالحاً قبل استخدامه بعد فترة خمول
+        'pool_pre_ping': True,
+    }
+
+
+def _sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return on_connect
+
+
+def configure_engines(app, db):
+    """تطبيق إعدادات SQLite على كل اتصال جديد في كل المحركات"""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_pragmas(app.config['SQLITE_PRAGMAS']))
+
+
+@contextmanager
+def primary_reads(session):
+    """كل استعلامات session داخل الكتلة تذهب إلى قاعدة البيانات الأساسية
+
+    للمخازن المؤقتة المرتبطة بختم إصدار: الختم يتغير بعد commit في الأساسية، والنسخة
+    المقروءة قد تكون متأخرة عنه، فتُخزن بيانات قديمة باسم الإصدار الجديد ولا تُحدّث بعدها
+    """
+    previous = session.info.get(PRIMARY, False)
+    session.info[PRIMARY] = True
+    try:
+        yield
+    finally:
+        session.info[PRIMARY] = previous
+
+
+class RoutingSession(Session):
+    """جلسة ترسل استعلامات القراءة في مسارات GET العامة إلى النسخة المقروءة إن وجدت
+
+    الكتابة وكل ما يحدث أثناء flush يذهب دائماً إلى قاعدة البيانات الأساسية
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and self._use_replica(mapper, clause):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, mapper, clause):
+        if not has_request_context() or request.method != 'GET':
+            return False
+        if self.info.get(PRIMARY):
+            return False
+        if REPLICA not in self._db.engines:
+            return False
+        if request.endpoint not in current_app.config['READ_REPLICA_ENDPOINTS']:
+            return False
+        return isinstance(clause, Select) or (clause is None and mapper is not None)
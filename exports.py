@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import zlib
+
+from flask import Response, stream_with_context
+
+# حجم الدفعة قبل إرسالها للعميل
+CHUNK_SIZE = 64 * 1024
+
+
+def csv_chunks(header, rows):
+    buffer = io.StringIO()
+    # BOM حتى يفتح Excel الملف بترميز UTF-8 ويعرض العربية بشكل صحيح
+    buffer.write('\ufeff')
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(header, rows):
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(header, row)), ensure_ascii=False, default=str)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+            size = 0
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', csv_chunks),
+    'jsonl': ('application/x-ndjson; charset=utf-8', jsonl_chunks),
+}
+
+
+def export_response(name, fmt, header, rows, compress=False):
+    """استجابة متدفقة لا تحمل الجدول كاملاً في الذاكرة"""
+    mimetype, writer = FORMATS[fmt]
+    chunks = (chunk.encode('utf-8') for chunk in writer(header, rows))
+    filename = f'{name}.{fmt}'
+    if compress:
+        chunks = gzip_chunks(chunks)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
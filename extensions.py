@@ -0,0 +1,54 @@
+import os
+
+from flask_login import LoginManager
+from sqlalchemy import select
+
+from cache import PageCache, SqliteStore
+from config import Config, INSTANCE_FOLDER
+from database import primary_reads
+from identity import IdentityCache, Principal
+from instrumentation import QueryCounter, RequestMetrics
+from jobs import JobQueue
+from models import db, Job, Product, User, catalog_stamp, users_stamp
+from passwords import PasswordHasher
+from product_table import ProductTable
+from ratelimit import RateLimiter, TokenBuckets
+from search import ProductSearch
+
+# كائنات مشتركة بدون تطبيق، وcreate_app في factory.py يربط ما يحتاج منها بالتطبيق
+login_manager = LoginManager()
+query_counter = QueryCounter()
+request_metrics = RequestMetrics()
+
+password_hasher = PasswordHasher.from_config(Config)
+
+# محرك البحث في أسماء وأوصاف المنتجات
+product_search = ProductSearch(db, Product, catalog_stamp)
+
+# الأسماء والأسعار والصور في ملف مشترك بين العمال بدلاً من تحميل كائنات Product
+RECORD_COLUMNS = (Product.id, Product.name, Product.price, Product.image_url)
+
+def load_product_rows():
+    with primary_reads(db.session):
+        return db.session.execute(select(*RECORD_COLUMNS).order_by(Product.id).execution_options(yield_per=5000))
+
+product_table = ProductTable(os.path.join(INSTANCE_FOLDER, 'products.table'), catalog_stamp, load_product_rows)
+
+# هويات المستخدمين المسجلين مخزنة في كل عامل بدلاً من استعلام في كل طلب
+def load_user_row(user_id):
+    with primary_reads(db.session):
+        return db.session.get(User, user_id)
+
+identity_cache = IdentityCache(load_user_row, users_stamp, ttl=Config.IDENTITY_CACHE_TTL)
+Principal.resolver = load_user_row
+
+# Page cache
+page_cache = PageCache(Config.PAGE_CACHE_MAX_BYTES,
+                       shared=SqliteStore(Config.PAGE_CACHE_SHARED_PATH) if Config.PAGE_CACHE_SHARED_PATH else None)
+
+# Rate limiting
+rate_limiter = RateLimiter(TokenBuckets(Config.RATE_LIMIT_PATH, Config.RATE_LIMIT_GROUPS), Config.RATE_LIMITS)
+
+# Background jobs
+# المهام نفسها في tasks.py وتُنفذ في worker.py خارج طلبات الويب
+job_queue = JobQueue(db, Job)
@@ -0,0 +1,138 @@
+import math
+import os
+from importlib import import_module
+
+from flask import Flask, flash, make_response, redirect, request, session, url_for
+from flask_login import current_user
+
+from config import Config, INSTANCE_FOLDER
+from database import configure_engines
+from models import db
+
+# تُستورد عند إنشاء التطبيق فقط، فسكربتات الإدارة لا تحمّل المسارات ولا القوالب
+BLUEPRINTS = ('shop', 'cart', 'admin', 'auth')
+
+def create_cli_app():
+    """تطبيق بدون مسارات لسكربتات الإدارة: الإعدادات وقاعدة البيانات فقط"""
+    app = Flask(__name__, instance_path=INSTANCE_FOLDER)
+    app.config.from_object(Config)
+    db.init_app(app)
+    configure_engines(app, db)
+    return app
+
+def create_app():
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    from whitenoise import WhiteNoise
+
+    from assets import ONE_YEAR, build_manifest, is_immutable
+    from extensions import identity_cache, login_manager, query_counter, rate_limiter, request_metrics
+    from models import settings_cache
+    from passwords import HasherBusy
+    from ratelimit import RateLimited
+    from tasks import image_pipeline
+
+    app = create_cli_app()
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    query_counter.init_app(app)
+    request_metrics.init_app(app)
+
+    # التأكد من وجود مجلد الصور، وexist_ok لأن عدة عمال قد يصلون هنا في نفس اللحظة
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    app.add_template_global(image_pipeline.srcset, 'image_srcset')
+    app.add_template_global(image_pipeline.variant_url, 'image_variant')
+
+    # نسخ ملفات static بأسماء تحتوي بصمة المحتوى وخدمتها عبر WhiteNoise مع الضغط المسبق
+    static_manifest = {}
+    if app.config['STATIC_WHITENOISE'] and os.path.isdir(app.static_folder):
+        static_manifest = build_manifest(app.static_folder, app.config['STATIC_BUILD_FOLDER'])
+        app.wsgi_app = WhiteNoise(app.wsgi_app, root=app.config['STATIC_BUILD_FOLDER'], prefix='static/',
+                                  immutable_file_test=lambda path, url: is_immutable(url))
+        # الملفات الأصلية والصور المرفوعة قبل بدء التشغيل
+        app.wsgi_app.add_files(app.static_folder, prefix='static/')
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        # url_for('static', filename='css/style.css') يعيد الاسم الذي يحتوي البصمة
+        if endpoint == 'static' and values.get('filename') in static_manifest:
+            values['filename'] = static_manifest[values['filename']]
+
+    @app.after_request
+    def cache_immutable_static(response):
+        # الصور المرفوعة بعد بدء التشغيل يخدمها Flask، وأسماؤها مشتقة من محتواها
+        if request.endpoint == 'static' and response.status_code == 200 and is_immutable(request.path):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = ONE_YEAR
+            response.cache_control.immutable = True
+        return response
+
+    @app.errorhandler(HasherBusy)
+    def password_hasher_busy(error):
+        flash('الخادم مشغول حالياً، يرجى المحاولة بعد قليل')
+        return redirect(request.referrer or url_for('auth.login'))
+
+    # عنوان العميل الحقيقي من X-Forwarded-For بدلاً من عنوان الوكيل، لحدود الطلبات والسجلات
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    def login_username():
+        return (request.form.get('username') or '').strip().lower() or None
+
+    # قيمة كل نطاق في الطلب الحالي، و None يعني أن النطاق لا ينطبق
+    rate_limit_keys = {
+        'ip': lambda: request.remote_addr,
+        'user': lambda: current_user.get_id() if current_user.is_authenticated else None,
+        'username_ip': lambda: f'{login_username()}@{request.remote_addr}' if login_username() else None,
+    }
+
+    @app.before_request
+    def apply_rate_limits():
+        # الحدود على الطلبات التي تكتب فقط، فعرض الصفحات نفسها لا يتأثر
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or not app.config['RATE_LIMITS_ENABLED']:
+            return
+        rate_limiter.check(request.endpoint, lambda scope: rate_limit_keys[scope]())
+
+    @app.errorhandler(RateLimited)
+    def rate_limited(error):
+        retry_after = math.ceil(error.retry_after)
+        if request.path.startswith('/api/'):
+            response = make_response({'error': 'too many requests', 'retry_after': retry_after}, 429)
+        else:
+            response = make_response('طلبات كثيرة، يرجى المحاولة بعد قليل', 429)
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        principal = identity_cache.get(int(user_id))
+        # الجلسات التي سُجلت قبل تغيير كلمة المرور لم تعد صالحة
+        if principal is not None and session.get('_credential', principal.credential_version) != principal.credential_version:
+            return None
+        return principal
+
+    # إضافة context processor لتوفير الإعدادات لجميع القوالب
+    @app.context_processor
+    def inject_settings():
+        return dict(settings=settings_cache.get())
+
+    for name in BLUEPRINTS:
+        app.register_blueprint(import_module(f'blueprints.{name}').bp)
+    register_endpoint_aliases(app)
+    return app
+
+def register_endpoint_aliases(app):
+    # القوالب تستخدم الأسماء القديمة مثل url_for('home')، فتُحوّل إلى shop.home
+    aliases = {}
+    for endpoint in app.view_functions:
+        blueprint, _, name = endpoint.rpartition('.')
+        if blueprint:
+            aliases.setdefault(name, endpoint)
+
+    def build_alias(error, endpoint, values):
+        target = aliases.get(endpoint)
+        if target is None:
+            raise error
+        return url_for(target, **values)
+
+    app.url_build_error_handlers.append(build_alias)
@@ -1,3 +1,104 @@
-workers = 4
-bind = "0.0.0.0:8000"
-timeout = 120
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+
+# ملف تشغيل الخادم: sync أو gthread أو gevent (gevent يحتاج pip install gevent)
+profile = os.environ.get('GUNICORN_PROFILE', 'gthread')
+if profile == 'gevent':
+    # يجب أن يتم قبل استيراد التطبيق حتى تصبح الأقفال والمقابس تعاونية مع preload_app
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+from metrics import clear, default_directory, mark_process_dead
+
+cores = multiprocessing.cpu_count()
+PROFILES = {
+    # عامل واحد لكل طلب: العميل البطيء يحجز العامل بالكامل
+    'sync': {'worker_class': 'sync', 'workers': cores * 2 + 1, 'threads': 1, 'pool_size': 1},
+    'gthread': {'worker_class': 'gthread', 'workers': cores + 1, 'threads': 4, 'pool_size': 4},
+    # آلاف الاتصالات لكل عامل، بينما تبقى اتصالات قاعدة البيانات محدودة
+    'gevent': {'worker_class': 'gevent', 'workers': cores, 'threads': 1, 'pool_size': 10},
+}
+settings = PROFILES[profile]
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = settings['worker_class']
+workers = int(os.environ.get('WEB_CONCURRENCY', settings['workers']))
+threads = int(os.environ.get('GUNICORN_THREADS', settings['threads']))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# إعادة تشغيل العامل بعد عدد من الطلبات يحد من تضخم الذاكرة، والـ jitter يمنع إعادة تشغيل الجميع معاً
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+# تحميل التطبيق مرة واحدة في العملية الأم ومشاركة الذاكرة مع العمال عبر fork
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# مجموعة اتصالات قاعدة البيانات في كل عامل بحجم عدد الطلبات المتزامنة فيه
+os.environ.setdefault('DATABASE_POOL_SIZE', str(max(threads, settings['pool_size'])))
+
+# كل عامل يكتب مقاييسه في ملف خاص به، وصفحة /admin/metrics تدمجها
+metrics_dir = default_directory()
+
+
+# عامل المهام يعمل داخل dyno الويب نفسه: مهام الصور تقرأ وتكتب static/uploads على القرص المحلي
+# وفي Heroku لكل dyno قرص منفصل. WEB_RUNS_WORKER=0 عند تشغيل worker.py بشكل منفصل على نفس القرص
+run_worker = os.environ.get('WEB_RUNS_WORKER', '1') == '1'
+worker_stop = threading.Event()
+worker_process = None
+
+
+def supervise_worker(log):
+    # إعادة تشغيل العامل إذا سقط، حتى لا تتوقف المهام بصمت بينما الويب يعمل
+    # الخروج بالرمز 0 يعني أنه تلقى SIGTERM مع بقية عمليات الـ dyno عند الإيقاف
+    global worker_process
+    root = os.path.dirname(os.path.abspath(__file__))
+    while not worker_stop.is_set():
+        worker_process = subprocess.Popen([sys.executable, os.path.join(root, 'worker.py')], cwd=root)
+        code = worker_process.wait()
+        if code == 0 or worker_stop.is_set():
+            return
+        log.warning('Job worker exited with code %s, restarting', code)
+        worker_stop.wait(5)
+
+
+def on_starting(server):
+    clear(metrics_dir)
+
+
+def when_ready(server):
+    if run_worker:
+        threading.Thread(target=supervise_worker, args=(server.log,), daemon=True).start()
+
+
+def on_exit(server):
+    worker_stop.set()
+    if worker_process is not None and worker_process.poll() is None:
+        worker_process.terminate()
+        try:
+            worker_process.wait(graceful_timeout)
+        except subprocess.TimeoutExpired:
+            worker_process.kill()
+
+
+def post_fork(server, worker):
+    # اتصالات قاعدة البيانات التي فتحتها العملية الأم لا تُستخدم في العمال
+    if preload_app:
+        from models import db
+        # التطبيق الذي حمّلته العملية الأم، سواء كان app:app أو factory:create_app()
+        app = server.app.wsgi()
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    mark_process_dead(worker.pid, metrics_dir)
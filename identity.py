@@ -0,0 +1,75 @@
+import zlib
+
+from cache import TTLCache
+
+
+def credential_version(password_hash):
+    return zlib.crc32((password_hash or '').encode('utf-8'))
+
+
+class Principal:
+    """هوية المستخدم المسجل بدون تحميل كائن User من قاعدة البيانات"""
+
+    __slots__ = ('id', 'username', 'is_admin', 'credential_version')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    # دالة تحميل كائن User عند الحاجة لخصائص غير موجودة في الهوية
+    resolver = None
+
+    def __init__(self, id, username, is_admin, credential_version):
+        self.id = id
+        self.username = username
+        self.is_admin = bool(is_admin)
+        self.credential_version = credential_version
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.is_admin, credential_version(user.password))
+
+    def get_id(self):
+        return str(self.id)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or Principal.resolver is None:
+            raise AttributeError(name)
+        return getattr(Principal.resolver(self.id), name)
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id and getattr(other, 'is_authenticated', False)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class IdentityCache:
+    """تخزين هويات المستخدمين في كل عامل، ويُفرّغ عند تغير ختم إصدار المستخدمين"""
+
+    def __init__(self, loader, stamp, max_entries=10000, ttl=300):
+        self._loader = loader
+        self._stamp = stamp
+        self._cache = TTLCache(max_entries, ttl)
+        self._version = None
+
+    def get(self, user_id):
+        # ttl=0 يعطل التخزين: تحميل المستخدم في كل طلب كما كان user_loader سابقاً
+        if self._cache.ttl <= 0:
+            user = self._loader(user_id)
+            return Principal.from_user(user) if user is not None else None
+        version = self._stamp.read()
+        if version != self._version:
+            self._cache.clear()
+            self._version = version
+        principal = self._cache.get(user_id)
+        if principal is None:
+            user = self._loader(user_id)
+            if user is None:
+                return None
+            principal = Principal.from_user(user)
+            self._cache.set(user_id, principal)
+        return principal
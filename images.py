@@ -0,0 +1,133 @@
+import hashlib
+import os
+import threading
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # بدون Pillow نكتفي بحفظ الصورة الأصلية
+    Image = None
+
+# أحجام النسخ المصغرة (أقصى عرض بالبكسل)
+VARIANTS = {'thumb': 160, 'card': 480, 'full': 1280}
+CHUNK_SIZE = 64 * 1024
+
+
+def _supports(codec):
+    try:
+        return features.check(codec)
+    except ValueError:
+        return False
+
+
+def output_formats():
+    formats = []
+    if Image is not None:
+        if _supports('avif'):
+            formats.append('avif')
+        if _supports('webp'):
+            formats.append('webp')
+        formats.append('jpg')
+    return formats
+
+
+def save_upload(file, folder, extension, prefix=''):
+    """حفظ الملف المرفوع باسم مشتق من بصمة محتواه بدلاً من الوقت"""
+    return save_stream(file.stream, folder, extension, prefix)
+
+
+def save_stream(stream, folder, extension, prefix='', max_bytes=None):
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = os.path.join(folder, f'.upload-{os.getpid()}-{threading.get_ident()}')
+    with open(tmp_path, 'wb') as out:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                out.close()
+                os.remove(tmp_path)
+                raise ValueError(f'file is larger than {max_bytes} bytes')
+            digest.update(chunk)
+            out.write(chunk)
+    filename = f'{prefix}{digest.hexdigest()[:24]}.{extension}'
+    os.replace(tmp_path, os.path.join(folder, filename))
+    return filename
+
+
+def variant_filename(filename, variant, fmt):
+    stem = filename.rsplit('.', 1)[0]
+    return f'{stem}_{variant}.{fmt}'
+
+
+def _save_atomic(image, path, fmt, **options):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    image.save(tmp_path, format=fmt, **options)
+    os.replace(tmp_path, path)
+
+
+def make_variants(path):
+    """إنشاء النسخ المصغرة بدون البيانات الوصفية (EXIF)"""
+    folder, filename = os.path.split(path)
+    with Image.open(path) as original:
+        original = ImageOps.exif_transpose(original)
+        has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+        source = original.convert('RGBA' if has_alpha else 'RGB')
+    for variant, width in VARIANTS.items():
+        image = source.copy()
+        image.thumbnail((width, width * 4))
+        for fmt in output_formats():
+            target = os.path.join(folder, variant_filename(filename, variant, fmt))
+            if os.path.exists(target):
+                continue
+            if fmt == 'jpg':
+                _save_atomic(image.convert('RGB'), target, 'JPEG', quality=82, optimize=True, progressive=True)
+            elif fmt == 'webp':
+                _save_atomic(image, target, 'WEBP', quality=80, method=4)
+            else:
+                _save_atomic(image, target, 'AVIF', quality=60)
+
+
+class ImagePipeline:
+    """النسخ المصغرة للصور المرفوعة، يتم إنشاؤها في عامل المهام حتى يعود طلب الرفع فوراً"""
+
+    def __init__(self, folder, url_prefix):
+        self.folder = folder
+        self.url_prefix = url_prefix.rstrip('/') + '/'
+        self._ready = set()
+
+    def process(self, filename):
+        if Image is None:
+            return
+        make_variants(os.path.join(self.folder, filename))
+
+    def _filename(self, url):
+        if not url or not url.startswith(self.url_prefix):
+            return None
+        return url[len(self.url_prefix):]
+
+    def _has_variants(self, filename, fmt):
+        key = (filename, fmt)
+        if key in self._ready:
+            return True
+        if os.path.exists(os.path.join(self.folder, variant_filename(filename, 'full', fmt))):
+            self._ready.add(key)
+            return True
+        return False
+
+    def variant_url(self, url, variant='card', fmt='jpg'):
+        filename = self._filename(url)
+        if filename is None or not self._has_variants(filename, fmt):
+            return url
+        return self.url_prefix + variant_filename(filename, variant, fmt)
+
+    def srcset(self, url, fmt='webp'):
+        filename = self._filename(url)
+        if filename is None or not self._has_variants(filename, fmt):
+            return ''
+        return ', '.join(
+            f'{self.url_prefix}{variant_filename(filename, variant, fmt)} {width}w'
+            for variant, width in VARIANTS.items()
+        )
@@ -0,0 +1,105 @@
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+UNREAD = 'unread'
+STATUSES = ('unread', 'read', 'archived')
+# الصندوق العادي بدون المؤرشف
+INBOX_STATUSES = ('unread', 'read')
+
+
+def _count_unread(message, *filters):
+    return select(func.count()).select_from(message).where(message.status == UNREAD, *filters)
+
+
+def recount(session, message, counter):
+    """إعادة حساب عداد غير المقروء من الجدول، لقواعد البيانات التي أُنشئت بدونه"""
+    value = session.scalar(_count_unread(message))
+    try:
+        session.execute(delete(counter).where(counter.name == UNREAD))
+        session.execute(insert(counter).values(name=UNREAD, value=value))
+        session.commit()
+    except IntegrityError:
+        # عملية أخرى أنشأت العداد في نفس اللحظة
+        session.rollback()
+    return value
+
+
+def unread_count(session, message, counter):
+    value = session.scalar(select(counter.value).where(counter.name == UNREAD))
+    return recount(session, message, counter) if value is None else value
+
+
+def message_received(session, counter):
+    # في نفس معاملة إضافة الرسالة حتى لا يختلف العداد عن الجدول
+    session.execute(update(counter).where(counter.name == UNREAD).values(value=counter.value + 1))
+
+
+def set_status(session, message, counter, ids, status):
+    """تغيير حالة عدة رسائل ويعيد عدد الرسائل التي تغيرت
+
+    الفرق في العداد من عدد الصفوف التي غيرتها جمل UPDATE فعلاً، وليس من استعلام فرعي:
+    في READ COMMITTED الاستعلام الفرعي يرى لقطة قبل انتظار الأقفال، فتحسب معاملتان متزامنتان
+    نفس الرسائل. UPDATE يعيد فحص الشرط على آخر نسخة من الصف بعد القفل. الحفظ (commit) على المستدعي.
+    """
+    if status not in STATUSES:
+        raise ValueError(f'unknown status: {status}')
+    selected = message.id.in_(ids)
+
+    def change(*filters):
+        result = session.execute(update(message).where(selected, *filters).values(status=status)
+                                 .execution_options(synchronize_session=False))
+        return result.rowcount
+
+    if status == UNREAD:
+        changed = change(message.status != UNREAD)
+        delta = changed
+    else:
+        # جملتان حتى نعرف كم رسالة خرجت من غير المقروء
+        delta = -change(message.status == UNREAD)
+        changed = -delta + change(message.status.notin_((UNREAD, status)))
+    if delta:
+        session.execute(update(counter).where(counter.name == UNREAD).values(value=counter.value + delta))
+    return changed
+
+
+def move_archived(session, message, archive, batch_size=1000):
+    """نقل الرسائل المؤرشفة إلى الجدول البارد على دفعات، ويعيد عدد الرسائل المنقولة
+
+    آخر رسالة تبقى في مكانها دائماً: SQLite قد يعيد استخدام أكبر معرف بعد حذفه،
+    فتفوت الرسالة الجديدة من يستعلم بـ ?since
+    """
+    latest = session.scalar(select(func.max(message.id)))
+    if latest is None:
+        return 0
+    columns = [column.name for column in message.__table__.columns]
+    moved = 0
+    while True:
+        ids = session.scalars(
+            select(message.id)
+            .where(message.status == 'archived', message.id < latest)
+            .order_by(message.date_sent, message.id)
+            .limit(batch_size)).all()
+        if not ids:
+            return moved
+        rows = select(*(message.__table__.c[name] for name in columns)).where(message.id.in_(ids))
+        session.execute(insert(archive).from_select(columns, rows))
+        session.execute(delete(message).where(message.id.in_(ids)).execution_options(synchronize_session=False))
+        session.commit()
+        moved += len(ids)
+
+
+def poll_etag(latest_id, unread):
+    # رسالة جديدة تغير أكبر معرف، وتغيير الحالة من أي مكان يغير العداد
+    return f'{latest_id or 0}-{unread}'
+
+
+def message_payload(message):
+    return {
+        'id': message.id,
+        'name': message.name,
+        'email': message.email,
+        'phone': message.phone,
+        'message': message.message,
+        'date_sent': message.date_sent.isoformat() if message.date_sent else None,
+        'status': message.status,
+    }
@@ -1,15 +1,26 @@
 import os
-from app import app, db, User, Settings
+# بدون extensions: سكربت الإدارة لا يحتاج مدير الدخول ولا المخازن المؤقتة ولا طابور المهام
+from config import Config
+from factory import create_cli_app
+from migrate import stamp
+from models import db, User, Product, Settings, catalog_stamp
+from passwords import PasswordHasher
 
 def init_database():
     print("⚙️ جاري إنشاء قاعدة البيانات...")
     
-    with app.app_context():
+    with create_cli_app().app_context():
         print("↻ حذف الجداول القديمة...")
         db.drop_all()
         
         print("⚡ إنشاء جداول جديدة...")
         db.create_all()
+        stamp(db.engine)
+        # جدول FTS5 ليس ضمن النماذج فلا يحذفه drop_all
+        from search import ProductSearch
+        ProductSearch(db, Product, catalog_stamp).reset()
+        # جدول المنتجات المشترك قد يكون مبنياً من قاعدة بيانات سابقة
+        catalog_stamp.bump()
         
         # إنشاء الإعدادات الافتراضية
         print("⚙️ إنشاء الإعدادات الافتراضية...")
@@ -40,7 +51,7 @@ def init_database():
         print("👤 إنشاء حساب المسؤول...")
         admin = User(
             username='admin',
-            password='admin123',
+            password=PasswordHasher.from_config(Config).hash('admin123'),
             is_admin=True
         )
         db.session.add(admin)
@@ -0,0 +1,157 @@
+from time import perf_counter
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import MetricsStore, default_directory
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """عدّاد استعلامات SQL لكل طلب مع حد أقصى لكل مسار"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_BUDGETS', {})
+        app.config.setdefault('QUERY_BUDGET_DEFAULT', None)
+        # في وضع الاختبار يفشل الطلب بدلاً من تسجيل تحذير فقط
+        app.config.setdefault('QUERY_BUDGET_STRICT', False)
+        app.config.setdefault('QUERY_COUNT_HEADER', False)
+        self.app = app
+        event.listen(Engine, 'before_cursor_execute', self._count)
+        app.before_request(self._start)
+        app.after_request(self._check)
+
+    @staticmethod
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        # count_queries=False لاستعلامات داخلية مثل قراءة أختام الإصدار، وليست من عمل المسار
+        if has_request_context() and conn.get_execution_options().get('count_queries', True):
+            g.sql_queries = g.get('sql_queries', 0) + 1
+
+    @staticmethod
+    def _start():
+        g.sql_queries = 0
+
+    def _check(self, response):
+        count = g.get('sql_queries', 0)
+        config = self.app.config
+        if config['QUERY_COUNT_HEADER']:
+            response.headers['X-Query-Count'] = str(count)
+        budget = config['QUERY_BUDGETS'].get(request.endpoint, config['QUERY_BUDGET_DEFAULT'])
+        if budget is not None and count > budget:
+            message = f'{request.endpoint} issued {count} SQL queries (budget {budget})'
+            if config['QUERY_BUDGET_STRICT']:
+                raise QueryBudgetExceeded(message)
+            self.app.logger.warning(message)
+        return response
+
+
+class RequestMetrics:
+    """زمن كل طلب وعدد ووقت استعلامات SQL ووقت عرض القوالب لكل مسار
+
+    عدد الاستعلامات يأتي من QueryCounter، والمدرجات مشتركة بين عمال gunicorn عبر ملفات لكل pid
+    """
+
+    def __init__(self, app=None):
+        self._store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_DIR', default_directory())
+        app.config.setdefault('METRICS_FLUSH_INTERVAL', 5)
+        # تسجيل الطلبات الأبطأ من هذا الحد (بالمللي ثانية) مع كل استعلاماتها
+        app.config.setdefault('SLOW_REQUEST_MS', None)
+        self.app = app
+        event.listen(Engine, 'before_cursor_execute', self._before_query)
+        event.listen(Engine, 'after_cursor_execute', self._after_query)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    @property
+    def store(self):
+        if self._store is None:
+            store = MetricsStore(self.app.config['METRICS_DIR'], self.app.config['METRICS_FLUSH_INTERVAL'])
+            store.describe('app_request_duration_seconds', 'summary', 'Request latency per endpoint', 1e6)
+            store.describe('app_request_sql_queries', 'summary', 'SQL queries per request', 1)
+            store.describe('app_request_sql_duration_seconds', 'summary', 'Time spent in SQL per request', 1e6)
+            store.describe('app_template_render_seconds', 'summary', 'Jinja render time per template', 1e6)
+            store.describe('app_requests_total', 'counter', 'Requests per endpoint and status')
+            self._store = store
+        return self._store
+
+    @staticmethod
+    def _before_query(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            context._query_start = perf_counter()
+
+    @staticmethod
+    def _after_query(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_query_start', None)
+        if start is None or not has_request_context():
+            return
+        elapsed = perf_counter() - start
+        g.sql_time = g.get('sql_time', 0) + elapsed
+        trace = g.get('sql_trace')
+        if trace is not None:
+            trace.append((elapsed, statement))
+
+    @staticmethod
+    def _before_render(sender, template, context, **extra):
+        g.setdefault('render_starts', []).append(perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        starts = g.get('render_starts')
+        if not starts:
+            return
+        elapsed = perf_counter() - starts.pop()
+        g.render_time = g.get('render_time', 0) + elapsed
+        self.store.observe('app_template_render_seconds', (('template', template.name),), elapsed * 1e6)
+
+    def _start(self):
+        g.request_start = perf_counter()
+        g.sql_time = 0
+        g.render_time = 0
+        if self.app.config['SLOW_REQUEST_MS'] is not None:
+            g.sql_trace = []
+
+    def _finish(self, response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+        # الاستجابات المتدفقة تُقاس حتى إرسال الترويسات فقط
+        elapsed = perf_counter() - start
+        labels = (('endpoint', request.endpoint or 'unmatched'),)
+        store = self.store
+        store.observe('app_request_duration_seconds', labels, elapsed * 1e6)
+        store.observe('app_request_sql_queries', labels, g.get('sql_queries', 0))
+        store.observe('app_request_sql_duration_seconds', labels, g.sql_time * 1e6)
+        store.inc('app_requests_total', labels + (('status', str(response.status_code)),))
+        threshold = self.app.config['SLOW_REQUEST_MS']
+        if threshold is not None and elapsed * 1000 >= threshold:
+            self._log_slow(response, elapsed)
+        store.maybe_flush()
+        return response
+
+    def _log_slow(self, response, elapsed):
+        lines = [
+            f'Slow request {request.method} {request.full_path.rstrip("?")} -> {response.status_code} '
+            f'in {elapsed * 1000:.1f}ms ({g.get("sql_queries", 0)} queries, '
+            f'{g.sql_time * 1000:.1f}ms SQL, {g.render_time * 1000:.1f}ms templates)'
+        ]
+        # القيم المرسلة مع الاستعلام لا تُسجل لأنها قد تحتوي كلمات مرور وبيانات العملاء
+        for duration, statement in g.get('sql_trace', ()):
+            lines.append(f'  {duration * 1000:8.2f}ms  {" ".join(statement.split())}')
+        self.app.logger.warning('\n'.join(lines))
+
+    def render(self):
+        return self.store.render()
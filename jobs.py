@@ -0,0 +1,221 @@
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+logger = logging.getLogger(__name__)
+
+
+class Task:
+    def __init__(self, fn, max_attempts, concurrency, bind):
+        self.fn = fn
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        # المهام الطويلة تستقبل job_id لتسجيل تقدمها عبر report_progress
+        self.bind = bind
+
+
+class JobQueue:
+    """طابور مهام دائم محفوظ في قاعدة البيانات نفسها"""
+
+    def __init__(self, db, model, backoff=10, max_backoff=3600, stale_after=600):
+        self.db = db
+        self.model = model
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # المهام التي بقيت قيد التنفيذ بعد توقف العامل تعود للطابور
+        self.stale_after = stale_after
+        self.tasks = {}
+
+    def task(self, name, max_attempts=5, concurrency=None, bind=False):
+        def decorator(fn):
+            self.tasks[name] = Task(fn, max_attempts, concurrency, bind)
+            return fn
+        return decorator
+
+    def enqueue(self, name, payload=None, key=None, delay=0, commit=True):
+        """إضافة مهمة، ومع مفتاح idempotency لا تتكرر نفس المهمة
+
+        عند commit=False تُحفظ المهمة مع معاملة المستدعي نفسها
+        """
+        Job = self.model
+        if key is not None:
+            existing = Job.query.filter_by(idempotency_key=key).first()
+            if existing is not None:
+                return existing
+        task = self.tasks.get(name)
+        now = datetime.utcnow()
+        job = Job(
+            name=name,
+            payload=json.dumps(payload or {}, ensure_ascii=False),
+            idempotency_key=key,
+            max_attempts=task.max_attempts if task else 5,
+            created_at=now,
+            run_at=now + timedelta(seconds=delay),
+        )
+        self.db.session.add(job)
+        if commit:
+            try:
+                self.db.session.commit()
+            except IntegrityError:
+                self.db.session.rollback()
+                return Job.query.filter_by(idempotency_key=key).first()
+        return job
+
+    def report_progress(self, job_id, data):
+        self.db.session.execute(
+            update(self.model).where(self.model.id == job_id)
+            .values(result=json.dumps(data, ensure_ascii=False)))
+        self.db.session.commit()
+
+    def _requeue_stale(self, now):
+        Job = self.model
+        stale = (Job.status == 'running', Job.started_at < now - timedelta(seconds=self.stale_after))
+        # المحاولة تُحسب عند المطالبة، فالمهمة التي توقف عاملها في كل مرة (مثلاً تسقط العملية)
+        # تفشل بعد max_attempts بدلاً من العودة للطابور إلى الأبد
+        self.db.session.execute(
+            update(Job)
+            .where(*stale, Job.attempts >= Job.max_attempts)
+            .values(status='failed', finished_at=now, last_error='worker stopped while running the job'))
+        self.db.session.execute(
+            update(Job)
+            .where(*stale, Job.attempts < Job.max_attempts)
+            .values(status='queued', run_at=now))
+
+    def _claim(self, job_id, name, now, worker_id):
+        """المطالبة الذرية: ينجح عامل واحد فقط في تغيير الحالة، وحد concurrency ضمن نفس UPDATE"""
+        Job = self.model
+        stmt = (update(Job)
+                .where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', started_at=now, attempts=Job.attempts + 1, worker=worker_id))
+        task = self.tasks.get(name)
+        if task and task.concurrency:
+            if self.db.session.get_bind().dialect.name == 'postgresql':
+                # في READ COMMITTED لا يرى العاملان مطالبة الآخر قبل commit، فننتظر بالترتيب
+                # حتى commit (نهاية المعاملة) ثم يرى التالي العدد الجديد
+                self.db.session.execute(text('SELECT pg_advisory_xact_lock(hashtext(:name))'), {'name': name})
+            running = aliased(Job)
+            stmt = stmt.where(select(func.count(running.id))
+                              .where(running.name == name, running.status == 'running')
+                              .scalar_subquery() < task.concurrency)
+        return self.db.session.execute(stmt).rowcount == 1
+
+    def claim(self, worker_id):
+        Job = self.model
+        now = datetime.utcnow()
+        self._requeue_stale(now)
+        candidates = (self.db.session.query(Job.id, Job.name)
+                      .filter(Job.status == 'queued', Job.run_at <= now)
+                      .order_by(Job.run_at, Job.id)
+                      .limit(20)
+                      .all())
+        # تقدير مسبق لتخطي المهام الممتلئة دون محاولة كتابة، والحد الفعلي يُفحص داخل UPDATE في _claim
+        limited = {c.name for c in candidates if c.name in self.tasks and self.tasks[c.name].concurrency}
+        running = {}
+        if limited:
+            running = dict(self.db.session.query(Job.name, func.count(Job.id))
+                           .filter(Job.status == 'running', Job.name.in_(limited))
+                           .group_by(Job.name)
+                           .all())
+        for job_id, name in candidates:
+            task = self.tasks.get(name)
+            if task and task.concurrency and running.get(name, 0) >= task.concurrency:
+                continue
+            if self._claim(job_id, name, now, worker_id):
+                self.db.session.commit()
+                return self.db.session.get(Job, job_id)
+        self.db.session.commit()
+        return None
+
+    def run_one(self, worker_id):
+        job = self.claim(worker_id)
+        if job is None:
+            return False
+        task = self.tasks.get(job.name)
+        try:
+            if task is None:
+                raise LookupError(f'no task registered for {job.name}')
+            kwargs = json.loads(job.payload or '{}')
+            if task.bind:
+                kwargs['job_id'] = job.id
+            result = task.fn(**kwargs)
+        except Exception as e:
+            self.db.session.rollback()
+            logger.exception('Job %s (%s) failed', job.id, job.name)
+            job = self.db.session.get(self.model, job.id)
+            job.last_error = f'{type(e).__name__}: {e}'
+            if job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+            else:
+                delay = min(self.backoff * 2 ** (job.attempts - 1), self.max_backoff)
+                job.status = 'queued'
+                job.run_at = datetime.utcnow() + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+        else:
+            job = self.db.session.get(self.model, job.id)
+            job.status = 'done'
+            job.finished_at = datetime.utcnow()
+            if result is not None:
+                job.result = json.dumps(result, ensure_ascii=False, default=str)
+        self.db.session.commit()
+        return True
+
+    def run_worker(self, app, poll_interval=1.0, stop=None):
+        """حلقة العامل: تنفذ المهام واحدة تلو الأخرى حتى يتم إيقافها"""
+        stop = stop or threading.Event()
+        worker_id = f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    ran = self.run_one(worker_id)
+                except Exception:
+                    logger.exception('Job worker error')
+                    self.db.session.rollback()
+                    ran = False
+                finally:
+                    self.db.session.remove()
+            if not ran:
+                stop.wait(poll_interval)
+
+    def serve(self, app, threads=1, poll_interval=1.0):
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *args: stop.set())
+        workers = [threading.Thread(target=self.run_worker, args=(app, poll_interval, stop), daemon=True)
+                   for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        while any(worker.is_alive() for worker in workers):
+            for worker in workers:
+                worker.join(timeout=0.5)
+
+    def stats(self):
+        """عمق الطابور لكل حالة وزمن الانتظار"""
+        Job = self.model
+        now = datetime.utcnow()
+        by_status = dict(self.db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        oldest = (self.db.session.query(func.min(Job.run_at))
+                  .filter(Job.status == 'queued', Job.run_at <= now)
+                  .scalar())
+        recent = (self.db.session.query(Job.created_at, Job.started_at, Job.finished_at)
+                  .filter(Job.status == 'done')
+                  .order_by(Job.finished_at.desc())
+                  .limit(100)
+                  .all())
+        waits = [(started - created).total_seconds() for created, started, _ in recent if created and started]
+        runs = [(finished - started).total_seconds() for _, started, finished in recent if started and finished]
+        return {
+            'depth': by_status.get('queued', 0),
+            'by_status': by_status,
+            'oldest_queued_seconds': (now - oldest).total_seconds() if oldest else 0,
+            'avg_wait_seconds': sum(waits) / len(waits) if waits else 0,
+            'avg_run_seconds': sum(runs) / len(runs) if runs else 0,
+        }
@@ -0,0 +1,240 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+
+# كل قوة للعدد 2 مقسمة إلى 16 خانة، أي خطأ نسبي أقصاه حوالي 6%
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+ARCHIVE = 'archive.json'
+
+
+def default_directory():
+    # نفس المجلد الافتراضي في config.INSTANCE_FOLDER، دون استيراد config في عملية gunicorn الرئيسية
+    instance = os.environ.get('INSTANCE_FOLDER') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+    return os.environ.get('METRICS_DIR') or os.path.join(instance, 'metrics')
+
+
+def bucket_index(value):
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def bucket_bounds(index):
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Histogram:
+    """مدرج تكراري على طريقة HDR بقيم صحيحة، ويمكن دمجه بين العمليات"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        value = max(int(value), 0)
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(bucket_bounds(index)[1] - 1, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {'counts': self.counts, 'count': self.count, 'total': self.total, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data['counts'].items()}
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.max = data['max']
+        return histogram
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # الملف حُذف أو استُبدل أثناء القراءة
+        return None
+
+
+def _merge_data(data, histograms, counters):
+    for name, labels, values in data.get('histograms', ()):
+        key = (name, tuple(map(tuple, labels)))
+        histogram = Histogram.from_dict(values)
+        if key in histograms:
+            histograms[key].merge(histogram)
+        else:
+            histograms[key] = histogram
+    for name, labels, value in data.get('counters', ()):
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+
+
+def _dump(histograms, counters):
+    return {
+        'histograms': [[name, labels, h.to_dict()] for (name, labels), h in histograms.items()],
+        'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+    }
+
+
+def collect(directory):
+    """دمج ملفات كل العمال، الأحياء منهم والمنتهين"""
+    histograms, counters = {}, {}
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        data = _read(path)
+        if data:
+            _merge_data(data, histograms, counters)
+    return histograms, counters
+
+
+def mark_process_dead(pid, directory=None):
+    """نقل مقاييس عامل منتهٍ إلى ملف الأرشيف حتى لا تضيع العدادات"""
+    directory = directory or default_directory()
+    path = os.path.join(directory, f'{pid}.json')
+    data = _read(path)
+    if data is None:
+        return
+    archive_path = os.path.join(directory, ARCHIVE)
+    histograms, counters = {}, {}
+    _merge_data(_read(archive_path) or {}, histograms, counters)
+    _merge_data(data, histograms, counters)
+    _write_atomic(archive_path, _dump(histograms, counters))
+    os.remove(path)
+
+
+def clear(directory=None):
+    for path in glob.glob(os.path.join(directory or default_directory(), '*.json')):
+        os.remove(path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+class MetricsStore:
+    """مقاييس العملية الحالية تُكتب دورياً في ملف باسم pid، والقراءة تدمج ملفات كل العمال"""
+
+    def __init__(self, directory, flush_interval=5):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.descriptions = {}
+        self._lock = threading.Lock()
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.histograms = {}
+        self.counters = {}
+        self._last_flush = time.monotonic()
+
+    def _check_pid(self):
+        # بعد fork لا ينقل العامل ما سجلته العملية الأم
+        if self._pid != os.getpid():
+            self._reset()
+
+    def describe(self, name, kind, help, scale=1):
+        self.descriptions[name] = (kind, help, scale)
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            self._check_pid()
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.record(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._check_pid()
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._check_pid()
+            self._last_flush = time.monotonic()
+            if not self.histograms and not self.counters:
+                return
+            data = _dump(self.histograms, self.counters)
+        os.makedirs(self.directory, exist_ok=True)
+        _write_atomic(os.path.join(self.directory, f'{self._pid}.json'), data)
+
+    def render(self):
+        """المقاييس المدمجة لكل العمال بصيغة Prometheus النصية"""
+        self.flush()
+        histograms, counters = collect(self.directory)
+        series = {}
+        for (name, labels), histogram in histograms.items():
+            series.setdefault(name, []).append((labels, histogram))
+        for (name, labels), value in counters.items():
+            series.setdefault(name, []).append((labels, value))
+        lines = []
+        for name in sorted(series):
+            kind, help, scale = self.descriptions.get(name, ('untyped', name, 1))
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(series[name], key=lambda item: item[0]):
+                labels = list(labels)
+                if kind != 'summary':
+                    lines.append(f'{name}{_labels(labels)} {value}')
+                    continue
+                for q in QUANTILES:
+                    lines.append(f'{name}{_labels(labels + [("quantile", q)])} {value.quantile(q) / scale}')
+                lines.append(f'{name}_sum{_labels(labels)} {value.total / scale}')
+                lines.append(f'{name}_count{_labels(labels)} {value.count}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,229 @@
+import importlib
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect, text
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.py$')
+VERSION_TABLE = 'schema_version'
+
+
+def discover():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            module = importlib.import_module(f'migrations.{filename[:-3]}')
+            migrations.append((int(match.group(1)), match.group(2), module))
+    return migrations
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS {VERSION_TABLE} '
+                      '(version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at TIMESTAMP NOT NULL)'))
+
+
+def applied_versions(engine):
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return set(conn.scalars(text(f'SELECT version FROM {VERSION_TABLE}')))
+
+
+def _record(conn, version, name):
+    conn.execute(text(f'INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES (:version, :name, :applied_at)'),
+                 {'version': version, 'name': name, 'applied_at': datetime.utcnow()})
+
+
+def upgrade(engine, target=None, log=print):
+    """تطبيق الترحيلات التي لم تُطبق بعد بالترتيب، دون حذف أي بيانات"""
+    applied = applied_versions(engine)
+    for version, name, module in discover():
+        if version in applied or (target is not None and version > target):
+            continue
+        log(f'Applying {version:04d}_{name}')
+        if getattr(module, 'TRANSACTIONAL', True):
+            with engine.begin() as conn:
+                module.upgrade(conn)
+                _record(conn, version, name)
+        else:
+            # CREATE INDEX CONCURRENTLY في PostgreSQL لا يعمل داخل معاملة
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                module.upgrade(conn)
+                _record(conn, version, name)
+    analyze(engine)
+
+
+def analyze(engine):
+    # بدون إحصاءات حديثة قد يختار المخطط قراءة الجدول كاملاً رغم وجود الفهرس المناسب
+    with engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+
+
+def stamp(engine):
+    """تسجيل كل الترحيلات كمطبقة، بعد create_all الذي ينشئ المخطط الحالي كاملاً"""
+    applied = applied_versions(engine)
+    with engine.begin() as conn:
+        for version, name, module in discover():
+            if version not in applied:
+                _record(conn, version, name)
+
+
+# أدوات تستخدمها ملفات الترحيل
+
+def has_index(conn, table, name):
+    inspector = inspect(conn)
+    names = {index['name'] for index in inspector.get_indexes(table)}
+    names.update(constraint['name'] for constraint in inspector.get_unique_constraints(table))
+    return name in names
+
+
+def create_index(conn, name, table, columns, unique=False):
+    """إنشاء فهرس على جدول يعمل، وفي PostgreSQL بدون قفل الكتابة (CONCURRENTLY)"""
+    if has_index(conn, table, name):
+        return
+    quote = conn.dialect.identifier_preparer.quote
+    concurrently = ' CONCURRENTLY' if conn.dialect.name == 'postgresql' else ''
+    conn.execute(text(
+        f'CREATE {"UNIQUE " if unique else ""}INDEX{concurrently} {quote(name)} '
+        f'ON {quote(table)} ({", ".join(quote(column) for column in columns)})'))
+
+
+def has_column(conn, table, column):
+    return column in {c['name'] for c in inspect(conn).get_columns(table)}
+
+
+# التحقق من أن استعلامات المسارات تستخدم الفهارس
+
+# جداول صغيرة لا يضر قراءتها بالكامل
+SCAN_ALLOWED = {'settings', 'sqlite_master', 'CONSTANT', VERSION_TABLE}
+# الإحصاءات والتصدير بدون فترة زمنية تقرأ الجدول كاملاً عمداً، لذلك نفحصها مع فترة
+CHECK_PATHS = [
+    '/', '/products', '/products?sort=price', '/products?sort=-price', '/products?sort=name',
+    '/api/products', '/product/{product_id}', '/search?q=test', '/api/search?q=test',
+    '/cart', '/checkout', '/admin/orders?from={month_ago}', '/admin/orders?status=pending&from={month_ago}',
+    '/admin/orders/stats?from={month_ago}', '/admin/orders/{order_id}/print', '/admin/messages',
+    '/admin/messages?status=unread', '/admin/messages/poll?since={message_id}',
+    '/admin/export/orders.csv?status=pending&from={month_ago}',
+    '/admin/export/messages.csv?from={month_ago}', '/admin/export/archived_messages.csv?from={month_ago}',
+    '/admin/jobs',
+]
+
+
+def _plan(conn, statement, parameters):
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+        return [row[-1] for row in rows]
+    if conn.dialect.name == 'postgresql':
+        return [row[0] for row in conn.exec_driver_sql(f'EXPLAIN {statement}', parameters).all()]
+    return []
+
+
+def _full_scans(statement, plan):
+    # القراءة بترتيب الفهرس مع LIMIT تتوقف مبكراً، والمشكلة فقط عندما يلزم ترتيب كل الصفوف
+    if ' LIMIT ' in statement and not any('TEMP B-TREE FOR ORDER BY' in line or 'Sort' in line for line in plan):
+        return []
+    return [table for table in map(_full_scan, plan) if table]
+
+
+def _full_scan(line):
+    line = line.strip()
+    if line.startswith('SCAN '):
+        table = line.split()[1]
+        return table if table not in SCAN_ALLOWED and 'USING' not in line and 'VIRTUAL TABLE' not in line else None
+    if 'Seq Scan on ' in line:
+        table = line.split('Seq Scan on ', 1)[1].split()[0].strip('"')
+        return table if table not in SCAN_ALLOWED else None
+    return None
+
+
+def check_indexes(log=print):
+    """تنفيذ طلبات GET لكل مسار مهم ثم EXPLAIN لكل استعلام SELECT نفذه، ويعيد الاستعلامات التي تقرأ جدولاً كاملاً"""
+    from flask import has_request_context, request
+    from sqlalchemy import event
+    from app import app
+    from extensions import page_cache
+    from models import db, ContactMessage, Order, Product, User
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and not executemany and statement.lstrip().upper().startswith('SELECT'):
+            captured.append((request.full_path.rstrip('?'), statement, parameters))
+
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        product_id = db.session.scalar(db.select(Product.id).limit(1)) or 1
+        order_id = db.session.scalar(db.select(Order.id).limit(1)) or 1
+        # الاستطلاع يطلب عادة الرسائل الأحدث من آخر ما لدى الواجهة
+        message_id = max((db.session.scalar(db.select(db.func.max(ContactMessage.id))) or 0) - 10, 0)
+    month_ago = (datetime.utcnow() - timedelta(days=30)).date().isoformat()
+    client = app.test_client()
+    engine = _engine(app, db)
+    # الجولة الأولى للتسخين فقط، مثل بناء فهرس البحث عند أول استخدام
+    for capturing in (False, True):
+        page_cache.clear()
+        if capturing:
+            event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            for path in CHECK_PATHS:
+                path = path.format(product_id=product_id, order_id=order_id, message_id=message_id,
+                                   month_ago=month_ago)
+                if path.startswith('/admin') or path in ('/cart', '/checkout'):
+                    if admin is None:
+                        continue
+                    with client.session_transaction() as session:
+                        session['_user_id'] = str(admin.id)
+                        session['_fresh'] = True
+                client.get(path).close()
+        finally:
+            if capturing:
+                event.remove(engine, 'before_cursor_execute', capture)
+
+    analyze(engine)
+    problems = []
+    with engine.connect() as conn:
+        for path, statement, parameters in captured:
+            plan = _plan(conn, statement, parameters)
+            tables = _full_scans(statement, plan)
+            if tables:
+                problems.append((path, statement, plan))
+                log(f'{path}: full scan of {", ".join(tables)}')
+                log(f'    {" ".join(statement.split())}')
+                for line in plan:
+                    log(f'      {line}')
+    log(f'{len(captured)} queries checked, {len(problems)} without an index')
+    return problems
+
+
+def _engine(app, db):
+    with app.app_context():
+        return db.engine
+
+
+def main(argv):
+    command = argv[0] if argv else 'upgrade'
+    # الأوامر غير check لا تحتاج المسارات، فيكفي تطبيق قاعدة البيانات
+    from factory import create_cli_app
+    from models import db
+    engine = _engine(create_cli_app(), db)
+    if command == 'upgrade':
+        upgrade(engine, int(argv[1]) if len(argv) > 1 else None)
+    elif command == 'stamp':
+        stamp(engine)
+    elif command == 'status':
+        applied = applied_versions(engine)
+        for version, name, module in discover():
+            print(f'{"x" if version in applied else " "} {version:04d}_{name}')
+    elif command == 'check':
+        return 1 if check_indexes() else 0
+    else:
+        print('usage: python migrate.py [upgrade [version] | stamp | status | check]')
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+from sqlalchemy import (Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text)
+
+# المخطط كما كان قبل نظام الترحيلات، مجمداً هنا ولا يتغير مع النماذج في models.py
+# كل تغيير لاحق (أعمدة، فهارس، جداول جديدة) له ملف ترحيل خاص به
+metadata = MetaData()
+
+Table(
+    'user', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(80), unique=True, nullable=False),
+    Column('password', String(120), nullable=False),
+    Column('is_admin', Boolean),
+)
+
+Table(
+    'product', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('description', Text),
+    Column('price', Float, nullable=False),
+    Column('image_url', String(200)),
+)
+
+Table(
+    'cart_item', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('user.id')),
+    Column('product_id', Integer, ForeignKey('product.id')),
+    Column('quantity', Integer),
+)
+
+Table(
+    'settings', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('background_image', String(200)),
+    Column('primary_color', String(20)),
+    Column('secondary_color', String(20)),
+    Column('accent_color', String(20)),
+    Column('text_color', String(20)),
+    Column('header_text', String(200)),
+    Column('header_description', String(500)),
+    Column('phone1', String(20)),
+    Column('phone2', String(20)),
+    Column('whatsapp', String(20)),
+    Column('email', String(100)),
+    Column('address', Text),
+    Column('location_url', String(500)),
+    Column('facebook_url', String(200)),
+    Column('instagram_url', String(200)),
+    Column('twitter_url', String(200)),
+    Column('about_title', String(200)),
+    Column('about_description', Text),
+    Column('about_services', Text),
+)
+
+Table(
+    'order', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('user.id')),
+    Column('full_name', String(100)),
+    Column('address', Text),
+    Column('phone', String(20)),
+    Column('total', Float),
+    Column('status', String(20)),
+    Column('date_created', DateTime),
+)
+
+Table(
+    'order_item', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('order_id', Integer, ForeignKey('order.id')),
+    Column('product_id', Integer, ForeignKey('product.id')),
+    Column('quantity', Integer),
+    Column('price', Float),
+)
+
+Table(
+    'contact_message', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('email', String(120), nullable=False),
+    Column('phone', String(20)),
+    Column('message', Text, nullable=False),
+    Column('date_sent', DateTime),
+    Column('status', String(20)),
+)
+
+Table(
+    'job', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('payload', Text),
+    Column('status', String(20), nullable=False),
+    Column('attempts', Integer, nullable=False),
+    Column('max_attempts', Integer, nullable=False),
+    Column('idempotency_key', String(200), unique=True),
+    Column('worker', String(200)),
+    Column('result', Text),
+    Column('last_error', Text),
+    Column('created_at', DateTime),
+    Column('run_at', DateTime),
+    Column('started_at', DateTime),
+    Column('finished_at', DateTime),
+)
+
+
+def upgrade(conn):
+    # قاعدة بيانات جديدة أو قديمة بدون جدول الإصدارات: إنشاء الجداول الناقصة فقط دون لمس الموجود
+    metadata.create_all(conn)
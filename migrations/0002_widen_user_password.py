@@ -0,0 +1,6 @@
+def upgrade(conn):
+    # تجزئة scrypt أطول من 120 حرفاً، و SQLite لا يفرض طول VARCHAR أصلاً
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql('ALTER TABLE "user" ALTER COLUMN password TYPE VARCHAR(255)')
+    elif conn.dialect.name == 'mysql':
+        conn.exec_driver_sql('ALTER TABLE `user` MODIFY password VARCHAR(255) NOT NULL')
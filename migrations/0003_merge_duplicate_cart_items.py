@@ -0,0 +1,19 @@
+from sqlalchemy import text
+
+NOT_NULL = 'user_id IS NOT NULL AND product_id IS NOT NULL'
+
+
+def upgrade(conn):
+    # دمج الأسطر المكررة لنفس المنتج في نفس السلة قبل إضافة القيد الفريد
+    conn.execute(text(
+        'UPDATE cart_item SET quantity = ('
+        '  SELECT SUM(other.quantity) FROM cart_item other'
+        '  WHERE other.user_id = cart_item.user_id AND other.product_id = cart_item.product_id'
+        ') WHERE id IN ('
+        f'  SELECT MIN(id) FROM cart_item WHERE {NOT_NULL}'
+        '  GROUP BY user_id, product_id HAVING COUNT(*) > 1'
+        ')'))
+    conn.execute(text(
+        f'DELETE FROM cart_item WHERE {NOT_NULL} AND id NOT IN ('
+        f'  SELECT MIN(id) FROM cart_item WHERE {NOT_NULL} GROUP BY user_id, product_id'
+        ')'))
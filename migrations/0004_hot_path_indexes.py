@@ -0,0 +1,23 @@
+from migrate import create_index
+
+# CREATE INDEX CONCURRENTLY لا يعمل داخل معاملة
+TRANSACTIONAL = False
+
+INDEXES = [
+    ('uq_cart_item_user_product', 'cart_item', ['user_id', 'product_id'], True),
+    ('ix_cart_item_product_id', 'cart_item', ['product_id'], False),
+    ('ix_order_item_order_id', 'order_item', ['order_id'], False),
+    ('ix_order_user_id', 'order', ['user_id'], False),
+    ('ix_order_date_created_id', 'order', ['date_created', 'id'], False),
+    ('ix_order_status_date_created_id', 'order', ['status', 'date_created', 'id'], False),
+    ('ix_contact_message_date_sent_id', 'contact_message', ['date_sent', 'id'], False),
+    ('ix_contact_message_status_date_sent_id', 'contact_message', ['status', 'date_sent', 'id'], False),
+    ('ix_product_price_id', 'product', ['price', 'id'], False),
+    ('ix_product_name_id', 'product', ['name', 'id'], False),
+    ('ix_job_status_run_at', 'job', ['status', 'run_at'], False),
+]
+
+
+def upgrade(conn):
+    for name, table, columns, unique in INDEXES:
+        create_index(conn, name, table, columns, unique)
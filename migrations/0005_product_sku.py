@@ -0,0 +1,11 @@
+from migrate import create_index, has_column
+
+# CREATE INDEX CONCURRENTLY لا يعمل داخل معاملة
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    # رمز المنتج (SKU) هو مفتاح الاستيراد الجماعي، وقيمته فارغة للمنتجات الحالية
+    if not has_column(conn, 'product', 'sku'):
+        conn.exec_driver_sql('ALTER TABLE product ADD COLUMN sku VARCHAR(64)')
+    create_index(conn, 'uq_product_sku', 'product', ['sku'], unique=True)
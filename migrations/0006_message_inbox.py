@@ -0,0 +1,32 @@
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, text
+
+# تعريف الجدولين كما كانا عند هذا الترحيل، ولا يتغير مع النماذج في models.py
+metadata = MetaData()
+
+Table(
+    'contact_message_archive', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('email', String(120), nullable=False),
+    Column('phone', String(20)),
+    Column('message', Text, nullable=False),
+    Column('date_sent', DateTime),
+    Column('status', String(20)),
+    Column('archived_at', DateTime),
+    Index('ix_contact_message_archive_date_sent_id', 'date_sent', 'id'),
+)
+
+Table(
+    'message_counter', metadata,
+    Column('name', String(20), primary_key=True),
+    Column('value', Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn)
+    # العداد يبدأ من الحالة الحالية للجدول
+    conn.execute(text("DELETE FROM message_counter WHERE name = 'unread'"))
+    conn.execute(text(
+        "INSERT INTO message_counter (name, value) "
+        "SELECT 'unread', COUNT(*) FROM contact_message WHERE status = 'unread'"))
@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+# SQLite يحفظ DateTime كنص، و CURRENT_TIMESTAMP القديم كتب القيم بلا أجزاء الثانية
+# ('2024-01-01 10:00:00') بينما تُربط قيم مؤشر التصفح بصيغة '2024-01-01 10:00:00.000000'
+# فتفشل المقارنة النصية عند الحدود. نكمل القيم القديمة إلى نفس صيغة SQLAlchemy
+COLUMNS = (
+    ('contact_message', 'date_sent'),
+    ('contact_message_archive', 'date_sent'),
+    ('contact_message_archive', 'archived_at'),
+)
+
+
+def upgrade(conn):
+    # في PostgreSQL العمود من نوع timestamp ولا مشكلة في الصيغة
+    if conn.dialect.name != 'sqlite':
+        return
+    for table, column in COLUMNS:
+        conn.execute(text(
+            f"UPDATE {table} SET {column} = {column} || '.000000' "
+            f"WHERE length({column}) = 19"))
@@ -0,0 +1,11 @@
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    # الطلبات القديمة كُتبت بـ CURRENT_TIMESTAMP بلا أجزاء الثانية، فتتكرر طلبات الحد بين الصفحات
+    # لأن المقارنة في SQLite نصية. نكملها إلى صيغة SQLAlchemy كما في 0007
+    if conn.dialect.name != 'sqlite':
+        return
+    conn.execute(text(
+        'UPDATE "order" SET date_created = date_created || \'.000000\' '
+        'WHERE length(date_created) = 19'))
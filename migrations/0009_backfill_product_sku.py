@@ -0,0 +1,12 @@
+import uuid
+
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    # المنتجات المضافة من لوحة التحكم قبل توليد الرمز تلقائياً بقيت بدون sku
+    # فلا يمكن تعديلها بإعادة استيراد ملف التصدير. نفس صيغة catalog.new_sku
+    ids = conn.execute(text("SELECT id FROM product WHERE sku IS NULL OR sku = ''")).scalars().all()
+    if ids:
+        conn.execute(text('UPDATE product SET sku = :sku WHERE id = :id'),
+                     [{'id': product_id, 'sku': f'P-{uuid.uuid4().hex[:12].upper()}'} for product_id in ids])
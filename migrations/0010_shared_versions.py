@@ -0,0 +1,26 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, LargeBinary, MetaData, String, Table, text
+
+# تعريف الجدولين كما كانا عند هذا الترحيل، ولا يتغير مع النماذج في models.py
+metadata = MetaData()
+
+Table(
+    'data_version', metadata,
+    Column('name', String(20), primary_key=True),
+    Column('value', BigInteger, nullable=False),
+)
+
+Table(
+    'catalog_upload', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('fmt', String(10), nullable=False),
+    Column('data', LargeBinary, nullable=False),
+    Column('created_at', DateTime),
+)
+
+
+def upgrade(conn):
+    # أختام الإصدار وملفات الاستيراد في قاعدة البيانات حتى تعمل عمليات الويب والعامل على dynos منفصلة
+    metadata.create_all(conn)
+    for name in ('catalog', 'settings', 'users'):
+        conn.execute(text('INSERT INTO data_version (name, value) SELECT :name, 0 WHERE NOT EXISTS '
+                          '(SELECT 1 FROM data_version WHERE name = :name)'), {'name': name})
@@ -0,0 +1,274 @@
+import os
+from datetime import datetime
+from itertools import chain
+
+from flask import has_app_context
+from flask_login import UserMixin
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from cache import SnapshotCache, VersionStamp
+from catalog import new_sku
+from config import INSTANCE_FOLDER, VERSION_POLL_INTERVAL
+from database import RoutingSession, primary_reads
+
+# النماذج بدون تطبيق Flask: التطبيق أو سكربتات الإدارة تربط db بنفسها عبر init_app
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    is_admin = db.Column(db.Boolean, default=False)
+
+class Product(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    price = db.Column(db.Float, nullable=False)
+    image_url = db.Column(db.String(200))
+    # رمز المنتج الذي يربط صفوف ملفات الاستيراد بالمنتجات الحالية (catalog.SKU_LENGTH)
+    # ويُولد تلقائياً للمنتجات المضافة بدون رمز
+    sku = db.Column(db.String(64), default=new_sku)
+
+    # فهارس الترتيب حسب السعر والاسم مع المعرف لدعم التصفح بطريقة keyset
+    __table_args__ = (
+        db.Index('ix_product_price_id', 'price', 'id'),
+        db.Index('ix_product_name_id', 'name', 'id'),
+        db.Index('uq_product_sku', 'sku', unique=True),
+    )
+
+class CartItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'))
+    quantity = db.Column(db.Integer, default=1)
+    # إضافة العلاقة مع المنتج
+    product = db.relationship('Product', backref=db.backref('cart_items', lazy=True))
+
+    # سطر واحد فقط لكل منتج في سلة المستخدم، والقيد يغني عن فهرس منفصل لـ user_id
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='uq_cart_item_user_product'),
+        db.Index('ix_cart_item_product_id', 'product_id'),
+    )
+
+class Settings(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    background_image = db.Column(db.String(200), default='/static/images/default-background.jpg')
+    primary_color = db.Column(db.String(20), default='#139694')
+    secondary_color = db.Column(db.String(20), default='#ffffff')
+    accent_color = db.Column(db.String(20), default='#ff0000')
+    text_color = db.Column(db.String(20), default='#333333')
+    header_text = db.Column(db.String(200), default='شركة عالم البلاستك')
+    header_description = db.Column(db.String(500), default='نقدم أفضل المنتجات البلاستيكية والورقية بجودة عالية')
+    # معلومات التواصل
+    phone1 = db.Column(db.String(20), default='+965 1234 5678')
+    phone2 = db.Column(db.String(20), default='+965 8765 4321')
+    whatsapp = db.Column(db.String(20), default='+965 1234 5678')
+    email = db.Column(db.String(100), default='info@example.com')
+    address = db.Column(db.Text, default='الكويت - شارع ...')
+    location_url = db.Column(db.String(500), default='https://goo.gl/maps/youraddress')
+    facebook_url = db.Column(db.String(200), default='https://facebook.com/yourpage')
+    instagram_url = db.Column(db.String(200), default='https://instagram.com/yourpage')
+    twitter_url = db.Column(db.String(200), default='https://twitter.com/yourpage')
+    # إضافة حقول صفحة من نحن
+    about_title = db.Column(db.String(200), default='من نحن')
+    about_description = db.Column(db.Text, default='شركة عالم البلاستك هي شركة رائدة في مجال توريد المنتجات البلاستيكية والورقية في الكويت')
+    about_services = db.Column(db.Text, default='توريد منتجات بلاستيكية عالية الجودة\nتوفير منتجات ورقية متنوعة\nخدمة توصيل سريعة وموثوقة\nأسعار تنافسية')
+
+class OrderItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'))
+    quantity = db.Column(db.Integer)
+    price = db.Column(db.Float)
+    product = db.relationship('Product')
+    # إضافة المجموع الكلي للمنتج
+    @property
+    def total(self):
+        return self.quantity * self.price
+
+class Order(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+    full_name = db.Column(db.String(100))
+    address = db.Column(db.Text)
+    phone = db.Column(db.String(20))
+    total = db.Column(db.Float)
+    status = db.Column(db.String(20), default='pending')  # pending, completed, cancelled
+    # القيمة من بايثون حتى يكون تنسيق التاريخ ثابتاً عند المقارنة في التصفح بطريقة keyset
+    date_created = db.Column(db.DateTime, default=datetime.utcnow)
+    user = db.relationship('User', backref=db.backref('orders', lazy=True))
+    items = db.relationship('OrderItem', backref='order', lazy=True)
+
+    # فهارس لوحة الطلبات: الترتيب بالتاريخ والتصفية بالحالة
+    __table_args__ = (
+        db.Index('ix_order_date_created_id', 'date_created', 'id'),
+        db.Index('ix_order_status_date_created_id', 'status', 'date_created', 'id'),
+    )
+
+    @property
+    def items_list(self):
+        return [{'name': item.product.name,
+                'quantity': item.quantity,
+                'price': item.price} for item in self.items]
+
+class ContactMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(20))
+    message = db.Column(db.Text, nullable=False)
+    # القيمة من بايثون كما في Order.date_created: CURRENT_TIMESTAMP في SQLite بلا أجزاء الثانية
+    # فلا تطابق قيم مؤشر التصفح ولا يتجاوز الصندوق الصفحة الأولى
+    date_sent = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.String(20), default='unread')  # unread, read, archived
+
+    __table_args__ = (
+        db.Index('ix_contact_message_date_sent_id', 'date_sent', 'id'),
+        db.Index('ix_contact_message_status_date_sent_id', 'status', 'date_sent', 'id'),
+    )
+
+class ArchivedMessage(db.Model):
+    # الرسائل المؤرشفة تُنقل هنا في الخلفية حتى يبقى جدول الصندوق صغيراً
+    __tablename__ = 'contact_message_archive'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(20))
+    message = db.Column(db.Text, nullable=False)
+    date_sent = db.Column(db.DateTime)
+    status = db.Column(db.String(20))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_contact_message_archive_date_sent_id', 'date_sent', 'id'),
+    )
+
+class MessageCounter(db.Model):
+    # عداد غير المقروء يُحدث مع كل رسالة وكل تغيير حالة بدلاً من count(*)
+    name = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    idempotency_key = db.Column(db.String(200), unique=True)
+    worker = db.Column(db.String(200))
+    result = db.Column(db.Text)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    # العامل يبحث عن المهام الجاهزة حسب الحالة ووقت التنفيذ
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+class CatalogUpload(db.Model):
+    # ملف الاستيراد المرفوع: عملية الويب وعامل المهام قد يعملان على أقراص منفصلة (dynos في Heroku)
+    id = db.Column(db.Integer, primary_key=True)
+    fmt = db.Column(db.String(10), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DataVersion(db.Model):
+    # آخر إصدار لكل ختم (catalog و settings و users) مشترك بين كل الـ dynos
+    name = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+class SharedVersion:
+    """صف DataVersion لختم واحد، يُقرأ ويُكتب باتصال منفصل عن جلسة الطلب"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def get(self):
+        # خارج التطبيق (سكربتات بدون قاعدة بيانات) يبقى ملف الختم وحده
+        if not has_app_context():
+            return None
+        table = DataVersion.__table__
+        # استعلام داخلي لا يُحسب ضمن حد استعلامات المسار الحالي
+        with db.engine.connect() as conn:
+            return conn.execution_options(count_queries=False).scalar(
+                select(table.c.value).where(table.c.name == self.name))
+
+    def set(self, version):
+        if not has_app_context():
+            return
+        table = DataVersion.__table__
+        newer = update(table).where(table.c.name == self.name, table.c.value < version).values(value=version)
+        with db.engine.begin() as conn:
+            conn = conn.execution_options(count_queries=False)
+            if conn.execute(newer).rowcount or conn.scalar(
+                    select(table.c.name).where(table.c.name == self.name)) is not None:
+                return
+        # أول تحديث لهذا الختم في قاعدة بيانات أنشأها create_all بدون الترحيل
+        try:
+            with db.engine.begin() as conn:
+                conn.execution_options(count_queries=False).execute(
+                    insert(table).values(name=self.name, value=version))
+        except IntegrityError:
+            # أضافته عملية أخرى في نفس اللحظة
+            with db.engine.begin() as conn:
+                conn.execution_options(count_queries=False).execute(newer)
+
+def _stamp(name):
+    return VersionStamp(os.path.join(INSTANCE_FOLDER, f'{name}.version'), SharedVersion(name), VERSION_POLL_INTERVAL)
+
+# أختام الإصدار المشتركة بين العمال: الكتالوج والإعدادات وهويات المستخدمين
+catalog_stamp = _stamp('catalog')
+settings_stamp = _stamp('settings')
+users_stamp = _stamp('users')
+
+def load_settings():
+    # قراءة فقط: إذا لم يوجد صف نستخدم القيم الافتراضية دون الكتابة في قاعدة البيانات
+    with primary_reads(db.session):
+        settings = Settings.query.first()
+    values = {}
+    for column in Settings.__table__.columns:
+        if settings is not None:
+            values[column.name] = getattr(settings, column.name)
+        elif column.default is not None and column.default.is_scalar:
+            values[column.name] = column.default.arg
+        else:
+            values[column.name] = None
+    return values
+
+# نسخة الإعدادات المخزنة في كل عامل، يتم تحديثها عند تغير ملف الإصدار
+settings_cache = SnapshotCache(load_settings, settings_stamp)
+
+# تحديث أختام الإصدار تلقائياً عند حفظ تغييرات على المنتجات أو الإعدادات
+# ملاحظة: جمل SQL المباشرة (bulk update/insert) لا تمر بهذه الأحداث
+@event.listens_for(Session, 'after_flush')
+def track_data_changes(db_session, flush_context):
+    for obj in chain(db_session.new, db_session.dirty, db_session.deleted):
+        if isinstance(obj, Product):
+            db_session.info['catalog_changed'] = True
+        elif isinstance(obj, Settings):
+            db_session.info['settings_changed'] = True
+        elif isinstance(obj, User):
+            db_session.info['users_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def bump_data_versions(db_session):
+    if db_session.info.pop('catalog_changed', False):
+        catalog_stamp.bump()
+    if db_session.info.pop('settings_changed', False):
+        settings_cache.invalidate()
+    if db_session.info.pop('users_changed', False):
+        users_stamp.bump()
+
+@event.listens_for(Session, 'after_rollback')
+def discard_data_changes(db_session):
+    db_session.info.pop('catalog_changed', None)
+    db_session.info.pop('settings_changed', None)
+    db_session.info.pop('users_changed', None)
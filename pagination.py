@@ -0,0 +1,155 @@
+import base64
+import json
+import math
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(tag, values):
+    payload = [tag] + [{'$dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+# أرقام المؤشر تُرسل إلى قاعدة البيانات كما هي، وأكبر من 64 بت تسبب OverflowError بدلاً من 400
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _cursor_value(column, value):
+    """قيمة واحدة من المؤشر بعد التحقق من أنها من نوع عمود الترتيب"""
+    expected = _python_type(column)
+    if expected is datetime:
+        if not isinstance(value, dict):
+            raise ValueError('invalid cursor')
+        try:
+            return datetime.fromisoformat(value['$dt'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('invalid cursor') from None
+    # bool نوع فرعي من int في بايثون، ولا يصلح كقيمة لأي عمود ترتيب
+    if isinstance(value, bool):
+        raise ValueError('invalid cursor')
+    if expected is int:
+        if not isinstance(value, int) or not INT64_MIN <= value <= INT64_MAX:
+            raise ValueError('invalid cursor')
+    elif expected is float:
+        try:
+            if not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError('invalid cursor')
+        except OverflowError:
+            raise ValueError('invalid cursor') from None
+    elif expected is str:
+        if not isinstance(value, str):
+            raise ValueError('invalid cursor')
+    elif not isinstance(value, (int, float, str)):
+        raise ValueError('invalid cursor')
+    return value
+
+
+def decode_cursor(tag, token, columns):
+    """فك رمز المؤشر والتحقق من أنه يخص نفس الترتيب وأن قيمه من أنواع أعمدة الترتيب"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('invalid cursor') from None
+    if not isinstance(payload, list) or len(payload) != len(columns) + 1 or payload[0] != tag:
+        raise ValueError('invalid cursor')
+    return [_cursor_value(column, value) for column, value in zip(columns, payload[1:])]
+
+
+class KeysetPage:
+    """صفحة نتائج بطريقة keyset، لا يتم تنفيذ الاستعلام إلا عند أول استخدام"""
+
+    def __init__(self, query, columns, cursor=None, per_page=20, descending=False, tag='id'):
+        self.query = query
+        self.columns = columns
+        self.per_page = per_page
+        self.descending = descending
+        self.tag = tag
+        self.cursor = cursor
+        # نتحقق من المؤشر مبكراً حتى يظهر الخطأ في المسار وليس أثناء عرض القالب
+        self._after = decode_cursor(tag, cursor, columns) if cursor else None
+        self._items = None
+        self._has_next = False
+
+    def _fetch(self):
+        if self._items is not None:
+            return self._items
+        query = self.query
+        if self._after is not None:
+            key = tuple_(*self.columns)
+            after = tuple_(*self._after)
+            query = query.filter(key < after if self.descending else key > after)
+        order = [c.desc() if self.descending else c.asc() for c in self.columns]
+        rows = query.order_by(*order).limit(self.per_page + 1).all()
+        self._has_next = len(rows) > self.per_page
+        self._items = rows[:self.per_page]
+        return self._items
+
+    @property
+    def items(self):
+        return self._fetch()
+
+    @property
+    def has_next(self):
+        self._fetch()
+        return self._has_next
+
+    @property
+    def next_cursor(self):
+        items = self._fetch()
+        if not self._has_next:
+            return None
+        last = items[-1]
+        return encode_cursor(self.tag, [getattr(last, c.key) for c in self.columns])
+
+    def __iter__(self):
+        return iter(self._fetch())
+
+    def __len__(self):
+        return len(self._fetch())
+
+    def __bool__(self):
+        return bool(self._fetch())
+
+
+class ResolvedPage:
+    """صفحة keyset تجلب المعرفات فقط، ثم تحولها إلى عناصر عبر resolve({id: item})"""
+
+    def __init__(self, page, resolve):
+        self.page = page
+        self.resolve = resolve
+        self._items = None
+
+    @property
+    def items(self):
+        if self._items is None:
+            rows = self.page.items
+            found = self.resolve([row.id for row in rows])
+            self._items = [found[row.id] for row in rows if row.id in found]
+        return self._items
+
+    @property
+    def has_next(self):
+        return self.page.has_next
+
+    @property
+    def next_cursor(self):
+        return self.page.next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
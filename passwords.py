@@ -0,0 +1,86 @@
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from concurrency import is_cooperative, run_in_real_thread
+
+# الصيغ التي تنتجها werkzeug، وأي قيمة أخرى تعتبر كلمة مرور قديمة غير مشفرة
+HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """تجزئة كلمات المرور في مجموعة خيوط محدودة مع حد لعدد العمليات المنتظرة"""
+
+    def __init__(self, method='scrypt:32768:8:1', max_workers=2, max_pending=8, timeout=5):
+        self.method = method
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._dummy = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(method=config.PASSWORD_HASH_METHOD, max_workers=config.PASSWORD_HASH_THREADS,
+                   max_pending=config.PASSWORD_HASH_MAX_PENDING)
+
+    @property
+    def executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='passwords')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        # عند امتلاء الطابور نرفض الطلب بدلاً من تكديس العمل على المعالج
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HasherBusy()
+        try:
+            if is_cooperative():
+                return run_in_real_thread(fn, *args)
+            return self.executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    @property
+    def dummy_hash(self):
+        # تجزئة لكلمة مرور عشوائية بنفس الطريقة والتكلفة، تُحسب مرة واحدة عند أول حاجة
+        if self._dummy is None:
+            self._dummy = self.hash(os.urandom(16).hex())
+        return self._dummy
+
+    def needs_rehash(self, stored):
+        # werkzeug تكمل الطريقة بقيمها الافتراضية ('scrypt' تُكتب 'scrypt:32768:8:1')
+        # فنقارن ببادئة تجزئة حقيقية وليس بالنص في الإعدادات، وإلا أُعيدت التجزئة مع كل دخول
+        return stored.split('$', 1)[0] != self.dummy_hash.split('$', 1)[0]
+
+    def verify(self, stored, password):
+        """يعيد (صحيحة، تحتاج إعادة تجزئة)
+
+        stored=None لمستخدم غير موجود: نحسب تجزئة وهمية بنفس التكلفة حتى لا يكشف
+        زمن الاستجابة أسماء المستخدمين الموجودة
+        """
+        if not stored:
+            self._run(check_password_hash, self.dummy_hash, password or '')
+            return False, False
+        if password is None:
+            return False, False
+        if not stored.startswith(HASH_PREFIXES):
+            ok = hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+            return ok, ok
+        ok = self._run(check_password_hash, stored, password)
+        return ok, ok and self.needs_rehash(stored)
@@ -0,0 +1,141 @@
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+try:
+    import fcntl
+except ImportError:  # بدون fcntl (ويندوز) قد تبني عمليتان الملف في نفس الوقت، والنتيجة واحدة
+    fcntl = None
+
+ProductRecord = namedtuple('ProductRecord', 'id name price image_url')
+
+# ترويسة الملف: المعرّف، رقم إصدار الكتالوج، عدد المنتجات
+MAGIC = b'PRODTBL1'
+HEADER = struct.Struct('<8sqQ')
+
+
+def write_table(path, version, rows):
+    """كتابة الجدول من صفوف (id, name, price, image_url) مرتبة حسب id
+
+    الشكل: مصفوفة المعرفات ثم الأسعار ثم مواضع النصوص ثم النصوص نفسها بترميز UTF-8،
+    ولكل منتج نصان (الاسم والصورة) فعدد المواضع 2 * count + 1
+    """
+    ids = array('q')
+    prices = array('d')
+    offsets = array('I', [0])
+    blob = bytearray()
+    for product_id, name, price, image_url in rows:
+        ids.append(product_id)
+        prices.append(price)
+        for value in (name, image_url):
+            blob += (value or '').encode('utf-8')
+            offsets.append(len(blob))
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, version, len(ids)))
+        ids.tofile(f)
+        prices.tofile(f)
+        offsets.tofile(f)
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class _Mapping:
+    """عرض للملف بدون نسخ: المصفوفات تقرأ من صفحات الذاكرة المشتركة بين العمليات مباشرة"""
+
+    def __init__(self, mm):
+        magic, self.version, self.count = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            raise ValueError('not a product table')
+        self.mm = mm
+        view = memoryview(mm)
+        position = HEADER.size
+        self.ids = view[position:position + 8 * self.count].cast('q')
+        position += 8 * self.count
+        self.prices = view[position:position + 8 * self.count].cast('d')
+        position += 8 * self.count
+        self.offsets = view[position:position + 4 * (2 * self.count + 1)].cast('I')
+        position += 4 * (2 * self.count + 1)
+        self.blob = view[position:]
+
+    @classmethod
+    def open(cls, path):
+        try:
+            with open(path, 'rb') as f:
+                return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def _text(self, field):
+        start, end = self.offsets[field], self.offsets[field + 1]
+        return str(self.blob[start:end], 'utf-8')
+
+    def get(self, product_id):
+        index = bisect_left(self.ids, product_id)
+        if index == self.count or self.ids[index] != product_id:
+            return None
+        return ProductRecord(product_id, self._text(2 * index), self.prices[index],
+                             self._text(2 * index + 1) or None)
+
+
+class ProductTable:
+    """أسماء وأسعار وصور المنتجات في ملف واحد تقرؤه كل عمليات gunicorn عبر mmap
+
+    يُعاد بناء الملف عند تغير ختم إصدار الكتالوج، وتبنيه أول عملية تلاحظ التغيير
+    """
+
+    def __init__(self, path, stamp, loader):
+        self.path = path
+        self.stamp = stamp
+        # دالة تعيد صفوف (id, name, price, image_url) مرتبة حسب id
+        self.loader = loader
+        self._mapping = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        version = self.stamp.read()
+        mapping = self._mapping
+        # ملف أحدث من الختم الذي قرأناه مقبول، فقد بنته عملية أخرى بعد تعديل جديد
+        if mapping is None or mapping.version < version:
+            with self._lock:
+                mapping = self._mapping
+                if mapping is None or mapping.version < version:
+                    mapping = self._open(version)
+                    self._mapping = mapping
+        return mapping
+
+    def _open(self, version):
+        mapping = _Mapping.open(self.path)
+        if mapping is not None and mapping.version >= version:
+            return mapping
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f'{self.path}.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # ربما بنته عملية أخرى أثناء الانتظار
+            mapping = _Mapping.open(self.path)
+            if mapping is None or mapping.version < version:
+                # نقرأ الإصدار قبل البيانات، فأي تعديل أثناء البناء يؤدي إلى بناء جديد
+                write_table(self.path, version, self.loader())
+                mapping = _Mapping.open(self.path)
+        return mapping
+
+    def get(self, product_id):
+        return self._current().get(product_id)
+
+    def get_many(self, product_ids):
+        mapping = self._current()
+        records = {}
+        for product_id in product_ids:
+            record = mapping.get(product_id)
+            if record is not None:
+                records[product_id] = record
+        return records
+
+    def stats(self):
+        mapping = self._current()
+        return {'version': mapping.version, 'products': mapping.count, 'bytes': len(mapping.mm)}
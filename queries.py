@@ -0,0 +1,188 @@
+from datetime import datetime, time, timedelta
+from importlib import import_module
+
+from flask import abort, current_app, request
+from sqlalchemy import case, delete, desc, func, insert, literal, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from extensions import RECORD_COLUMNS, job_queue, product_search, product_table
+from models import db, CartItem, Order, OrderItem, Product, catalog_stamp
+from pagination import KeysetPage, ResolvedPage
+from product_table import ProductRecord
+
+def catalog_changed():
+    # إعادة الفهرسة أولاً حتى لا تُخزن صفحات بحث قديمة تحت الإصدار الجديد
+    product_search.reindex()
+    catalog_stamp.bump()
+
+def product_records(product_ids):
+    records = product_table.get_many(product_ids)
+    # منتج أضيف للتو قبل إعادة بناء الملف، أو منتج محذوف
+    missing = [product_id for product_id in product_ids if product_id not in records]
+    if missing:
+        rows = db.session.execute(select(*RECORD_COLUMNS).where(Product.id.in_(missing)))
+        records.update((row.id, ProductRecord(*row)) for row in rows)
+    return records
+
+# الترتيبات المسموحة لقائمة المنتجات
+PRODUCT_SORTS = {
+    'id': (Product.id,),
+    'price': (Product.price, Product.id),
+    'name': (Product.name, Product.id),
+}
+
+def product_page(query=None, records=False):
+    # ?sort=price أو ?sort=-price للترتيب التنازلي و ?cursor= للصفحة التالية
+    sort = request.args.get('sort', 'id')
+    descending = sort.startswith('-')
+    columns = PRODUCT_SORTS.get(sort.lstrip('-'))
+    if columns is None:
+        abort(400)
+    per_page = request.args.get('per_page', current_app.config['PRODUCTS_PER_PAGE'], type=int)
+    per_page = max(1, min(per_page, current_app.config['MAX_PER_PAGE']))
+    if records:
+        # أعمدة الترتيب فقط، والاسم والسعر والصورة تُقرأ من product_table بدون كائنات Product
+        query = db.session.query(*columns)
+    elif query is None:
+        query = Product.query
+    try:
+        page = KeysetPage(query, columns, cursor=request.args.get('cursor'), per_page=per_page,
+                          descending=descending, tag=sort)
+    except ValueError:
+        abort(400)
+    return ResolvedPage(page, product_records) if records else page
+
+def cart_total(cart_items):
+    return sum(item.product.price * item.quantity for item in cart_items)
+
+# upsert في جملة واحدة لقواعد البيانات التي تدعم ON CONFLICT
+UPSERT_DIALECTS = ('sqlite', 'postgresql')
+
+def upsert_insert(session):
+    # وحدة اللهجة يستوردها المحرك عند الاتصال، فلا نستورد dialects.postgresql مع كل تشغيل
+    name = session.get_bind().dialect.name
+    return import_module(f'sqlalchemy.dialects.{name}').insert if name in UPSERT_DIALECTS else None
+
+def add_cart_items(user_id, quantities, replace=False, commit=True):
+    # quantities: {product_id: quantity} ويتم تجاهل المنتجات غير الموجودة
+    # مع replace=True تصبح السلة المحفوظة مطابقة لـ quantities تماماً بدلاً من إضافة الكميات
+    if replace:
+        db.session.execute(delete(CartItem).where(CartItem.user_id == user_id,
+                                                  CartItem.product_id.not_in(list(quantities))))
+        if not quantities:
+            if commit:
+                db.session.commit()
+            return
+    upsert = upsert_insert(db.session)
+    if upsert is None:
+        for product_id, quantity in quantities.items():
+            if db.session.get(Product, product_id) is None:
+                continue
+            cart_item = CartItem.query.filter_by(user_id=user_id, product_id=product_id).first()
+            if cart_item:
+                cart_item.quantity = quantity if replace else cart_item.quantity + quantity
+            else:
+                db.session.add(CartItem(user_id=user_id, product_id=product_id, quantity=quantity))
+        if commit:
+            db.session.commit()
+        return
+
+    rows = (select(literal(user_id), Product.id, case(quantities, value=Product.id))
+            .where(Product.id.in_(list(quantities))))
+    stmt = upsert(CartItem).from_select(['user_id', 'product_id', 'quantity'], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'product_id'],
+        set_={'quantity': stmt.excluded.quantity if replace
+              else CartItem.__table__.c.quantity + stmt.excluded.quantity},
+    )
+    db.session.execute(stmt)
+    if commit:
+        db.session.commit()
+
+def checkout_cart(user_id, full_name, address, phone):
+    # تحويل السلة إلى طلب بعمليات على مستوى المجموعة داخل معاملة واحدة قصيرة
+    order = Order(
+        user_id=user_id,
+        full_name=full_name,
+        address=address,
+        phone=phone,
+        total=0,
+        status='pending'
+    )
+    db.session.add(order)
+    db.session.flush()
+
+    # حذف السلة أولاً مع RETURNING: الأسطر المحذوفة هي بالضبط الأسطر التي تدخل الطلب
+    # (في READ COMMITTED سطر يُضاف أو كمية تتغير بين INSERT ... SELECT و DELETE كانت تُحذف دون طلبها)
+    lines = db.session.execute(
+        delete(CartItem).where(CartItem.user_id == user_id)
+        .returning(CartItem.product_id, CartItem.quantity)).all()
+    # نسخ أسعار المنتجات الحالية إلى عناصر الطلب، والمنتجات المحذوفة لا تدخل الطلب
+    prices = dict(db.session.execute(
+        select(Product.id, Product.price).where(Product.id.in_({line.product_id for line in lines}))).all())
+    items = [{'order_id': order.id, 'product_id': line.product_id, 'quantity': line.quantity,
+              'price': prices[line.product_id]} for line in lines if line.product_id in prices]
+    if not items:
+        db.session.rollback()
+        return None
+    db.session.execute(insert(OrderItem), items)
+    order.total = sum(item['price'] * item['quantity'] for item in items)
+    job_queue.enqueue('order_placed', {'order_id': order.id}, key=f'order_placed:{order.id}', commit=False)
+    db.session.commit()
+    return order
+
+def date_range_filters(column, date_from=None, date_to=None):
+    # نهاية الفترة شاملة لليوم كاملاً
+    filters = []
+    if date_from:
+        filters.append(column >= datetime.combine(date_from, time.min))
+    if date_to:
+        filters.append(column < datetime.combine(date_to + timedelta(days=1), time.min))
+    return filters
+
+def order_filters(status=None, date_from=None, date_to=None):
+    filters = date_range_filters(Order.date_created, date_from, date_to)
+    if status:
+        filters.append(Order.status == status)
+    return filters
+
+def order_stats(date_from=None, date_to=None, top=10):
+    # الإحصائيات محسوبة في قاعدة البيانات حسب الفترة المحددة
+    # صف لكل يوم في الفترة بدون حد، فالفترة نفسها تحدد عدد الصفوف
+    filters = order_filters(date_from=date_from, date_to=date_to)
+    by_status = dict(
+        db.session.query(Order.status, func.count(Order.id))
+        .filter(*filters)
+        .group_by(Order.status)
+        .all()
+    )
+    day = func.date(Order.date_created)
+    revenue = (db.session.query(day.label('day'), func.count(Order.id), func.sum(Order.total))
+               .filter(*filters, Order.status != 'cancelled')
+               .group_by(day)
+               .order_by(day.desc())
+               .all())
+    quantity = func.sum(OrderItem.quantity).label('quantity')
+    top_products = (db.session.query(Product.id, Product.name, quantity,
+                                     func.sum(OrderItem.quantity * OrderItem.price))
+                    .join(OrderItem, OrderItem.product_id == Product.id)
+                    .join(Order, Order.id == OrderItem.order_id)
+                    .filter(*filters, Order.status != 'cancelled')
+                    .group_by(Product.id, Product.name)
+                    .order_by(desc('quantity'))
+                    .limit(top)
+                    .all())
+    return {
+        'date_from': date_from.isoformat() if date_from else None,
+        'date_to': date_to.isoformat() if date_to else None,
+        'by_status': by_status,
+        'revenue_by_day': [{'day': str(d), 'orders': n, 'revenue': total or 0} for d, n, total in revenue],
+        'top_products': [{'id': pid, 'name': name, 'quantity': q, 'revenue': total or 0}
+                         for pid, name, q, total in top_products],
+    }
+
+def orders_with_items():
+    return Order.query.options(
+        joinedload(Order.user),
+        selectinload(Order.items).joinedload(OrderItem.product),
+    )
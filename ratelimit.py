@@ -0,0 +1,135 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import fcntl
+except ImportError:  # بدون fcntl (ويندوز) يبقى القفل داخل العملية فقط، فقد يتجاوز العمال معاً الحد قليلاً
+    fcntl = None
+
+# عدد الطلبات المسموح بها خلال period ثانية، وهو أيضاً أقصى عدد متتالٍ (burst)
+Limit = namedtuple('Limit', 'count period')
+
+# كل خانة: بصمة المفتاح (0 = فارغة)، الرموز المتبقية، وقت آخر تحديث
+SLOT = struct.Struct('<Qdd')
+GROUP_SLOTS = 8
+GROUP_SIZE = SLOT.size * GROUP_SLOTS
+
+
+class RateLimited(Exception):
+    """تجاوز حد الطلبات، و retry_after عدد الثواني حتى يُسمح بطلب جديد"""
+
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+def key_hash(key):
+    # hash() في بايثون يختلف بين العمليات، لذلك نحتاج بصمة ثابتة
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class TokenBuckets:
+    """دلاء رموز (token bucket) في ملف مشترك بين عمال gunicorn عبر mmap
+
+    الملف مقسم إلى مجموعات من 8 خانات ولكل مفتاح مجموعة واحدة، فالفحص يقرأ 8 خانات على الأكثر
+    ويقفل جزء المجموعة فقط من الملف. عند امتلاء المجموعة تُستبدل الخانة الأقدم تحديثاً،
+    فحجم الملف ثابت مهما زاد عدد العناوين.
+    """
+
+    def __init__(self, path, groups=4096):
+        self.path = path
+        self.groups = groups
+        self.size = groups * GROUP_SIZE
+        self._table = None
+
+    def _open(self):
+        # mmap وقفل لكل عملية، لأن أقفال fcntl تخص العملية ولا تنتقل بعد fork
+        table = self._table
+        if table is None or table[0] != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < self.size:
+                os.ftruncate(fd, self.size)
+            table = (os.getpid(), fd, mmap.mmap(fd, self.size), threading.Lock())
+            self._table = table
+        return table
+
+    def hit(self, key, limit, now=None):
+        """استهلاك رمز من دلو المفتاح، ويعيد 0 عند السماح أو عدد الثواني حتى يتوفر رمز"""
+        now = time.time() if now is None else now
+        fingerprint = key_hash(key)
+        _, fd, mm, lock = self._open()
+        start = fingerprint % self.groups * GROUP_SIZE
+        rate = limit.count / limit.period
+        with lock:
+            if fcntl is not None:
+                fcntl.lockf(fd, fcntl.LOCK_EX, GROUP_SIZE, start)
+            try:
+                target = None
+                for offset in range(start, start + GROUP_SIZE, SLOT.size):
+                    slot_fingerprint, tokens, updated = SLOT.unpack_from(mm, offset)
+                    if slot_fingerprint == fingerprint:
+                        target = offset
+                        break
+                    # الخانات الفارغة وقتها 0 فتُختار قبل غيرها
+                    if target is None or updated < oldest:
+                        target, oldest = offset, updated
+                else:
+                    tokens, updated = float(limit.count), now
+                # الساعة قد ترجع للخلف بعد إعادة ضبطها، فلا نسمح بزمن سالب
+                tokens = min(limit.count, tokens + max(now - updated, 0) * rate)
+                if tokens >= 1:
+                    tokens -= 1
+                    retry_after = 0
+                else:
+                    retry_after = (1 - tokens) / rate
+                SLOT.pack_into(mm, target, fingerprint, tokens, now)
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, GROUP_SIZE, start)
+        return retry_after
+
+    def stats(self):
+        _, _, mm, _ = self._open()
+        used = sum(1 for offset in range(0, self.size, SLOT.size) if SLOT.unpack_from(mm, offset)[0])
+        return {'slots': self.groups * GROUP_SLOTS, 'used': used, 'bytes': self.size}
+
+
+class RateLimiter:
+    """سياسات الحدود لكل مسار: {endpoint: {scope: (count, period)}}
+
+    النطاق (scope) يحدد مفتاح الدلو، مثل عنوان IP أو المستخدم، وقيمته تأتي من keys
+    عند الفحص. النطاق الذي ليست له قيمة في الطلب الحالي لا يُفحص.
+    """
+
+    def __init__(self, buckets, policies):
+        self.buckets = buckets
+        self.policies = {endpoint: {scope: Limit(*limit) for scope, limit in scopes.items()}
+                         for endpoint, scopes in policies.items()}
+        self.allowed = 0
+        self.denied = 0
+
+    def check(self, endpoint, keys):
+        """keys دالة تعيد قيمة النطاق في الطلب الحالي، ويرفع RateLimited عند تجاوز أي حد"""
+        policy = self.policies.get(endpoint)
+        if not policy:
+            return
+        retry_after = 0
+        for scope, limit in policy.items():
+            value = keys(scope)
+            if value is None:
+                continue
+            retry_after = max(retry_after, self.buckets.hit(f'{endpoint}:{scope}:{value}', limit))
+        if retry_after:
+            self.denied += 1
+            raise RateLimited(retry_after)
+        self.allowed += 1
+
+    def stats(self):
+        return dict(self.buckets.stats(), allowed=self.allowed, denied=self.denied)
@@ -1,5 +1,9 @@
 import os
-from app import app, db, User, Settings
+from config import Config
+from factory import create_cli_app
+from migrate import stamp
+from models import db, User, Settings, catalog_stamp
+from passwords import PasswordHasher
 
 def reset_database():
     # حذف قاعدة البيانات القديمة
@@ -7,10 +11,17 @@ def reset_database():
     if os.path.exists(db_path):
         os.remove(db_path)
         print("تم حذف قاعدة البيانات القديمة")
+    # ملفات WAL قديمة بجانب قاعدة بيانات جديدة قد تُطبق عليها عند أول اتصال
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
 
     # إنشاء قاعدة البيانات الجديدة
-    with app.app_context():
+    with create_cli_app().app_context():
         db.create_all()
+        stamp(db.engine)
+        # جدول المنتجات المشترك قد يكون مبنياً من قاعدة بيانات سابقة
+        catalog_stamp.bump()
         
         # إنشاء الإعدادات الافتراضية
         default_settings = Settings(
@@ -24,7 +35,7 @@ def reset_database():
         # إنشاء حساب المسؤول
         admin = User(
             username='admin',
-            password='admin123',
+            password=PasswordHasher.from_config(Config).hash('admin123'),
             is_admin=True
         )
         db.session.add(admin)
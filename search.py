@@ -0,0 +1,278 @@
+import math
+import re
+import threading
+from collections import defaultdict
+
+from sqlalchemy import text
+
+from database import primary_reads
+
+# التشكيل والتطويل
+_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_LETTERS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+})
+_TOKEN = re.compile(r'\w+')
+
+# السوابق واللواحق الشائعة (بعد التوحيد تصبح التاء المربوطة هاء)
+_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال', 'و')
+_SUFFIXES = ('ها', 'ان', 'ات', 'ون', 'ين', 'يه', 'ه', 'ي')
+
+# معاملات BM25
+K1 = 1.2
+B = 0.75
+NAME_WEIGHT = 2
+
+
+def normalize(value):
+    """توحيد أشكال الألف والياء والتاء المربوطة وحذف التشكيل"""
+    value = _DIACRITICS.sub('', value or '')
+    return value.translate(_LETTERS).lower()
+
+
+def stem(token):
+    """تجذيع خفيف بحذف السوابق واللواحق مع الحفاظ على جذع لا يقل عن ثلاثة أحرف"""
+    if not token or not '\u0600' <= token[0] <= '\u06ff':
+        return token
+    for prefix in _PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 3:
+            token = token[len(prefix):]
+            break
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    return token
+
+
+def analyze(value):
+    return [stem(token) for token in _TOKEN.findall(normalize(value))]
+
+
+def document_terms(name, description):
+    # نعطي الاسم وزناً أكبر من الوصف
+    return analyze(name) * NAME_WEIGHT + analyze(description)
+
+
+class InvertedIndex:
+    """فهرس مقلوب في الذاكرة مع ترتيب BM25"""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        self.total_length = 0
+
+    def add(self, doc_id, terms):
+        self.remove(doc_id)
+        counts = defaultdict(int)
+        for term in terms:
+            counts[term] += 1
+        for term, count in counts.items():
+            self.postings[term][doc_id] = count
+        self.lengths[doc_id] = len(terms)
+        self.total_length += len(terms)
+
+    def remove(self, doc_id):
+        length = self.lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in list(self.postings):
+            docs = self.postings[term]
+            if docs.pop(doc_id, None) is not None and not docs:
+                del self.postings[term]
+
+    def search(self, terms, limit=50):
+        if not self.lengths:
+            return []
+        total = len(self.lengths)
+        average = self.total_length / total or 1
+        scores = defaultdict(float)
+        for term in set(terms):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = K1 * (1 - B + B * self.lengths[doc_id] / average)
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [doc_id for doc_id, _ in ranked[:limit]]
+
+
+class PythonBackend:
+    """فهرس داخل كل عامل، يعاد بناؤه عند تغير إصدار الكتالوج"""
+
+    def __init__(self, db, model, stamp):
+        self.db = db
+        self.model = model
+        self.stamp = stamp
+        self.index = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def _ensure(self):
+        version = self.stamp.read()
+        if self.index is not None and self.version == version:
+            return
+        with self.lock:
+            if self.index is not None and self.version == version:
+                return
+            index = InvertedIndex()
+            # الفهرس يُحفظ باسم إصدار الختم، فيُبنى من الأساسية وليس من نسخة قد تكون متأخرة
+            with primary_reads(self.db.session):
+                rows = self.db.session.execute(
+                    self.db.select(self.model.id, self.model.name, self.model.description)
+                    .execution_options(yield_per=1000))
+                for doc_id, name, description in rows:
+                    index.add(doc_id, document_terms(name, description))
+            self.index, self.version = index, version
+
+    def add(self, product):
+        # تحديث تدريجي للعامل الحالي، والعمال الآخرون يعيدون البناء عند تغير الإصدار
+        if self.index is None:
+            return
+        with self.lock:
+            self.index.add(product.id, document_terms(product.name, product.description))
+            # commit المنتج في هذا الخيط غيّر الختم: إذا لم يتغير شيء آخر قبله أو بعده
+            # فالفهرس محدث حتى الإصدار الجديد ولا داعي لإعادة بنائه عند البحث التالي
+            bump = self.stamp.last_bump()
+            if bump is not None and bump[0] == self.version and self.stamp.read() == bump[1]:
+                self.version = bump[1]
+
+    def search(self, terms, limit):
+        self._ensure()
+        return self.index.search(terms, limit)
+
+    def reset(self):
+        self.index = None
+
+    def reindex(self):
+        # العمال الآخرون يعيدون البناء عند تغير ختم الإصدار
+        self.reset()
+
+
+class Fts5Backend:
+    """فهرس SQLite FTS5 داخل قاعدة البيانات نفسها ومشترك بين جميع العمال"""
+
+    table = 'product_search'
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+        self.ready = False
+
+    def _ensure(self):
+        if self.ready:
+            return
+        exists = self.db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': self.table}).first()
+        if not exists:
+            self.db.session.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                "USING fts5(name, description, tokenize = 'unicode61')"))
+            self._fill()
+            self.db.session.commit()
+        self.ready = True
+
+    def _fill(self):
+        with primary_reads(self.db.session):
+            rows = self.db.session.execute(
+                self.db.select(self.model.id, self.model.name, self.model.description)
+                .execution_options(yield_per=1000))
+        batch = []
+        for row in rows:
+            batch.append(self._params(*row))
+            if len(batch) >= 1000:
+                self._insert(batch)
+                batch = []
+        if batch:
+            self._insert(batch)
+
+    @staticmethod
+    def _params(doc_id, name, description):
+        return {
+            'id': doc_id,
+            'name': ' '.join(analyze(name)),
+            'description': ' '.join(analyze(description)),
+        }
+
+    def _insert(self, batch):
+        self.db.session.execute(text(
+            f"INSERT INTO {self.table} (rowid, name, description) "
+            "VALUES (:id, :name, :description)"), batch)
+
+    def add(self, product):
+        self._ensure()
+        self.db.session.execute(text(f"DELETE FROM {self.table} WHERE rowid = :id"), {'id': product.id})
+        self._insert([self._params(product.id, product.name, product.description)])
+        self.db.session.commit()
+
+    def search(self, terms, limit):
+        self._ensure()
+        match = ' OR '.join('"%s"' % term.replace('"', '""') for term in set(terms))
+        rows = self.db.session.execute(text(
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH :match "
+            f"ORDER BY bm25({self.table}, {NAME_WEIGHT}.0, 1.0) LIMIT :limit"),
+            {'match': match, 'limit': limit})
+        return [row[0] for row in rows]
+
+    def reset(self):
+        self.db.session.execute(text(f"DROP TABLE IF EXISTS {self.table}"))
+        self.db.session.commit()
+        self.ready = False
+
+    def reindex(self):
+        # إعادة الملء داخل معاملة واحدة بدلاً من حذف الجدول الذي تستخدمه العمليات الأخرى
+        self._ensure()
+        self.db.session.execute(text(f"DELETE FROM {self.table}"))
+        self._fill()
+        self.db.session.commit()
+
+
+class ProductSearch:
+    """واجهة البحث: تستخدم FTS5 إن كانت متاحة وإلا الفهرس المكتوب ببايثون"""
+
+    def __init__(self, db, model, stamp):
+        self.db = db
+        self.model = model
+        self.stamp = stamp
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if self._fts5_available():
+                self._backend = Fts5Backend(self.db, self.model)
+            else:
+                self._backend = PythonBackend(self.db, self.model, self.stamp)
+        return self._backend
+
+    def _fts5_available(self):
+        if self.db.engine.dialect.name != 'sqlite':
+            return False
+        used = self.db.session.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar()
+        return bool(used)
+
+    def index_product(self, product):
+        self.backend.add(product)
+
+    def search(self, query, limit=50):
+        terms = analyze(query)
+        if not terms:
+            return []
+        ids = self.backend.search(terms, limit)
+        if not ids:
+            return []
+        products = {p.id: p for p in self.model.query.filter(self.model.id.in_(ids))}
+        return [products[doc_id] for doc_id in ids if doc_id in products]
+
+    def reset(self):
+        self.backend.reset()
+
+    def reindex(self):
+        """بعد التعديلات الجماعية التي لا تمر بـ index_product"""
+        self.backend.reindex()
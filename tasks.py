@@ -0,0 +1,96 @@
+import os
+import tempfile
+
+from flask import current_app
+from sqlalchemy import delete, update
+
+import catalog
+import inbox
+from config import Config
+from extensions import job_queue
+from images import ImagePipeline
+from models import db, ArchivedMessage, CatalogUpload, ContactMessage, Order, Product, catalog_stamp
+from queries import catalog_changed, upsert_insert
+
+# إنشاء النسخ المصغرة للصور المرفوعة في الخلفية
+image_pipeline = ImagePipeline(Config.UPLOAD_FOLDER, '/static/uploads')
+
+@job_queue.task('image_variants', max_attempts=3, concurrency=2)
+def process_image_variants(filename):
+    image_pipeline.process(filename)
+
+@job_queue.task('catalog_import', max_attempts=2, concurrency=1, bind=True)
+def import_catalog(upload_id, job_id):
+    upload = db.session.get(CatalogUpload, upload_id)
+    if upload is None:
+        return {'error': 'upload not found'}
+    # القارئات تحتاج ملفاً (XLSX بالذات)، فنكتب الملف محلياً أثناء الاستيراد فقط
+    folder = current_app.config['CATALOG_IMPORT_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix='products-', suffix=f'.{upload.fmt}', dir=folder)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(upload.data)
+    fmt = upload.fmt
+    db.session.expunge(upload)
+    try:
+        report = _import_file(path, fmt, job_id)
+    finally:
+        os.remove(path)
+    # عند الفشل يبقى الملف في قاعدة البيانات لإعادة المحاولة
+    db.session.execute(delete(CatalogUpload).where(CatalogUpload.id == upload_id))
+    db.session.commit()
+    return report
+
+def _import_file(path, fmt, job_id):
+    upsert = upsert_insert(db.session)
+
+    def fetch_later(sku, url):
+        job_queue.enqueue('product_image', {'sku': sku, 'url': url},
+                          key=catalog.image_job_key(sku, url), commit=False)
+
+    try:
+        report = catalog.import_products(
+            db.session, Product, catalog.read_rows(path, fmt), upsert=upsert,
+            batch_size=current_app.config['CATALOG_IMPORT_BATCH_SIZE'],
+            on_batch=lambda progress: job_queue.report_progress(job_id, progress),
+            on_image=fetch_later)
+    except catalog.ImportFileError as e:
+        # لا فائدة من إعادة المحاولة لملف غير صالح
+        report = {'error': str(e)}
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        # الجمل المباشرة لا تمر بأحداث الجلسة، والدفعات السابقة للفشل محفوظة فعلاً
+        catalog_changed()
+    return report
+
+@job_queue.task('product_image', max_attempts=3, concurrency=4)
+def fetch_product_image(sku, url):
+    filename = catalog.fetch_image(url, current_app.config['UPLOAD_FOLDER'],
+                                   timeout=current_app.config['IMAGE_FETCH_TIMEOUT'],
+                                   max_bytes=current_app.config['MAX_CONTENT_LENGTH'])
+    db.session.execute(update(Product).where(Product.sku == sku)
+                       .values(image_url=f'/static/uploads/{filename}'))
+    job_queue.enqueue('image_variants', {'filename': filename}, key=f'image_variants:{filename}', commit=False)
+    db.session.commit()
+    catalog_stamp.bump()
+    return {'filename': filename}
+
+@job_queue.task('order_placed')
+def notify_order_placed(order_id):
+    order = db.session.get(Order, order_id)
+    if order is not None:
+        current_app.logger.info('New order #%s from %s, total %.3f', order.id, order.full_name, order.total or 0)
+
+@job_queue.task('contact_received')
+def notify_contact_received(message_id):
+    message = db.session.get(ContactMessage, message_id)
+    if message is not None:
+        current_app.logger.info('New contact message #%s from %s <%s>', message.id, message.name, message.email)
+
+@job_queue.task('archive_messages', concurrency=1)
+def archive_messages():
+    moved = inbox.move_archived(db.session, ContactMessage, ArchivedMessage,
+                                batch_size=current_app.config['MESSAGE_ARCHIVE_BATCH_SIZE'])
+    return {'moved': moved}
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# الإعدادات تُقرأ من البيئة عند استيراد config، فيجب ضبطها قبل استيراد التطبيق
+WORKDIR = tempfile.mkdtemp(prefix='tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'test.db')
+os.environ['INSTANCE_FOLDER'] = os.path.join(WORKDIR, 'instance')
+os.environ['METRICS_DIR'] = os.path.join(WORKDIR, 'metrics')
+os.environ['RATE_LIMIT_PATH'] = os.path.join(WORKDIR, 'ratelimit.table')
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jinja2 import DictLoader  # noqa: E402
+
+# المستودع لا يحتوي القوالب، فنستخدم قالباً يمر على نفس البيانات التي تعرضها الصفحات الحقيقية
+PAGE = (
+    '{{ settings.header_text }}'
+    '{% for message in get_flashed_messages() %}{{ message }}{% endfor %}'
+    '{% for product in products or [] %}{{ product.name }} {{ product.price }} {{ product.image_url }}{% endfor %}'
+    '{% if product %}{{ product.name }} {{ product.description }}{% endif %}'
+    '{% for line in cart_items or [] %}{{ line.product.name }} {{ line.quantity }}{% endfor %}'
+    '{% for order in orders or [] %}{{ order.user.username }} {{ order.items_list }}{% endfor %}'
+    '{% if order %}{{ order.user.username }} {{ order.items_list }}{% endif %}'
+)
+TEMPLATES = ('index.html', 'admin.html', 'login.html', 'admin_products.html', 'product_detail.html', 'cart.html',
+             'checkout.html', 'products.html', 'admin_settings.html', 'admin_orders.html', 'admin_users.html',
+             'contact.html', 'admin_messages.html', 'about.html', 'print_order.html')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from factory import create_app
+    from models import db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    app.jinja_loader = DictLoader({name: PAGE for name in TEMPLATES})
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture(scope='session')
+def admin(app):
+    from extensions import password_hasher
+    from models import db, User
+
+    with app.app_context():
+        user = User(username='admin', password=password_hasher.hash('admin123'), is_admin=True)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app):
+    from extensions import page_cache
+
+    page_cache.clear()
+    return app.test_client()
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
@@ -0,0 +1,25 @@
+import os
+
+from assets import build_manifest
+
+
+def test_manifest_builds_outside_the_source_folder(tmp_path):
+    static = tmp_path / 'static'
+    build = tmp_path / 'build'
+    (static / 'css').mkdir(parents=True)
+    (static / 'uploads').mkdir()
+    (static / 'css' / 'style.css').write_text('body { color: red; }' * 50)
+    (static / 'uploads' / 'photo.png').write_bytes(b'png')
+
+    first = build_manifest(str(static), str(build))
+    hashed = first['css/style.css']
+    assert hashed.startswith('css/style.') and os.path.exists(build / hashed)
+    assert 'uploads/photo.png' not in first
+    assert sorted(os.listdir(static / 'css')) == ['style.css']
+
+    (static / 'css' / 'style.css').write_text('body { color: blue; }' * 50)
+    second = build_manifest(str(static), str(build))
+    assert second['css/style.css'] != hashed
+    # البصمة القديمة ونسخها المضغوطة تُحذف
+    assert not any(name.startswith(os.path.basename(hashed)) for name in os.listdir(build / 'css'))
+
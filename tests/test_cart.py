@@ -0,0 +1,89 @@
+import pytest
+from flask import url_for
+
+from conftest import login
+
+
+@pytest.fixture
+def shopper(app):
+    from extensions import password_hasher
+    from models import db, CartItem, Product, User
+
+    with app.app_context():
+        user = User(username='shopper', password=password_hasher.hash('secret'))
+        products = [Product(name=f'cart product {i}', price=1.0) for i in range(150)]
+        db.session.add(user)
+        db.session.add_all(products)
+        db.session.commit()
+        ids = user.id, [product.id for product in products]
+    yield ids
+    with app.app_context():
+        db.session.execute(db.delete(CartItem).where(CartItem.user_id == ids[0]))
+        db.session.execute(db.delete(Product).where(Product.id.in_(ids[1])))
+        db.session.execute(db.delete(User).where(User.id == ids[0]))
+        db.session.commit()
+
+
+def saved_cart(app, user_id):
+    from models import db, CartItem
+
+    with app.app_context():
+        return dict(db.session.execute(db.select(CartItem.product_id, CartItem.quantity)
+                                       .where(CartItem.user_id == user_id)).all())
+
+
+def test_login_merges_the_visitor_cart_once(app, client, shopper):
+    user_id, product_ids = shopper
+    client.post(f'/add_to_cart/{product_ids[0]}', data={'quantity': 2})
+    for _ in range(2):
+        client.post('/login', data={'username': 'shopper', 'password': 'secret'})
+    assert saved_cart(app, user_id) == {product_ids[0]: 2}
+
+
+def test_cart_lines_keep_the_item_id_urls(app, client, shopper):
+    user_id, product_ids = shopper
+    login(client, user_id)
+    client.post('/api/cart/items', json={'items': [{'product_id': product_ids[0], 'quantity': 1},
+                                                   {'product_id': product_ids[1], 'quantity': 1}]})
+    with app.test_request_context():
+        from flask_login import login_user
+        from blueprints.cart import cart_lines, current_cart
+        from models import db, User
+
+        login_user(db.session.get(User, user_id))
+        lines = cart_lines(current_cart())
+        update, remove = (url_for('update_cart', item_id=lines[0].id),
+                          url_for('remove_from_cart', item_id=lines[1].id))
+    client.post(update, data={'quantity': 5})
+    client.get(remove)
+    assert saved_cart(app, user_id) == {product_ids[0]: 5}
+
+
+def test_logged_in_carts_are_not_limited_by_the_cookie(app, client, shopper):
+    user_id, product_ids = shopper
+    login(client, user_id)
+    response = client.post('/api/cart/items', json={'items': [
+        {'product_id': product_id, 'quantity': 1} for product_id in product_ids]})
+    assert response.status_code == 200
+    assert len(saved_cart(app, user_id)) == len(product_ids) > app.config['MAX_CART_LINES']
+
+
+def test_checkout_orders_the_lines_it_removes(app, shopper):
+    from models import db, Job, Order, OrderItem
+    from queries import add_cart_items, checkout_cart
+
+    user_id, product_ids = shopper
+    with app.app_context():
+        add_cart_items(user_id, {product_ids[0]: 2, product_ids[1]: 3})
+        order = checkout_cart(user_id, 'Shopper', 'Kuwait', '+965 55555555')
+        try:
+            items = dict(db.session.execute(db.select(OrderItem.product_id, OrderItem.quantity)
+                                            .where(OrderItem.order_id == order.id)).all())
+            assert items == {product_ids[0]: 2, product_ids[1]: 3}
+            assert db.session.get(Order, order.id).total == 5.0
+            assert saved_cart(app, user_id) == {}
+        finally:
+            db.session.execute(db.delete(OrderItem).where(OrderItem.order_id == order.id))
+            db.session.execute(db.delete(Job).where(Job.idempotency_key == f'order_placed:{order.id}'))
+            db.session.execute(db.delete(Order).where(Order.id == order.id))
+            db.session.commit()
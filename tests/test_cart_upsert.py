@@ -0,0 +1,72 @@
+import threading
+
+from flask import Flask
+from sqlalchemy import create_engine, func, select, text
+
+import migrate
+from config import Config
+from database import configure_engines
+from models import db, CartItem, Product, User
+from queries import add_cart_items
+
+THREADS = 4
+ADDS = 20
+
+
+def test_concurrent_adds_merge_into_one_row(app):
+    with app.app_context():
+        user = User(username='stress', password='x')
+        product = Product(name='stress', price=1)
+        db.session.add_all([user, product])
+        db.session.commit()
+        user_id, product_id = user.id, product.id
+
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def worker():
+        with app.app_context():
+            barrier.wait()
+            try:
+                for _ in range(ADDS):
+                    add_cart_items(user_id, {product_id: 1})
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    with app.app_context():
+        rows = db.session.execute(select(CartItem.quantity).where(CartItem.user_id == user_id)).scalars().all()
+    # بدون القيد الفريد و ON CONFLICT تظهر أسطر مكررة أو تضيع بعض الإضافات
+    assert rows == [THREADS * ADDS]
+
+
+def test_upsert_works_after_migrating_an_old_database(tmp_path):
+    url = f'sqlite:///{tmp_path}/old.db'
+    engine = create_engine(url)
+    # قاعدة بيانات من قبل القيد الفريد، وفيها أسطر مكررة لنفس المنتج
+    migrate.upgrade(engine, target=2, log=lambda message: None)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO user (id, username, password) VALUES (1, 'old', 'x')"))
+        conn.execute(text("INSERT INTO product (id, name, price) VALUES (1, 'p', 1)"))
+        conn.execute(text('INSERT INTO cart_item (user_id, product_id, quantity) VALUES (1, 1, 2), (1, 1, 3)'))
+    # 0003 يدمج المكرر و 0004 ينشئ uq_cart_item_user_product الذي يحتاجه ON CONFLICT
+    migrate.upgrade(engine, log=lambda message: None)
+
+    old = Flask(__name__)
+    old.config.from_object(Config)
+    old.config['SQLALCHEMY_DATABASE_URI'] = url
+    old.config['SQLALCHEMY_BINDS'] = {}
+    db.init_app(old)
+    configure_engines(old, db)
+    with old.app_context():
+        add_cart_items(1, {1: 4})
+        assert db.session.execute(select(func.count(), func.sum(CartItem.quantity))).one() == (1, 9)
+        db.session.remove()
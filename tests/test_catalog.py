@@ -0,0 +1,88 @@
+import io
+
+from sqlalchemy import create_engine, text
+
+import migrate
+from conftest import login
+
+
+def test_admin_product_round_trips_through_export(app, admin, client, tmp_path):
+    import catalog
+    from models import db, Product
+    from queries import upsert_insert
+
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    login(client, admin)
+    client.post('/admin/products', data={
+        'name': 'Round trip cup', 'description': 'cup', 'price': '1.5',
+        'image': (io.BytesIO(b'\x89PNG round trip'), 'cup.png')})
+    with app.app_context():
+        product = Product.query.filter_by(name='Round trip cup').one()
+        product_id = product.id
+        assert product.sku
+
+    try:
+        exported = client.get('/admin/export/products.csv').get_data(as_text=True)
+        path = tmp_path / 'products.csv'
+        path.write_text(exported.replace(',1.5,', ',2.5,'), encoding='utf-8')
+        with app.app_context():
+            report = catalog.import_products(db.session, Product, catalog.read_csv(str(path)),
+                                             upsert=upsert_insert(db.session))
+            assert report['invalid'] == 0
+            assert db.session.get(Product, product_id).price == 2.5
+            assert Product.query.filter_by(name='Round trip cup').count() == 1
+    finally:
+        with app.app_context():
+            db.session.execute(db.delete(Product).where(Product.name == 'Round trip cup'))
+            db.session.commit()
+
+
+def test_migration_backfills_missing_skus(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/sku.db')
+    migrate.upgrade(engine, target=8, log=lambda message: None)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO product (name, price, sku) VALUES ('a', 1, NULL), ('b', 1, ''), ('c', 1, 'C-1')"))
+    migrate.upgrade(engine, log=lambda message: None)
+    with engine.connect() as conn:
+        skus = dict(conn.execute(text('SELECT name, sku FROM product')).all())
+    assert skus['c'] == 'C-1'
+    assert skus['a'] and skus['b'] and skus['a'] != skus['b']
+
+
+def test_import_job_reads_the_upload_from_the_database(app, admin, client):
+    from extensions import job_queue
+    from models import db, CatalogUpload, DataVersion, Job, Product
+
+    login(client, admin)
+    response = client.post('/admin/products/import', data={
+        'file': (io.BytesIO(b'sku,name,price\nUPLOAD-1,Uploaded cup,3\n'), 'products.csv')})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    try:
+        with app.app_context():
+            assert CatalogUpload.query.count() == 1
+            while job_queue.run_one('tests'):
+                pass
+            assert db.session.get(Job, job_id).status == 'done'
+            assert Product.query.filter_by(sku='UPLOAD-1').one().price == 3
+            assert CatalogUpload.query.count() == 0
+            # عمليات الـ dynos الأخرى ترى التغيير من قاعدة البيانات
+            assert db.session.get(DataVersion, 'catalog').value > 0
+    finally:
+        with app.app_context():
+            db.session.execute(db.delete(Product).where(Product.sku == 'UPLOAD-1'))
+            db.session.execute(db.delete(Job))
+            db.session.commit()
+
+
+def test_version_stamp_is_shared_through_the_database(app, tmp_path):
+    from cache import VersionStamp
+    from models import SharedVersion
+
+    # ختمان بملفين مختلفين كأنهما على قرصين منفصلين
+    web = VersionStamp(str(tmp_path / 'web' / 'catalog.version'), SharedVersion('catalog'), poll_interval=0)
+    worker = VersionStamp(str(tmp_path / 'worker' / 'catalog.version'), SharedVersion('catalog'), poll_interval=0)
+    with app.app_context():
+        before = web.read()
+        version = worker.bump()
+        assert web.read() == version > before
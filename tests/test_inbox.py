@@ -0,0 +1,70 @@
+import importlib
+
+from sqlalchemy import text
+
+from pagination import KeysetPage
+
+date_format = importlib.import_module('migrations.0007_message_date_format')
+
+
+def inbox_ids(per_page):
+    from models import ContactMessage
+
+    ids, cursor = [], None
+    while True:
+        page = KeysetPage(ContactMessage.query, (ContactMessage.date_sent, ContactMessage.id),
+                          cursor=cursor, per_page=per_page, descending=True, tag='messages')
+        # بدون ترحيل الصيغة تعود الصفحة الأولى نفسها في كل مرة
+        assert not set(ids) & {message.id for message in page}
+        ids.extend(message.id for message in page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return ids
+
+
+def test_inbox_pages_past_the_first_page(app):
+    from models import db, ContactMessage
+
+    with app.app_context():
+        # رسائل من النموذج مباشرة، ورسائل بصيغة CURRENT_TIMESTAMP القديمة بعد ترحيلها
+        db.session.add_all(ContactMessage(name='new', email='a@example.com', message='x') for _ in range(5))
+        db.session.commit()
+        for _ in range(5):
+            db.session.execute(text(
+                "INSERT INTO contact_message (name, email, message, date_sent, status) "
+                "VALUES ('old', 'b@example.com', 'x', CURRENT_TIMESTAMP, 'unread')"))
+        date_format.upgrade(db.session.connection())
+        db.session.commit()
+        try:
+            expected = db.session.scalars(db.select(ContactMessage.id)).all()
+            ids = inbox_ids(per_page=3)
+            assert sorted(ids) == sorted(expected)
+            assert len(ids) == len(set(ids))
+        finally:
+            db.session.execute(db.delete(ContactMessage))
+            db.session.commit()
+
+
+def test_status_changes_keep_the_unread_counter_exact(app):
+    import inbox
+    from models import db, ContactMessage, MessageCounter
+
+    with app.app_context():
+        messages = [ContactMessage(name='c', email='c@example.com', message='x') for _ in range(4)]
+        db.session.add_all(messages)
+        db.session.commit()
+        ids = [message.id for message in messages]
+        try:
+            inbox.recount(db.session, ContactMessage, MessageCounter)
+            steps = [(ids[:2], 'read', 2), (ids, 'archived', 4), (ids[1:], 'unread', 3), (ids, 'unread', 1),
+                     (ids, 'read', 4)]
+            for selected, status, changed in steps:
+                assert inbox.set_status(db.session, ContactMessage, MessageCounter, selected, status) == changed
+                db.session.commit()
+                counted = db.session.scalar(db.select(db.func.count()).select_from(ContactMessage)
+                                            .where(ContactMessage.status == 'unread'))
+                assert inbox.unread_count(db.session, ContactMessage, MessageCounter) == counted
+        finally:
+            db.session.execute(db.delete(ContactMessage))
+            db.session.execute(db.delete(MessageCounter))
+            db.session.commit()
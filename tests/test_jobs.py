@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from jobs import JobQueue
+
+
+@pytest.fixture
+def queue(app):
+    from models import db, Job
+
+    queue = JobQueue(db, Job, stale_after=60)
+    queue.task('crashes', max_attempts=2)(lambda: None)
+    queue.task('limited', concurrency=1)(lambda: None)
+    with app.app_context():
+        db.session.execute(db.delete(Job))
+        db.session.commit()
+        yield queue
+        db.session.execute(db.delete(Job))
+        db.session.commit()
+
+
+def test_stale_job_fails_after_max_attempts(queue):
+    from models import db, Job
+
+    job = queue.enqueue('crashes')
+    for attempt in (1, 2):
+        assert queue.claim('worker').id == job.id
+        # العامل سقط أثناء التنفيذ فبقيت المهمة running
+        db.session.execute(db.update(Job).where(Job.id == job.id)
+                           .values(started_at=datetime.utcnow() - timedelta(minutes=5)))
+        db.session.commit()
+    assert queue.claim('worker') is None
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts) == ('failed', 2)
+
+
+def test_claim_update_enforces_concurrency(queue):
+    from models import db
+
+    first, second = queue.enqueue('limited'), queue.enqueue('limited')
+    now = datetime.utcnow()
+    assert queue._claim(first.id, 'limited', now, 'worker-1')
+    # عامل آخر قرأ العدد قبل مطالبة الأول: UPDATE نفسه يرفض تجاوز الحد
+    assert not queue._claim(second.id, 'limited', now, 'worker-2')
+    db.session.commit()
+    assert queue.claim('worker-2') is None
@@ -0,0 +1,34 @@
+from sqlalchemy import create_engine, inspect
+
+import migrate
+from models import db
+
+
+def schema(engine):
+    inspector = inspect(engine)
+    tables = {}
+    for table in inspector.get_table_names():
+        if table == migrate.VERSION_TABLE:
+            continue
+        # قيد فريد من create_all أو فهرس فريد من الترحيل، والأثر واحد
+        indexes = {index['name'] for index in inspector.get_indexes(table)}
+        indexes.update(constraint['name'] for constraint in inspector.get_unique_constraints(table))
+        tables[table] = ({column['name'] for column in inspector.get_columns(table)}, indexes)
+    return tables
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    migrated = create_engine(f'sqlite:///{tmp_path}/migrated.db')
+    migrate.upgrade(migrated, log=lambda message: None)
+    created = create_engine(f'sqlite:///{tmp_path}/created.db')
+    db.metadata.create_all(created)
+    assert schema(migrated) == schema(created)
+
+
+def test_initial_schema_does_not_follow_the_models(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/initial.db')
+    migrate.upgrade(engine, target=1, log=lambda message: None)
+    tables = schema(engine)
+    # الأعمدة والجداول التي أضافتها ترحيلات لاحقة
+    assert 'sku' not in tables['product'][0]
+    assert 'message_counter' not in tables
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from conftest import login
+
+
+def test_stats_default_to_recent_orders(app, admin, client):
+    from models import db, Order
+
+    with app.app_context():
+        now = datetime.utcnow()
+        orders = [Order(total=1, status='pending', date_created=now),
+                  Order(total=1, status='pending', date_created=now - timedelta(days=400))]
+        db.session.add_all(orders)
+        db.session.commit()
+        ids = [order.id for order in orders]
+    try:
+        login(client, admin)
+        recent = client.get('/admin/orders/stats').get_json()
+        assert recent['date_from'] == (now - timedelta(days=app.config['ORDER_STATS_DAYS'] - 1)).date().isoformat()
+        everything = client.get('/admin/orders/stats?from=2000-01-01').get_json()
+        assert everything['by_status']['pending'] == recent['by_status']['pending'] + 1
+    finally:
+        with app.app_context():
+            db.session.execute(db.delete(Order).where(Order.id.in_(ids)))
+            db.session.commit()
+
+
+def test_stats_window_with_only_an_end_date_and_long_ranges(app, admin, client):
+    from models import db, Order
+
+    with app.app_context():
+        end = datetime(2025, 6, 30, 12)
+        orders = [Order(total=1, status='pending', date_created=end - timedelta(days=day)) for day in range(60)]
+        db.session.add_all(orders)
+        db.session.commit()
+        ids = [order.id for order in orders]
+    try:
+        login(client, admin)
+        window = client.get('/admin/orders/stats?to=2025-06-30').get_json()
+        days = app.config['ORDER_STATS_DAYS']
+        assert window['date_from'] == (end - timedelta(days=days - 1)).date().isoformat()
+        assert len(window['revenue_by_day']) == days
+        # فترة أطول من 31 يوماً لا تُقتطع
+        long_range = client.get('/admin/orders/stats?from=2025-05-01&to=2025-06-30').get_json()
+        assert len(long_range['revenue_by_day']) == 60
+        assert client.get('/admin/orders/stats?from=yesterday').status_code == 400
+        assert client.get('/admin/orders?to=2025-13-01').status_code == 400
+    finally:
+        with app.app_context():
+            db.session.execute(db.delete(Order).where(Order.id.in_(ids)))
+            db.session.commit()
@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import login
+from pagination import encode_cursor
+
+DATE = {'$dt': '2026-01-01T00:00:00'}
+
+CRAFTED = [
+    ('/api/products', 'id', [[1]]),
+    ('/api/products', 'id', [2 ** 63]),
+    ('/api/products', 'id', [True]),
+    ('/api/products?sort=price', 'price', [10 ** 400, 1]),
+    ('/api/products?sort=price', 'price', ['1', 1]),
+    ('/api/products?sort=name', 'name', [{'a': 1}, 1]),
+    ('/admin/orders', 'orders', [DATE, [1]]),
+    ('/admin/orders', 'orders', ['2026-01-01', 1]),
+    ('/admin/messages', 'messages', [DATE, -2 ** 63 - 1]),
+]
+
+
+def crafted(tag, values):
+    # encode_cursor لا يتحقق من القيم، فنبني به مؤشرات لا يصنعها التطبيق
+    return encode_cursor(tag, values)
+
+
+@pytest.mark.parametrize('path, tag, values', CRAFTED)
+def test_crafted_cursor_is_rejected(app, admin, client, path, tag, values):
+    login(client, admin)
+    separator = '&' if '?' in path else '?'
+    response = client.get(f'{path}{separator}cursor={crafted(tag, values)}')
+    assert response.status_code == 400
+
+
+def test_valid_cursor_is_accepted(app, admin, client):
+    login(client, admin)
+    assert client.get(f'/api/products?sort=price&cursor={crafted("price", [1, 2 ** 63 - 1])}').status_code == 200
+    assert client.get(f'/admin/messages?cursor={crafted("messages", [DATE, 5])}').status_code == 200
@@ -0,0 +1,21 @@
+import pytest
+
+from passwords import PasswordHasher
+
+
+@pytest.mark.parametrize('method', ['scrypt', 'pbkdf2:sha256:1000', 'pbkdf2:sha1:1000'])
+def test_short_method_names_do_not_rehash_every_login(method):
+    hasher = PasswordHasher(method=method)
+    assert hasher.verify(hasher.hash('secret'), 'secret') == (True, False)
+
+
+def test_cost_change_rehashes():
+    old = PasswordHasher(method='pbkdf2:sha256:1000').hash('secret')
+    assert PasswordHasher(method='pbkdf2:sha256:2000').verify(old, 'secret') == (True, True)
+
+
+def test_unknown_user_costs_a_hash():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    assert hasher.verify(None, 'secret') == (False, False)
+    # نفس التكلفة التي يدفعها مستخدم موجود بكلمة مرور خاطئة
+    assert hasher.dummy_hash.startswith('pbkdf2:sha256:1000$')
@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import login
+
+# طلب لكل مسار له حد في QUERY_BUDGETS: (الطريقة، المسار، يحتاج تسجيل دخول، بيانات النموذج)
+ROUTES = {
+    'shop.home': ('GET', '/', False, None),
+    'shop.products': ('GET', '/products?sort=price', False, None),
+    'shop.product_detail': ('GET', '/product/1', False, None),
+    'shop.about': ('GET', '/about', False, None),
+    'cart.cart': ('GET', '/cart', True, None),
+    'cart.checkout': ('GET', '/checkout', True, None),
+    'cart.process_checkout': ('POST', '/process_checkout', True,
+                              {'full_name': 'Test', 'address': 'Kuwait', 'phone': '+965 12345678'}),
+    'admin.admin_orders': ('GET', '/admin/orders', True, None),
+    'admin.print_order': ('GET', '/admin/orders/1/print', True, None),
+}
+
+
+@pytest.fixture(scope='module')
+def catalog(app, admin):
+    from models import db, Order, OrderItem, Product
+
+    with app.app_context():
+        db.session.add_all(Product(name=f'product {i}', description='d', price=i + 0.5) for i in range(30))
+        db.session.flush()
+        for i in range(5):
+            order = Order(user_id=admin, full_name='Test', address='Kuwait', phone='1', total=0)
+            order.items = [OrderItem(product_id=product_id, quantity=2, price=1.5) for product_id in (1, 2, 3)]
+            db.session.add(order)
+        db.session.commit()
+
+
+@pytest.fixture
+def strict(app, admin, catalog):
+    from extensions import identity_cache, product_table
+    from models import db, CartItem, settings_cache
+
+    with app.app_context():
+        db.session.query(CartItem).delete()
+        db.session.add_all(CartItem(user_id=admin, product_id=product_id, quantity=1) for product_id in (4, 5, 6))
+        db.session.commit()
+        # الحدود للحالة المستقرة: الإعدادات وجدول المنتجات والهويات مخزنة مسبقاً في العامل
+        settings_cache.get()
+        product_table.stats()
+        identity_cache.get(admin)
+    yield
+    app.config['QUERY_BUDGET_STRICT'] = False
+    app.config['QUERY_COUNT_HEADER'] = False
+
+
+def test_every_budget_has_a_route(app):
+    assert set(app.config['QUERY_BUDGETS']) == set(ROUTES)
+
+
+@pytest.mark.parametrize('endpoint', sorted(ROUTES))
+def test_route_within_query_budget(app, client, admin, strict, endpoint):
+    method, path, logged_in, data = ROUTES[endpoint]
+    if logged_in:
+        login(client, admin)
+    app.config['QUERY_BUDGET_STRICT'] = True
+    app.config['QUERY_COUNT_HEADER'] = True
+    # مع QUERY_BUDGET_STRICT يرفع الطلب QueryBudgetExceeded عند تجاوز الحد
+    response = client.open(path, method=method, data=data)
+    assert response.status_code in (200, 302)
+    assert request_endpoint(app, path, method) == endpoint
+    assert int(response.headers['X-Query-Count']) <= app.config['QUERY_BUDGETS'][endpoint]
+
+
+def request_endpoint(app, path, method):
+    adapter = app.url_map.bind('localhost')
+    return adapter.match(path.split('?')[0], method=method)[0]
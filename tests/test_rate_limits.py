@@ -0,0 +1,13 @@
+def post_login(client, address):
+    return client.post('/login', data={'username': 'admin', 'password': 'wrong'},
+                       headers={'X-Forwarded-For': address})
+
+
+def test_login_limits_follow_the_forwarded_client(app, admin, client):
+    limit, _ = app.config['RATE_LIMITS']['auth.login']['username_ip']
+    # خلف موجه Heroku كل الطلبات تصل من عنوان الوكيل، والعميل في X-Forwarded-For
+    statuses = [post_login(client, '203.0.113.1').status_code for _ in range(limit + 1)]
+    assert statuses[-1] == 429
+    assert 429 not in statuses[:-1]
+    # عميل آخر ما زال يستطيع الدخول بنفس اسم المستخدم
+    assert post_login(client, '203.0.113.2').status_code == 200
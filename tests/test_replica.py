@@ -0,0 +1,47 @@
+import pytest
+from flask import Flask
+from sqlalchemy import select
+
+from config import Config
+from database import primary_reads
+from models import db, Product, settings_cache
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    # تطبيق مستقل بنسخة مقروءة بلا جداول: أي قراءة منها تفشل
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path}/primary.db'
+    app.config['SQLALCHEMY_BINDS'] = {'replica': f'sqlite:///{tmp_path}/replica.db'}
+    app.config['READ_REPLICA_ENDPOINTS'] = {'probe'}
+    db.init_app(app)
+
+    @app.route('/probe')
+    def probe():
+        replica = db.session.get_bind(clause=select(Product.id))
+        with primary_reads(db.session):
+            primary = db.session.get_bind(clause=select(Product.id))
+        return {'replica': replica is db.engines['replica'], 'primary': primary is db.engines[None]}
+
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+    # init_app أضاف metadata للنسخة المقروءة إلى db المشترك، و drop_all في التطبيق الرئيسي يبحث عن محركها
+    db.metadatas.pop('replica', None)
+
+
+def test_primary_reads_bypass_the_replica(replica_app):
+    assert replica_app.test_client().get('/probe').get_json() == {'replica': True, 'primary': True}
+
+
+def test_settings_snapshot_loads_from_the_primary(replica_app):
+    with replica_app.app_context():
+        db.session.execute(db.text("INSERT INTO settings (id, header_text) VALUES (1, 'from primary')"))
+        db.session.commit()
+    with replica_app.test_request_context('/probe'):
+        settings_cache.invalidate()
+        assert settings_cache.get().header_text == 'from primary'
+    settings_cache.invalidate()
@@ -0,0 +1,11 @@
+import logging
+import os
+
+from extensions import job_queue
+# create_app يستورد tasks فتُسجل المهام في job_queue
+from factory import create_app
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    job_queue.serve(create_app(), threads=int(os.environ.get('WORKER_THREADS', 1)),
+                    poll_interval=float(os.environ.get('WORKER_POLL_INTERVAL', 1)))